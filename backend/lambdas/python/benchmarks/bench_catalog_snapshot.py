@@ -0,0 +1,116 @@
+"""
+Cost of serving GET /medias from a catalog snapshot, on a catalog of --items items.
+
+    build:  SnapshotWriter over the whole catalog, file size raw and gzip compressed (what is stored in S3)
+    load:   decompressing the snapshot into /tmp and opening it - once per container and snapshot version
+    pages:  body of a 50 item page (first, random cursor, genre newest first) and of a single item, read from the
+            snapshot vs decoded from a DynamoDB wire page and serialized (the ddb path, without the round trip)
+
+Usage (from backend/lambdas/python):
+    PYTHONPATH=layer python benchmarks/bench_catalog_snapshot.py [--items 100000] [--repeat 200]
+"""
+
+import argparse, os, random, tempfile, time, zlib
+from fakes import GENRES, make_wire_item, media_id
+from jc_boto3_helper.dynamodb_client_table import decode_item
+from jc_custom_utilities.catalog_snapshot import (
+    CatalogSnapshot,
+    SnapshotWriter,
+    listing_name,
+)
+from jc_custom_utilities.functions import serialize_body
+
+PAGE_SIZE = 50
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def best_of(repeat: int, function) -> float:
+    return min(timed(function) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    wire_items = [make_wire_item(index) for index in range(args.items)]
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.snapshot")
+
+        def build():
+            writer = SnapshotWriter(path, ("genre", "catalog"), "created_at")
+            for wire_item in wire_items:
+                writer.add(decode_item(wire_item))
+            writer.close()
+
+        build_ms = timed(build)
+        with open(path, "rb") as file:
+            raw = file.read()
+        compressed = zlib.compress(raw, level=6, wbits=31)
+
+        def load():
+            with open(path, "wb") as file:
+                file.write(zlib.decompress(compressed, wbits=31))
+            CatalogSnapshot(path).close()
+
+        load_ms = best_of(5, load)
+        snapshot = CatalogSnapshot(path)
+
+        print(
+            f"{args.items} items: build {build_ms:.0f} ms, {len(raw) / 2**20:.1f} MiB raw, "
+            f"{len(compressed) / 2**20:.1f} MiB gzip, load {load_ms:.0f} ms"
+        )
+        print(f"{'page':<16}{'snapshot ms':>14}{'ddb decode ms':>16}")
+
+        def ddb_page(start: int) -> bytes:
+            items = [
+                decode_item(item) for item in wire_items[start : start + PAGE_SIZE]
+            ]
+            return serialize_body({"Items": items, "Count": len(items)})
+
+        cases = {
+            "first": (
+                lambda: snapshot.read_page(PAGE_SIZE),
+                lambda: ddb_page(0),
+            ),
+            "random_cursor": (
+                lambda: snapshot.read_page(
+                    PAGE_SIZE, exclusive_start_id=media_id(rng.randrange(args.items))
+                ),
+                lambda: ddb_page(rng.randrange(args.items)),
+            ),
+            "genre_newest": (
+                lambda: snapshot.read_page(
+                    PAGE_SIZE,
+                    listing=listing_name("genre", rng.choice(GENRES)),
+                    forward=False,
+                ),
+                lambda: ddb_page(rng.randrange(args.items)),
+            ),
+            "get_by_id": (
+                lambda: snapshot.get_item(media_id(rng.randrange(args.items))),
+                lambda: serialize_body(
+                    {"Item": decode_item(wire_items[rng.randrange(args.items)])}
+                ),
+            ),
+        }
+
+        for name, (from_snapshot, from_ddb) in cases.items():
+            print(
+                f"{name:<16}{best_of(args.repeat, from_snapshot):>14.4f}"
+                f"{best_of(args.repeat, from_ddb):>16.4f}"
+            )
+
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Signatures/sec for CloudFrontSigner.generate_presigned_url.
+
+    cold: private key registry cleared before every signature (pem parsed per signature - previous behavior)
+    warm: private key parsed once and reused through the registry
+
+URLs/sec of the policy engine against botocore's generic signer (previous behavior - build_policy with two
+datetime.now() calls, json.dumps of the policy, base64 and three replaces per url), over --urls distinct urls:
+
+    botocore:             botocore.signers.CloudFrontSigner.build_policy + generate_presigned_url
+    templates:            PolicyTemplate.render of the cached template of the url
+    templates (first use): template built for every url (cache cleared per url)
+
+once with the RSA signature stubbed out (the policy and url assembly alone) and once with the real 2048-bit RSA
+signature.
+
+Usage (from backend/lambdas/python):
+    PYTHONPATH=layer python benchmarks/bench_cloudfront_signer.py [--iterations 2000] [--urls 1000]
+"""
+
+import argparse, time
+from datetime import datetime, timedelta, timezone
+from botocore.signers import CloudFrontSigner as BotocoreCloudFrontSigner
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jc_boto3_helper import cloudfront_signer
+from jc_boto3_helper.cloudfront_signer import CloudFrontSigner
+
+PUBLIC_KEY_ID = "BENCHMARKKEYID"
+URL = "https://media.example.com/dev/titles/abc123/video.mp4"
+
+# stands in for the RSA signature when only the policy work is measured - the size of a 2048-bit signature
+STUB_SIGNATURE = bytes(256)
+
+
+def generate_pem_key() -> bytes:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+def run(pem_key: bytes, iterations: int, clear_registry: bool) -> float:
+    cloudfront_signer.clear_private_key_registry()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if clear_registry:
+            cloudfront_signer.clear_private_key_registry()
+
+        # signer is built per request, same as get_media_url
+        signer = CloudFrontSigner(public_key_id=PUBLIC_KEY_ID, pem_key=pem_key)
+        signer.generate_presigned_url(url=URL, expiration_in_seconds="3600")
+    elapsed = time.perf_counter() - start
+
+    return iterations / elapsed
+
+
+def sign_botocore(signer: BotocoreCloudFrontSigner, url: str) -> str:
+    expiration_time = datetime.now(timezone.utc) + timedelta(seconds=3600)
+    custom_policy = signer.build_policy(
+        url,
+        date_less_than=expiration_time,
+        date_greater_than=datetime.now(timezone.utc),
+    )
+
+    return signer.generate_presigned_url(url=url, policy=custom_policy)
+
+
+def sign_templates(signer: CloudFrontSigner, url: str) -> str:
+    now = int(time.time())
+
+    return signer._sign_url(url, now + 3600, now)
+
+
+def sign_templates_first_use(signer: CloudFrontSigner, url: str) -> str:
+    cloudfront_signer.policy_templates.clear()
+
+    return sign_templates(signer, url)
+
+
+def urls_per_second(sign, signer, urls: list[str], iterations: int) -> float:
+    # one untimed pass - builds the templates of the urls
+    for url in urls:
+        sign(signer, url)
+
+    start = time.perf_counter()
+    for index in range(iterations):
+        sign(signer, urls[index % len(urls)])
+    elapsed = time.perf_counter() - start
+
+    return iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--urls", type=int, default=1000)
+    args = parser.parse_args()
+
+    pem_key = generate_pem_key()
+
+    cold = run(pem_key, args.iterations, clear_registry=True)
+    warm = run(pem_key, args.iterations, clear_registry=False)
+
+    print(f"cold (parse per signature): {cold:10.1f} signatures/sec")
+    print(f"warm (registry reuse):      {warm:10.1f} signatures/sec")
+    print(f"speedup:                    {warm / cold:10.2f}x")
+
+    urls = [
+        f"https://media.example.com/media/drama/{index:06d}/index.m3u8"
+        for index in range(args.urls)
+    ]
+    signer = CloudFrontSigner(public_key_id=PUBLIC_KEY_ID, pem_key=pem_key)
+
+    for name, rsa_signer, iterations in (
+        ("policy only", lambda message: STUB_SIGNATURE, args.iterations * 50),
+        ("with RSA", signer._rsa_signer, args.iterations),
+    ):
+        stub_signer = CloudFrontSigner(public_key_id=PUBLIC_KEY_ID, pem_key=pem_key)
+        stub_signer._rsa_signer = rsa_signer
+        botocore_signer = BotocoreCloudFrontSigner(PUBLIC_KEY_ID, rsa_signer)
+
+        botocore = urls_per_second(sign_botocore, botocore_signer, urls, iterations)
+        templates = urls_per_second(sign_templates, stub_signer, urls, iterations)
+        first_use = urls_per_second(
+            sign_templates_first_use, stub_signer, urls, iterations
+        )
+
+        print(f"\n{name}:")
+        print(f"  botocore:               {botocore:12.1f} urls/sec")
+        print(
+            f"  templates:              {templates:12.1f} urls/sec ({templates / botocore:.2f}x)"
+        )
+        print(
+            f"  templates (first use):  {first_use:12.1f} urls/sec ({first_use / botocore:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
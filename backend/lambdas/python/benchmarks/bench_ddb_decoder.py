@@ -0,0 +1,96 @@
+"""
+Deserialization cost per 1k items of a low-level (wire format) DynamoDB scan page.
+
+    resource: boto3 TypeDeserializer over every attribute - what the resource layer runs (Decimal numbers)
+    client:   lean decoder of DynamoDBClientTable (int/float numbers, TypeDeserializer fallback for sets)
+
+The decoded page is also serialized to the GET /medias body, as Decimal numbers are slower to encode.
+
+Usage (from backend/lambdas/python):
+    PYTHONPATH=layer python benchmarks/bench_ddb_decoder.py [--items 10000] [--repeat 20]
+"""
+
+import argparse, time
+from boto3.dynamodb.types import TypeDeserializer
+from jc_boto3_helper.dynamodb_client_table import decode_item
+from jc_custom_utilities.functions import serialize_body
+
+GENRES = ["drama", "comedy", "documentary", "thriller", "animation", "horror"]
+DESCRIPTION = "A short description of the media that is shown on the tile. " * 2
+
+
+def make_page(item_count: int) -> list[dict]:
+    return [
+        {
+            "id": {"S": f"media-{i:06d}"},
+            "title": {"S": f"Title number {i}"},
+            "description": {"S": DESCRIPTION},
+            "genre": {"S": GENRES[i % len(GENRES)]},
+            "tags": {"L": [{"S": GENRES[i % len(GENRES)]}, {"S": "new"}]},
+            "files": {
+                "M": {
+                    "hls": {"S": f"/media/{i:06d}/index.m3u8"},
+                    "thumbnail": {"S": f"/thumbnails/{i:06d}.jpg"},
+                }
+            },
+            "published": {"BOOL": True},
+            "duration": {"N": str(3600 + i)},
+            "rating": {"N": "4.5"},
+            "created_at": {"N": str(1728413887 + i)},
+        }
+        for i in range(item_count)
+    ]
+
+
+def decode_with_type_deserializer(page: list[dict]) -> list[dict]:
+    deserializer = TypeDeserializer()
+
+    return [
+        {key: deserializer.deserialize(value) for key, value in item.items()}
+        for item in page
+    ]
+
+
+def decode_with_lean_decoder(page: list[dict]) -> list[dict]:
+    return [decode_item(item) for item in page]
+
+
+def best_of(repeat: int, function) -> tuple[float, object]:
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    page = make_page(args.items)
+    per_1k = 1000 / args.items
+
+    print(f"{args.items} items, best of {args.repeat}")
+    print(f"{'backend':<12}{'decode ms/1k':>16}{'+ serialize ms/1k':>20}")
+
+    for name, decode in (
+        ("resource", decode_with_type_deserializer),
+        ("client", decode_with_lean_decoder),
+    ):
+        decode_seconds, items = best_of(args.repeat, lambda: decode(page))
+        serialize_seconds, _ = best_of(
+            args.repeat, lambda: serialize_body({"Items": items, "Count": len(items)})
+        )
+        print(
+            f"{name:<12}{decode_seconds * 1000 * per_1k:>16.3f}"
+            f"{(decode_seconds + serialize_seconds) * 1000 * per_1k:>20.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+End to end latency of get_medias.handler and get_media_url.handler against in-process DynamoDB and Secrets Manager
+stand-ins (benchmarks/fakes.py) and a real 2048-bit RSA key.
+
+Every scenario runs on catalogs of --sizes items, on two paths:
+
+    warm: module level caches kept between invocations (a reused Lambda container)
+    cold: every cache cleared before each invocation - item/response/url caches, secret cache and parsed key (the
+          search index is kept - it is built once per container and catalog)
+
+Reported per scenario: p50/p95/p99/mean latency (ms), invocations/sec and allocations per invocation (tracemalloc
+peak and net KiB, measured in a separate pass so tracing does not skew the latency). Module init time (the
+module level setup the Lambda runtime runs once per container) is reported per handler.
+
+--latency-ms adds a simulated network round trip to every DynamoDB and Secrets Manager request, so the cold path
+shows what overlapping I/O saves.
+
+Usage (from backend/lambdas/python):
+    python benchmarks/bench_handlers.py [--sizes 10,1000,100000] [--iterations 300] [--cold-iterations 50]
+                                        [--latency-ms 0] [--output benchmarks/results/handlers.json]
+"""
+
+import argparse, importlib.util, json, os, platform, random, sys, time, tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "layer"))
+
+from fakes import (
+    GENRES,
+    FakeAWS,
+    FakeDynamoDBTable,
+    FakeItemTable,
+    FakeSecretsManager,
+    generate_pem_key,
+    media_id,
+)
+
+SECRET_ID = "benchmark/cloudfront-private-key"
+PRESIGNED_URL_TABLE_NAME = "benchmark-presigned-urls"
+
+# medias pre-signed by presign_warmer before the get_media_url scenarios - the presigned_url_warmed scenario
+# requests these, the others any media
+TRENDING_MEDIAS = 100
+
+# configuration the handlers read at import - set before they are loaded
+HANDLER_ENV = {
+    "AWS_LAMBDA_FUNCTION_NAME": "benchmark",
+    "AWS_DEFAULT_REGION": "us-east-2",
+    "DEFAULT_AWS_REGION": "us-east-2",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "METADATA_DDB_TABLE_NAME": "benchmark-metadata",
+    "CF_PRIVATE_KEY_SECRET_ID": SECRET_ID,
+    "CF_PUBLIC_KEY_ID": "BENCHMARKKEYID",
+    "CLOUDFRONT_DOMAIN": "https://media.example.com",
+    "CF_COOKIE_DOMAIN": ".example.com",
+    "CF_DEFAULT_URL_EXP": "3600",
+    "PRESIGNED_URL_DDB_TABLE_NAME": PRESIGNED_URL_TABLE_NAME,
+}
+
+
+def load_handler(function_name: str):
+    """
+    Executes function/<name>/main.py as a fresh module and returns it with its init time in ms.
+    """
+    path = os.path.join(ROOT, "function", function_name, "main.py")
+    spec = importlib.util.spec_from_file_location(f"{function_name}_main", path)
+    module = importlib.util.module_from_spec(spec)
+
+    start = time.perf_counter()
+    spec.loader.exec_module(module)
+
+    return module, (time.perf_counter() - start) * 1000
+
+
+def reset_get_medias(module) -> None:
+    module.response_cache.clear()
+
+    if module.metadata_table.item_cache is not None:
+        module.metadata_table.item_cache.cache.clear()
+
+
+def rebuild_search_index(module) -> None:
+    # the index outlives the caches (it is refreshed, not expired) - rebuilt once the catalog is replaced, before
+    # the scenarios, as the background build of a container would have done by then
+    module.search_index_state.update(
+        version=None, refreshed_at=None, rebuilt_at=None, newest=None, refresh=None
+    )
+    module.refresh_search_index(module.current_snapshot())
+
+
+def reset_get_media_url(module) -> None:
+    from jc_boto3_helper import cloudfront_signer
+
+    if module.ddb_table.item_cache is not None:
+        module.ddb_table.item_cache.cache.clear()
+    if module.secrets_manager.cache is not None:
+        module.secrets_manager.cache.clear()
+    if module.presigned_url_cache is not None:
+        module.presigned_url_cache.cache.clear()
+    if module.presigned_url_table is not None:
+        module.presigned_url_table.item_cache.cache.clear()
+
+    cloudfront_signer.clear_private_key_registry()
+
+
+def api_event(
+    path: str,
+    method: str = "GET",
+    query: dict = None,
+    path_parameters: dict = None,
+    body: dict = None,
+) -> dict:
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": {"Accept-Encoding": "gzip"},
+        "queryStringParameters": query,
+        "pathParameters": path_parameters,
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def get_medias_scenarios(encode_cursor) -> dict:
+    def random_id(rng: random.Random, size: int) -> str:
+        return media_id(rng.randrange(size))
+
+    def media_by_id(rng: random.Random, size: int) -> dict:
+        selected_id = random_id(rng, size)
+
+        return api_event(
+            f"/medias/{selected_id}", path_parameters={"media-id": selected_id}
+        )
+
+    return {
+        "list_first_page": lambda rng, size: api_event(
+            "/medias", query={"limit": "50"}
+        ),
+        "list_random_page": lambda rng, size: api_event(
+            "/medias",
+            query={
+                "limit": "50",
+                "cursor": encode_cursor({"id": random_id(rng, size)}),
+            },
+        ),
+        "list_genre": lambda rng, size: api_event(
+            "/medias",
+            query={"genre": rng.choice(GENRES), "sort": "newest", "limit": "50"},
+        ),
+        # the fields of a catalog grid - title and thumbnail of every media
+        "list_fields": lambda rng, size: api_event(
+            "/medias", query={"limit": "50", "fields": "title,thumbnail"}
+        ),
+        "get_by_id": media_by_id,
+        # "number" matches every title, the number as a prefix a few
+        "search": lambda rng, size: api_event(
+            "/medias",
+            query={"q": f"number {rng.randrange(size)}", "limit": "50"},
+        ),
+    }
+
+
+def get_media_url_scenarios() -> dict:
+    def media_path(rng: random.Random, size: int, suffix: str) -> dict:
+        selected_id = media_id(rng.randrange(size))
+
+        return api_event(
+            f"/media/{selected_id}/{suffix}",
+            method="POST",
+            path_parameters={"media-id": selected_id},
+        )
+
+    return {
+        "presigned_url": lambda rng, size: media_path(rng, size, "presigned-url"),
+        "presigned_url_warmed": lambda rng, size: media_path(
+            rng, min(size, TRENDING_MEDIAS), "presigned-url"
+        ),
+        "signed_cookies": lambda rng, size: media_path(rng, size, "signed-cookies"),
+        "batch_presigned_urls_25": lambda rng, size: api_event(
+            "/media/presigned-urls",
+            method="POST",
+            body={
+                "media_ids": [
+                    media_id(index) for index in rng.sample(range(size), min(size, 25))
+                ]
+            },
+        ),
+    }
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+
+    return sorted_values[index]
+
+
+def run_scenario(handler, make_event, size: int, iterations: int, reset=None) -> dict:
+    rng = random.Random(size)
+    events = [make_event(rng, size) for _ in range(iterations)]
+    latencies = []
+    errors = 0
+
+    # one untimed invocation - warms the caches on the warm path, imports lazily loaded modules on both
+    if reset:
+        reset()
+    handler(events[0], None)
+
+    for event in events:
+        if reset:
+            reset()
+
+        start = time.perf_counter()
+        response = handler(event, None)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        if response.get("statusCode") not in (200, 304):
+            errors += 1
+
+    latencies.sort()
+    allocations = measure_allocations(handler, events[: min(iterations, 50)], reset)
+
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": sum(latencies) / len(latencies),
+        "invocations_per_second": len(latencies) / (sum(latencies) / 1000),
+        **allocations,
+    }
+
+
+def measure_allocations(handler, events: list[dict], reset=None) -> dict:
+    peak_bytes = 0
+    net_bytes = 0
+
+    tracemalloc.start()
+    for event in events:
+        if reset:
+            reset()
+
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        handler(event, None)
+        after, peak = tracemalloc.get_traced_memory()
+
+        peak_bytes += peak - before
+        net_bytes += after - before
+    tracemalloc.stop()
+
+    return {
+        "alloc_peak_kib": peak_bytes / len(events) / 1024,
+        "alloc_net_kib": net_bytes / len(events) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,1000,100000")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--cold-iterations", type=int, default=50)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument(
+        "--output", default=os.path.join(ROOT, "benchmarks", "results", "handlers.json")
+    )
+    args = parser.parse_args()
+
+    os.environ.update(HANDLER_ENV)
+    os.environ["LOG_LEVEL"] = args.log_level
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print("generating rsa key...")
+    fake_aws = FakeAWS(
+        table=FakeDynamoDBTable(0),
+        secrets_manager=FakeSecretsManager({SECRET_ID: generate_pem_key()}),
+        latency_ms=args.latency_ms,
+        tables={PRESIGNED_URL_TABLE_NAME: FakeItemTable()},
+    )
+    fake_aws.install()
+
+    get_medias, get_medias_init_ms = load_handler("get_medias")
+    get_media_url, get_media_url_init_ms = load_handler("get_media_url")
+    presign_warmer, _ = load_handler("presign_warmer")
+
+    from jc_custom_utilities.functions import encode_cursor
+    from jc_custom_utilities.metrics import metrics
+
+    # the per-invocation EMF lines stay on (their cost is part of the latency) but out of the report
+    devnull = open(os.devnull, "w")
+    metrics.emit = lambda line: devnull.write(line + "\n")
+
+    handlers = [
+        (
+            "get_medias",
+            get_medias,
+            get_medias_scenarios(encode_cursor),
+            lambda: reset_get_medias(get_medias),
+        ),
+        (
+            "get_media_url",
+            get_media_url,
+            get_media_url_scenarios(),
+            lambda: reset_get_media_url(get_media_url),
+        ),
+    ]
+    results = []
+
+    print(
+        f"init: get_medias {get_medias_init_ms:.1f} ms, get_media_url {get_media_url_init_ms:.1f} ms"
+    )
+    print(
+        f"{'handler':<15}{'scenario':<25}{'items':>8}{'path':>6}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'inv/s':>9}{'peak KiB':>10}{'err':>5}"
+    )
+
+    for size in sizes:
+        fake_aws.services["DynamoDB_20120810"] = FakeDynamoDBTable(size)
+        rebuild_search_index(get_medias)
+        fake_aws.tables[PRESIGNED_URL_TABLE_NAME] = FakeItemTable()
+        presign_warmer.handler(
+            {
+                "media_ids": [
+                    media_id(index) for index in range(min(size, TRENDING_MEDIAS))
+                ]
+            },
+            None,
+        )
+
+        for handler_name, module, scenarios, reset in handlers:
+            for scenario_name, make_event in scenarios.items():
+                for path, iterations, path_reset in (
+                    ("warm", args.iterations, None),
+                    ("cold", args.cold_iterations, reset),
+                ):
+                    reset()
+                    result = {
+                        "handler": handler_name,
+                        "scenario": scenario_name,
+                        "catalog_size": size,
+                        "path": path,
+                        **run_scenario(
+                            module.handler, make_event, size, iterations, path_reset
+                        ),
+                    }
+                    results.append(result)
+
+                    print(
+                        f"{handler_name:<15}{scenario_name:<25}{size:>8}{path:>6}"
+                        f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                        f"{result['invocations_per_second']:>9.0f}{result['alloc_peak_kib']:>10.1f}"
+                        f"{result['errors']:>5}"
+                    )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "metadata_table_backend": os.getenv("METADATA_TABLE_BACKEND", "client"),
+            "iterations": args.iterations,
+            "cold_iterations": args.cold_iterations,
+            "log_level": args.log_level,
+            "latency_ms": args.latency_ms,
+        },
+        "init_ms": {
+            "get_medias": get_medias_init_ms,
+            "get_media_url": get_media_url_init_ms,
+        },
+        "results": results,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=4)
+
+    print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
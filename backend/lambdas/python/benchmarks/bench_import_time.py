@@ -0,0 +1,172 @@
+"""
+Cold-start import cost of each Lambda handler, from `python -X importtime`, checked against a budget.
+
+Every handler module is imported in a fresh interpreter the way the Lambda runtime does it (layer on the path,
+AWS_LAMBDA_FUNCTION_NAME set). Modules the bare interpreter already imports are left out, and the best of
+--repeat runs is reported along with the top packages by self time. The run fails (exit code 1) when:
+
+    total_ms > max_total_ms         import time regressed
+    a forbidden module is imported  a lazily loaded dependency is imported on cold start again
+
+Usage (from backend/lambdas/python):
+    python benchmarks/bench_import_time.py [--repeat 5] [--top 10] [--budget benchmarks/import_budget.json]
+                                           [--output benchmarks/results/import_time.json]
+"""
+
+import argparse, json, os, subprocess, sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(ROOT, "benchmarks", "import_budget.json")
+
+# placeholder configuration - module level clients are created on import but never called
+HANDLER_ENV = {
+    "AWS_DEFAULT_REGION": "us-east-2",
+    "DEFAULT_AWS_REGION": "us-east-2",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "METADATA_DDB_TABLE_NAME": "benchmark-metadata",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """
+    Parses `-X importtime` output into {module: self time in microseconds}.
+    """
+    self_times = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, _, module = line[len("import time:") :].split("|", 2)
+        self_times[module.strip()] = int(self_us)
+
+    return self_times
+
+
+def run_importtime(statement: str, function_name: str = "") -> dict[str, int]:
+    env = {
+        **os.environ,
+        **HANDLER_ENV,
+        "AWS_LAMBDA_FUNCTION_NAME": function_name or "benchmark",
+        "PYTHONPATH": os.pathsep.join(
+            [
+                os.path.join(ROOT, "layer"),
+                os.path.join(ROOT, "function", function_name),
+            ]
+        ),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement} failed:\n{result.stderr[-2000:]}")
+
+    return parse_importtime(result.stderr)
+
+
+def top_level_package(module: str) -> str:
+    return module.split(".", 1)[0]
+
+
+def measure(function_name: str, repeat: int, baseline: set[str]) -> dict:
+    best_total_us = None
+    best_modules: dict[str, int] = {}
+
+    for _ in range(repeat):
+        self_times = run_importtime("import main", function_name)
+        modules = {
+            module: self_us
+            for module, self_us in self_times.items()
+            if module not in baseline
+        }
+        total_us = sum(modules.values())
+
+        if best_total_us is None or total_us < best_total_us:
+            best_total_us = total_us
+            best_modules = modules
+
+    packages: dict[str, int] = defaultdict(int)
+    for module, self_us in best_modules.items():
+        packages[top_level_package(module)] += self_us
+
+    return {
+        "total_ms": best_total_us / 1000,
+        "module_count": len(best_modules),
+        "modules": sorted(best_modules),
+        "packages_ms": {
+            package: self_us / 1000
+            for package, self_us in sorted(
+                packages.items(), key=lambda item: item[1], reverse=True
+            )
+        },
+    }
+
+
+def check_budget(function_name: str, report: dict, budget: dict) -> list[str]:
+    failures = []
+    max_total_ms = budget.get("max_total_ms")
+
+    if max_total_ms is not None and report["total_ms"] > max_total_ms:
+        failures.append(
+            f"{function_name}: {report['total_ms']:.1f} ms > budget {max_total_ms} ms"
+        )
+
+    for forbidden in budget.get("forbidden_modules", []):
+        if any(
+            module == forbidden or module.startswith(f"{forbidden}.")
+            for module in report["modules"]
+        ):
+            failures.append(f"{function_name}: imports forbidden module {forbidden}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget", default=DEFAULT_BUDGET)
+    parser.add_argument("--output", help="write the report as json to this path")
+    args = parser.parse_args()
+
+    with open(args.budget) as budget_file:
+        budgets: dict = json.load(budget_file)
+
+    baseline = set(run_importtime("pass"))
+    reports = {}
+    failures = []
+
+    for function_name, budget in budgets.items():
+        report = measure(function_name, args.repeat, baseline)
+        reports[function_name] = report
+        failures.extend(check_budget(function_name, report, budget))
+
+        print(
+            f"{function_name}: {report['total_ms']:.1f} ms, {report['module_count']} modules "
+            f"(budget {budget.get('max_total_ms')} ms, best of {args.repeat})"
+        )
+        for package, package_ms in list(report["packages_ms"].items())[: args.top]:
+            print(f"    {package:<40}{package_ms:>10.1f} ms")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output_file:
+            json.dump(reports, output_file, indent=4)
+
+    if failures:
+        print("\nimport budget exceeded:")
+        for failure in failures:
+            print(f"    {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
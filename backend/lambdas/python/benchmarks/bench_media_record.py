@@ -0,0 +1,101 @@
+"""
+Memory of a cached catalog held as item dicts vs MediaRecords, and the cost of converting between them.
+
+Items are decoded from JSON wire pages, as botocore parses them - every item has its own genre, catalog and tag
+strings, as in the item cache:
+
+    resource: TypeDeserializer items (Decimal numbers) - DynamoDBResourceTable
+    client:   lean decoder items (int/float numbers) - DynamoDBClientTable
+
+Memory is measured with tracemalloc while the items are held, per item.
+
+Usage (from backend/lambdas/python):
+    PYTHONPATH=layer python benchmarks/bench_media_record.py [--items 100000]
+"""
+
+import argparse, gc, json, time, tracemalloc
+from boto3.dynamodb.types import TypeDeserializer
+from fakes import make_wire_item
+from jc_boto3_helper.dynamodb_client_table import decode_item
+from jc_custom_utilities.media_record import MediaRecord
+
+PAGE_SIZE = 1000
+
+
+def load_items(item_count: int, backend: str) -> list[dict]:
+    deserializer = TypeDeserializer()
+    items = []
+
+    for start in range(0, item_count, PAGE_SIZE):
+        page = json.dumps(
+            [
+                make_wire_item(index)
+                for index in range(start, min(start + PAGE_SIZE, item_count))
+            ]
+        )
+
+        for wire_item in json.loads(page):
+            if backend == "resource":
+                items.append(
+                    {
+                        key: deserializer.deserialize(value)
+                        for key, value in wire_item.items()
+                    }
+                )
+            else:
+                items.append(decode_item(wire_item))
+
+    return items
+
+
+def held_bytes(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return current, held
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{args.items} items")
+    print(
+        f"{'backend':<10}{'dict MiB':>10}{'record MiB':>12}{'saved':>8}"
+        f"{'dict B/item':>13}{'record B/item':>15}{'from_item us':>14}{'to_item us':>12}"
+    )
+
+    for backend in ("resource", "client"):
+        dict_bytes, items = held_bytes(lambda: load_items(args.items, backend))
+
+        start = time.perf_counter()
+        records = [MediaRecord.from_item(item) for item in items]
+        from_item_us = (time.perf_counter() - start) / args.items * 1e6
+
+        start = time.perf_counter()
+        for record in records:
+            record.to_item()
+        to_item_us = (time.perf_counter() - start) / args.items * 1e6
+
+        del items, records
+        record_bytes, records = held_bytes(
+            lambda: [
+                MediaRecord.from_item(item) for item in load_items(args.items, backend)
+            ]
+        )
+        del records
+
+        print(
+            f"{backend:<10}{dict_bytes / 2**20:>10.1f}{record_bytes / 2**20:>12.1f}"
+            f"{1 - record_bytes / dict_bytes:>8.0%}{dict_bytes / args.items:>13.0f}"
+            f"{record_bytes / args.items:>15.0f}{from_item_us:>14.2f}{to_item_us:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Overhead of the per-invocation metrics (jc_custom_utilities/metrics.py).
+
+    primitives: ns per timer() block, increment() and flush() of a typical invocation's metrics
+    handlers:   warm p50/mean latency of the get_medias and get_media_url scenarios of bench_handlers.py with
+                METRICS_ENABLED on and off, and the difference
+
+EMF lines are written to os.devnull, so the cost of the write is included but the terminal is not.
+
+Usage (from backend/lambdas/python):
+    python benchmarks/bench_metrics.py [--size 1000] [--iterations 2000] [--rounds 5]
+"""
+
+import argparse, os, time
+
+from bench_handlers import (
+    HANDLER_ENV,
+    SECRET_ID,
+    get_media_url_scenarios,
+    get_medias_scenarios,
+    load_handler,
+    run_scenario,
+)
+from fakes import FakeAWS, FakeDynamoDBTable, FakeSecretsManager, generate_pem_key
+
+
+def ns_per_call(func, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def bench_primitives(metrics_module, iterations: int) -> dict:
+    metrics = metrics_module.metrics
+
+    def timed_block():
+        with metrics_module.timer("stage"):
+            pass
+
+    def counter():
+        metrics_module.increment("cache_hit")
+
+    def invocation_flush():
+        # the metrics of a warm get_media_url invocation
+        metrics.set_dimension("function_name", "get_media_url")
+        metrics.increment("cold_start", 0)
+        metrics.increment("item_cache_hit")
+        metrics.increment("secret_cache_hit")
+        metrics.increment("private_key_cache_hit")
+        metrics.increment("url_cache_miss")
+        metrics.record_timing("sign_url", 0.9)
+        metrics.record_timing("handler_duration", 1.2)
+        metrics.flush()
+
+    results = {}
+    for name, func in (
+        ("timer", timed_block),
+        ("increment", counter),
+        ("flush", invocation_flush),
+    ):
+        # timings are capped per metric, so the stored values do not grow with the iterations
+        metrics.reset()
+        results[name] = min(ns_per_call(func, iterations) for _ in range(3))
+
+    metrics_module.enabled = False
+    results["timer_disabled"] = min(
+        ns_per_call(timed_block, iterations) for _ in range(3)
+    )
+    metrics_module.enabled = True
+    metrics.reset()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.update(HANDLER_ENV)
+    os.environ["LOG_LEVEL"] = "WARNING"
+
+    fake_aws = FakeAWS(
+        table=FakeDynamoDBTable(args.size),
+        secrets_manager=FakeSecretsManager({SECRET_ID: generate_pem_key()}),
+    )
+    fake_aws.install()
+
+    get_medias, _ = load_handler("get_medias")
+    get_media_url, _ = load_handler("get_media_url")
+
+    from jc_custom_utilities import metrics as metrics_module
+    from jc_custom_utilities.functions import encode_cursor
+
+    devnull = open(os.devnull, "w")
+    metrics_module.metrics.emit = lambda line: devnull.write(line + "\n")
+
+    print("primitives (ns per call)")
+    for name, value in bench_primitives(metrics_module, args.iterations * 50).items():
+        print(f"    {name:<16}{value:>10.0f}")
+
+    scenarios = [
+        ("get_medias", get_medias, name, make_event)
+        for name, make_event in get_medias_scenarios(encode_cursor).items()
+    ] + [
+        ("get_media_url", get_media_url, name, make_event)
+        for name, make_event in get_media_url_scenarios().items()
+    ]
+
+    print(
+        f"\n{'handler':<15}{'scenario':<25}{'off p50':>10}{'on p50':>10}"
+        f"{'off mean':>10}{'on mean':>10}{'overhead':>10}"
+    )
+
+    for handler_name, module, scenario_name, make_event in scenarios:
+        timings = {True: [], False: []}
+
+        # alternate on/off rounds so drift affects both sides alike, keep the best round of each
+        for _ in range(args.rounds):
+            for enabled in (False, True):
+                metrics_module.enabled = enabled
+                timings[enabled].append(
+                    run_scenario(module.handler, make_event, args.size, args.iterations)
+                )
+
+        off = min(timings[False], key=lambda result: result["mean_ms"])
+        on = min(timings[True], key=lambda result: result["mean_ms"])
+        overhead_us = (on["mean_ms"] - off["mean_ms"]) * 1000
+
+        print(
+            f"{handler_name:<15}{scenario_name:<25}{off['p50_ms']:>10.3f}{on['p50_ms']:>10.3f}"
+            f"{off['mean_ms']:>10.3f}{on['mean_ms']:>10.3f}{overhead_us:>8.1f}us"
+        )
+
+    metrics_module.enabled = True
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Latency of SearchIndex queries on a catalog of --titles titles, and the cost of building and refreshing the index.
+
+Titles are 1-5 words drawn from a Zipf distributed vocabulary, so common words ('the', 'of') match a large share of
+the catalog as they would in a real one. Reported: build time, memory (tracemalloc, in a separate build), a sync()
+of the catalog with 1% of the items changed, and p50/p99 latency per query shape:
+
+    warm: word cache on - words repeat across queries, as popular searches do
+    cold: word cache off - every query word is matched and ranked from the postings
+
+Usage (from backend/lambdas/python):
+    PYTHONPATH=layer python benchmarks/bench_search_index.py [--titles 100000] [--queries 1000]
+"""
+
+import argparse, random, string, time, tracemalloc
+from jc_custom_utilities.search_index import SearchIndex
+
+GENRES = ["drama", "comedy", "documentary", "thriller", "animation", "horror"]
+COMMON_WORDS = ["the", "of", "a", "and", "in", "love", "night", "man", "last", "war"]
+TAGS = ["new", "popular", "classic", "award", "family", "series", "4k", "hdr"]
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set(COMMON_WORDS)
+
+    while len(words) < size:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))))
+
+    return COMMON_WORDS + sorted(words - set(COMMON_WORDS))
+
+
+def make_catalog(
+    rng: random.Random, title_count: int, vocabulary: list[str]
+) -> list[dict]:
+    # rank r is drawn with probability ~ 1 / r
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    return [
+        {
+            "id": f"media-{index:06d}",
+            "title": " ".join(
+                rng.choices(vocabulary, weights, k=rng.randint(1, 5))
+            ).title(),
+            "genre": GENRES[index % len(GENRES)],
+            "tags": rng.sample(TAGS, 2),
+        }
+        for index in range(title_count)
+    ]
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[
+        min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    catalog = make_catalog(rng, args.titles, vocabulary)
+
+    tracemalloc.start()
+    measured_index = SearchIndex()
+    measured_index.sync(catalog)
+    memory_mib = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    del measured_index
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.sync(catalog)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    changed = list(catalog)
+    for position in rng.sample(range(len(changed)), len(changed) // 100):
+        changed[position] = {
+            **changed[position],
+            "title": changed[position]["title"] + " Returns",
+        }
+    start = time.perf_counter()
+    indexed, removed = index.sync(changed)
+    sync_ms = (time.perf_counter() - start) * 1000
+
+    # first query after the sync rebuilds the sorted term list
+    start = time.perf_counter()
+    index.search("a", args.limit)
+    terms_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        f"{args.titles} titles: build {build_ms:.0f} ms, {memory_mib:.1f} MiB, "
+        f"sync with {indexed} changed {sync_ms:.0f} ms, term list rebuild {terms_ms:.1f} ms"
+    )
+
+    def rare_word() -> str:
+        return rng.choice(vocabulary[len(vocabulary) // 2 :])
+
+    def mid_word() -> str:
+        return rng.choice(vocabulary[len(COMMON_WORDS) : len(COMMON_WORDS) + 200])
+
+    shapes = {
+        "common_term": lambda: (rng.choice(COMMON_WORDS), None),
+        "mid_term": lambda: (mid_word(), None),
+        "rare_term": lambda: (rare_word(), None),
+        "two_terms": lambda: (f"{mid_word()} {rng.choice(COMMON_WORDS)}", None),
+        "prefix_2": lambda: (rare_word()[:2], None),
+        "prefix_4": lambda: (rare_word()[:4], None),
+        "term_and_genre": lambda: (mid_word(), {"genre": rng.choice(GENRES)}),
+        "common_and_genre": lambda: (
+            rng.choice(COMMON_WORDS),
+            {"genre": rng.choice(GENRES)},
+        ),
+    }
+
+    uncached_index = SearchIndex(word_cache_size=0)
+    uncached_index.sync(changed)
+
+    print(f"{'query':<20}{'path':>6}{'p50 us':>10}{'p99 us':>10}{'matches':>10}")
+
+    for name, make_query in shapes.items():
+        for path, searched_index in (("warm", index), ("cold", uncached_index)):
+            durations, matches = [], 0
+
+            for _ in range(args.queries):
+                query, filters = make_query()
+                start = time.perf_counter()
+                _, total = searched_index.search(query, args.limit, filters=filters)
+                durations.append((time.perf_counter() - start) * 1e6)
+                matches += total
+
+            durations.sort()
+            print(
+                f"{name:<20}{path:>6}{percentile(durations, 0.5):>10.1f}"
+                f"{percentile(durations, 0.99):>10.1f}{matches / args.queries:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
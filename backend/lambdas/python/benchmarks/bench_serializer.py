@@ -0,0 +1,94 @@
+"""
+Encode time and payload size of a GET /medias body with a 10k-item catalog of DynamoDB resource items (Decimal numbers).
+
+    json (default=str): previous json.dumps body - Decimal handled by str() for comparison, it raised TypeError before
+    json:               serialize_body with the standard library backend
+    orjson:             serialize_body with orjson (when installed)
+
+Usage (from backend/lambdas/python):
+    PYTHONPATH=layer python benchmarks/bench_serializer.py [--items 10000] [--repeat 20]
+"""
+
+import argparse, json, time
+from decimal import Decimal
+from unittest.mock import patch
+from jc_custom_utilities import functions
+from jc_custom_utilities.functions import serialize_body, compress_body
+
+GENRES = ["drama", "comedy", "documentary", "thriller", "animation", "horror"]
+DESCRIPTION = "A short description of the media that is shown on the tile. " * 2
+
+
+def make_catalog(item_count: int) -> dict:
+    items = [
+        {
+            "id": f"media-{i:06d}",
+            "title": f"Title number {i}",
+            "description": DESCRIPTION,
+            "genre": GENRES[i % len(GENRES)],
+            "tags": {GENRES[i % len(GENRES)], "new" if i % 3 else "popular"},
+            "s3_key": f"/media/{GENRES[i % len(GENRES)]}/{i:06d}/index.m3u8",
+            "thumbnail": f"/thumbnails/{i:06d}.jpg",
+            "duration": Decimal(3600 + i),
+            "rating": Decimal("4.5"),
+            "created_at": Decimal(1728413887 + i),
+        }
+        for i in range(item_count)
+    ]
+
+    return {"Items": items, "Count": item_count}
+
+
+def best_of(repeat: int, function) -> tuple[float, object]:
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.items)
+
+    backends = {
+        "json (default=str)": lambda: json.dumps(catalog, default=str).encode("utf-8"),
+        "json": lambda: _serialize_without_orjson(catalog),
+    }
+
+    if functions.orjson is not None:
+        backends["orjson"] = lambda: serialize_body(catalog)
+
+    print(f"{args.items} items, best of {args.repeat}")
+    print(f"{'backend':<20}{'encode ms':>12}{'bytes':>12}")
+
+    payload = b""
+    for name, encode in backends.items():
+        seconds, payload = best_of(args.repeat, encode)
+        print(f"{name:<20}{seconds * 1000:>12.2f}{len(payload):>12}")
+
+    print()
+    print(f"{'encoding':<20}{'compress ms':>12}{'bytes':>12}")
+
+    encodings = ["gzip"] + (["br"] if functions.brotli is not None else [])
+    for encoding in encodings:
+        seconds, compressed = best_of(
+            max(1, args.repeat // 4), lambda: compress_body(payload, encoding)
+        )
+        print(f"{encoding:<20}{seconds * 1000:>12.2f}{len(compressed):>12}")
+
+
+def _serialize_without_orjson(catalog: dict) -> bytes:
+    with patch.object(functions, "orjson", None):
+        return serialize_body(catalog)
+
+
+if __name__ == "__main__":
+    main()
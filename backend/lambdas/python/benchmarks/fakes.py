@@ -0,0 +1,314 @@
+"""
+In-process stand-ins for DynamoDB and Secrets Manager, for the handler benchmarks.
+
+Requests still go through the whole boto3/botocore stack (parameter validation, serialization, signing, response
+parsing and the resource layer's TypeDeserializer) - only the HTTP send is replaced, through botocore's
+`before-send` event, by a canned JSON response. Items are kept pre-serialized in wire format so the fake itself
+costs O(page size), whatever the catalog size.
+"""
+
+import json, time, uuid
+from botocore.awsrequest import AWSResponse
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+GENRES = ["drama", "comedy", "documentary", "thriller", "animation", "horror"]
+CATALOG_PARTITION_VALUE = "media"
+
+
+def generate_pem_key() -> bytes:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+def media_id(index: int) -> str:
+    return f"media-{index:06d}"
+
+
+def make_wire_item(index: int) -> dict:
+    genre = GENRES[index % len(GENRES)]
+
+    return {
+        "id": {"S": media_id(index)},
+        "catalog": {"S": CATALOG_PARTITION_VALUE},
+        "genre": {"S": genre},
+        "title": {"S": f"Title number {index}"},
+        "description": {"S": "A short description of the media shown on the tile."},
+        "s3_key": {"S": f"/media/{genre}/{index:06d}/index.m3u8"},
+        "thumbnail": {"S": f"/thumbnails/{index:06d}.jpg"},
+        "tags": {"L": [{"S": genre}, {"S": "new" if index % 3 else "popular"}]},
+        "duration": {"N": str(3600 + index)},
+        "rating": {"N": "4.5"},
+        "created_at": {"N": str(1728413887 + index)},
+    }
+
+
+class _Body:
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+
+    def stream(self, **kwargs):
+        yield self.content
+
+
+class FakeDynamoDBTable:
+    """
+    One table with a `catalog` and a `genre` index (both sorted by created_at). Supports the Scan, Query,
+    GetItem and BatchGetItem inputs the handlers send - equality key conditions, Limit, ExclusiveStartKey,
+    ScanIndexForward and ProjectionExpression on top level attributes.
+    """
+
+    def __init__(self, item_count: int) -> None:
+        self.item_count = item_count
+        self.items_json: list[str] = []
+        self.keys: list[dict] = []
+        self.positions: dict[str, int] = {}
+        self.partitions: dict[tuple[str, str], list[int]] = {}
+
+        for index in range(item_count):
+            item = make_wire_item(index)
+            self.items_json.append(json.dumps(item, separators=(",", ":")))
+            self.keys.append(
+                {
+                    "id": item["id"],
+                    "genre": item["genre"],
+                    "catalog": item["catalog"],
+                    "created_at": item["created_at"],
+                }
+            )
+            self.positions[media_id(index)] = index
+
+            for attribute in ("genre", "catalog"):
+                self.partitions.setdefault(
+                    (attribute, item[attribute]["S"]), []
+                ).append(index)
+
+        # positions of an id within each partition, for ExclusiveStartKey of a query
+        self.partition_positions = {
+            partition: {index: position for position, index in enumerate(indexes)}
+            for partition, indexes in self.partitions.items()
+        }
+        self.calls: dict[str, int] = {}
+
+    def handle(self, operation: str, request: dict) -> str:
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+        return getattr(self, operation.lower())(request)
+
+    def scan(self, request: dict) -> str:
+        start = 0
+
+        if request.get("ExclusiveStartKey"):
+            start = self.positions[request["ExclusiveStartKey"]["id"]["S"]] + 1
+
+        indexes = range(start, min(start + request.get("Limit", 1000), self.item_count))
+        last_key = (
+            {"id": self.keys[indexes[-1]]["id"]}
+            if indexes and indexes[-1] < self.item_count - 1
+            else None
+        )
+
+        return self._page(indexes, last_key, request)
+
+    def query(self, request: dict) -> str:
+        names = request.get("ExpressionAttributeNames", {})
+        values = request.get("ExpressionAttributeValues", {})
+        # "#n0 = :v0" - the handlers only query by partition key equality
+        name_placeholder, value_placeholder = request["KeyConditionExpression"].split(
+            " = "
+        )
+        attribute = names.get(name_placeholder, name_placeholder)
+        partition = (attribute, values[value_placeholder]["S"])
+
+        indexes = self.partitions.get(partition, [])
+        if not request.get("ScanIndexForward", True):
+            indexes = indexes[::-1]
+
+        start = 0
+        if request.get("ExclusiveStartKey"):
+            position = self.partition_positions[partition][
+                self.positions[request["ExclusiveStartKey"]["id"]["S"]]
+            ]
+            start = (
+                position + 1
+                if request.get("ScanIndexForward", True)
+                else len(indexes) - position
+            )
+
+        page = indexes[start : start + request.get("Limit", 1000)]
+        last_key = (
+            {
+                key: value
+                for key, value in self.keys[page[-1]].items()
+                if key in ("id", "created_at", attribute)
+            }
+            if page and start + len(page) < len(indexes)
+            else None
+        )
+
+        return self._page(page, last_key, request)
+
+    def getitem(self, request: dict) -> str:
+        position = self.positions.get(request["Key"]["id"]["S"])
+
+        if position is None:
+            return "{}"
+
+        item = self._project(position, request)
+
+        return f'{{"Item":{item}}}'
+
+    def batchgetitem(self, request: dict) -> str:
+        responses = {}
+
+        for table_name, table_request in request["RequestItems"].items():
+            responses[table_name] = [
+                json.loads(self._project(self.positions[key["id"]["S"]], table_request))
+                for key in table_request["Keys"]
+                if key["id"]["S"] in self.positions
+            ]
+
+        return json.dumps({"Responses": responses, "UnprocessedKeys": {}})
+
+    def _project(self, position: int, request: dict) -> str:
+        projection = request.get("ProjectionExpression")
+
+        if not projection:
+            return self.items_json[position]
+
+        names = request.get("ExpressionAttributeNames", {})
+        attributes = [
+            names.get(name.strip(), name.strip()) for name in projection.split(",")
+        ]
+        item = json.loads(self.items_json[position])
+
+        return json.dumps(
+            {
+                attribute: item[attribute]
+                for attribute in attributes
+                if attribute in item
+            }
+        )
+
+    def _page(self, indexes, last_key, request: dict) -> str:
+        body = f'{{"Items":[{",".join(self._project(index, request) for index in indexes)}],"Count":{len(indexes)},"ScannedCount":{len(indexes)}'
+
+        if last_key:
+            body += f',"LastEvaluatedKey":{json.dumps(last_key)}'
+
+        return body + "}"
+
+
+class FakeItemTable:
+    """
+    Table holding the items written to it - GetItem and BatchWriteItem (put requests) by `id`.
+    """
+
+    def __init__(self) -> None:
+        self.items_json: dict[str, str] = {}
+        self.calls: dict[str, int] = {}
+
+    def handle(self, operation: str, request: dict) -> str:
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+        return getattr(self, operation.lower())(request)
+
+    def getitem(self, request: dict) -> str:
+        item = self.items_json.get(request["Key"]["id"]["S"])
+
+        return f'{{"Item":{item}}}' if item else "{}"
+
+    def batchwriteitem(self, request: dict) -> str:
+        for table_requests in request["RequestItems"].values():
+            for table_request in table_requests:
+                item = table_request["PutRequest"]["Item"]
+                self.items_json[item["id"]["S"]] = json.dumps(item)
+
+        return json.dumps({"UnprocessedItems": {}})
+
+
+class FakeSecretsManager:
+    def __init__(self, secrets: dict[str, bytes]) -> None:
+        self.secrets = secrets
+        self.calls: dict[str, int] = {}
+
+    def handle(self, operation: str, request: dict) -> str:
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        secret_id = request["SecretId"]
+
+        return json.dumps(
+            {
+                "ARN": f"arn:aws:secretsmanager:us-east-2:000000000000:secret:{secret_id}",
+                "Name": secret_id,
+                "SecretString": self.secrets[secret_id].decode("utf-8"),
+                "VersionId": "v1",
+                "VersionStages": ["AWSCURRENT"],
+            }
+        )
+
+
+class FakeAWS:
+    """
+    Answers the DynamoDB and Secrets Manager requests of every client created from the shared session of
+    jc_boto3_helper.client_factory after install(). Install before the handler modules are imported - clients copy
+    the session's handlers.
+    `latency_ms` is slept before every response, standing in for the network round trip.
+    DynamoDB requests go to `table`, unless they name one of `tables` (table name -> FakeItemTable).
+    """
+
+    def __init__(
+        self,
+        table: FakeDynamoDBTable,
+        secrets_manager: FakeSecretsManager,
+        latency_ms: float = 0,
+        tables: dict = None,
+    ):
+        self.latency_ms = latency_ms
+        self.replace(table, secrets_manager, tables)
+
+    def replace(
+        self,
+        table: FakeDynamoDBTable,
+        secrets_manager: FakeSecretsManager,
+        tables: dict = None,
+    ) -> None:
+        """
+        Swaps the stand-ins answering the requests - installed clients keep calling this instance.
+        """
+        self.services = {"DynamoDB_20120810": table, "secretsmanager": secrets_manager}
+        self.tables = tables or {}
+
+    def install(self) -> None:
+        from jc_boto3_helper.client_factory import get_session
+
+        get_session().events.register("before-send", self.before_send)
+
+    def before_send(self, request, **kwargs) -> AWSResponse:
+        target = request.headers.get("X-Amz-Target")
+        target = target.decode("utf-8") if isinstance(target, bytes) else target
+        service, operation = target.split(".", 1)
+        request_body = json.loads(request.body)
+        table_name = request_body.get("TableName") or next(
+            iter(request_body.get("RequestItems", {})), None
+        )
+        body = self.tables.get(table_name, self.services[service]).handle(
+            operation, request_body
+        )
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        return AWSResponse(
+            request.url,
+            200,
+            {
+                "Content-Type": "application/x-amz-json-1.0",
+                "x-amzn-RequestId": str(uuid.uuid4()),
+            },
+            _Body(body.encode("utf-8")),
+        )
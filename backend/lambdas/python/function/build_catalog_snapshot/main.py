@@ -0,0 +1,80 @@
+from __future__ import annotations
+import os, tempfile
+from typing import TYPE_CHECKING
+from jc_custom_utilities.env import load_env
+from jc_boto3_helper.dynamodb_client_table import DynamoDBClientTable
+from jc_boto3_helper.catalog_snapshot_store import CatalogSnapshotStore
+from jc_custom_utilities.catalog_snapshot import SnapshotWriter
+from jc_custom_utilities.logger import logger_config, inject_invocation_context
+from jc_custom_utilities.metrics import log_metrics, timer
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+
+# Load env variable
+load_env()
+
+# Setup logger config
+logger = logger_config(__name__)
+
+# instantiate ddb table globally - the client backend, so items are serialized as get_medias serializes them
+metadata_table = DynamoDBClientTable(os.getenv("METADATA_DDB_TABLE_NAME"))
+
+snapshot_store = CatalogSnapshotStore(os.getenv("CATALOG_SNAPSHOT_BUCKET"))
+
+# partition keys of GENRE_INDEX_NAME and CATALOG_INDEX_NAME and their shared sort key - one listing per value
+LISTING_PARTITION_ATTRIBUTES = ("genre", "catalog")
+LISTING_SORT_ATTRIBUTE = "created_at"
+
+# items read per Scan request
+SCAN_PAGE_SIZE = int(os.getenv("CATALOG_SNAPSHOT_SCAN_PAGE_SIZE", 1000))
+
+
+@inject_invocation_context
+@log_metrics
+def handler(event: dict, context: LambdaContext):
+    """
+    Scans the metadata table into a catalog snapshot and publishes it, unless the catalog did not change since
+    the published version. Runs on a schedule.
+    """
+    path = os.path.join(tempfile.gettempdir(), "catalog-build.snapshot")
+
+    try:
+        writer = SnapshotWriter(
+            path,
+            partition_attributes=LISTING_PARTITION_ATTRIBUTES,
+            sort_attribute=LISTING_SORT_ATTRIBUTE,
+        )
+
+        # a sequential scan keeps the table's scan order, so table and snapshot cursors are interchangeable
+        with timer("catalog_snapshot_scan"):
+            for item in metadata_table.iter_scan(Limit=SCAN_PAGE_SIZE):
+                writer.add(item)
+
+        footer = writer.close()
+
+        logger.info(
+            "catalog snapshot %s built (%s items, %s bytes)",
+            footer["version"],
+            footer["item_count"],
+            os.path.getsize(path),
+        )
+
+        published = snapshot_store.publish(path, footer)
+
+        return {
+            "version": footer["version"],
+            "item_count": footer["item_count"],
+            "published": published,
+        }
+
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# local test invocation - not run when the module is imported by the Lambda runtime
+if __name__ == "__main__":
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+
+    logger.info(handler({}, LambdaContext()))
@@ -1,16 +1,29 @@
-import os, json, sys
-from dotenv import load_dotenv
+from __future__ import annotations
+import os, json, sys, time, posixpath
+from urllib.parse import urlparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
+from jc_custom_utilities.env import load_env
 from http import HTTPStatus
-from jc_boto3_helper.cloudfront_signer import CloudFrontSigner
+from jc_boto3_helper.cloudfront_signer import CloudFrontSigner, PresignedUrlCache
 from jc_boto3_helper.secrets_manager import SecretsManager
-from jc_boto3_helper.dynamodb_resource_table import DynamoDBResourceTable
-from jc_custom_utilities.logger import logger_config
-from jc_custom_utilities.functions import generate_api_response
-from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent
-from aws_lambda_powertools.utilities.typing import LambdaContext
+from jc_boto3_helper.dynamodb_resource_table import DynamoDBResourceTable, ItemCache
+from jc_boto3_helper.dynamodb_client_table import DynamoDBClientTable
+from jc_boto3_helper.client_factory import prewarm
+from jc_custom_utilities.logger import logger_config, inject_invocation_context
+from jc_custom_utilities.metrics import log_metrics, increment
+from jc_custom_utilities.functions import (
+    generate_api_response,
+    get_header,
+    parse_request_body,
+)
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent
+    from aws_lambda_powertools.utilities.typing import LambdaContext
 
 # Load env variable
-load_dotenv()
+load_env()
 
 # Setup logger config
 logger = logger_config(__name__)
@@ -19,40 +32,159 @@ logger = logger_config(__name__)
 secrets_manager = SecretsManager(os.getenv("DEFAULT_AWS_REGION"))
 
 # instantiate ddb resource client globally
-ddb_table = DynamoDBResourceTable(os.getenv("METADATA_DDB_TABLE_NAME"))
+ddb_table = DynamoDBResourceTable(
+    os.getenv("METADATA_DDB_TABLE_NAME"), item_cache=ItemCache()
+)
+
+# urls pre-signed by presign_warmer for trending medias - PRESIGNED_URL_DDB_TABLE_NAME unset signs every url live.
+# medias without one are remembered as long as found ones (ITEM_CACHE_TTL) - the warmer adds urls once per schedule
+# interval, so the lookup is repeated at most once per ttl for the medias that are signed live. Read from the io
+# pool while ddb_table is used by the handler thread - a client backend, since clients are thread safe and the
+# shared resource of ddb_table is not
+presigned_url_table = (
+    DynamoDBClientTable(
+        os.getenv("PRESIGNED_URL_DDB_TABLE_NAME"),
+        item_cache=ItemCache(negative_ttl=float(os.getenv("ITEM_CACHE_TTL", 60))),
+    )
+    if os.getenv("PRESIGNED_URL_DDB_TABLE_NAME")
+    else None
+)
+
+# open the ddb and secrets manager connections during init, so the first invocation skips the TLS handshakes
+if os.getenv("BOTO_PREWARM", "false").lower() == "true":
+    prewarm(
+        ("dynamodb", ddb_table.region),
+        ("secretsmanager", os.getenv("DEFAULT_AWS_REGION")),
+    )
+
+# signed urls are reused within an expiry bucket - CF_URL_CACHE_BUCKET_SECONDS=0 disables the cache
+url_cache_bucket_seconds = int(os.getenv("CF_URL_CACHE_BUCKET_SECONDS", 60))
+presigned_url_cache = (
+    PresignedUrlCache(
+        bucket_seconds=url_cache_bucket_seconds,
+        max_entries=int(os.getenv("CF_URL_CACHE_MAX_ENTRIES", 10000)),
+    )
+    if url_cache_bucket_seconds > 0
+    else None
+)
+
+# the private key secret and the pre-signed url are fetched on this pool while the media is looked up in ddb -
+# IO_MAX_WORKERS=0 runs the calls one after the other
+io_max_workers = int(os.getenv("IO_MAX_WORKERS", 2))
+io_executor = (
+    ThreadPoolExecutor(max_workers=io_max_workers, thread_name_prefix="io")
+    if io_max_workers > 0
+    else None
+)
+
+# validity of signed urls and cookies - an unset or empty CF_DEFAULT_URL_EXP falls back to one hour
+URL_EXPIRATION_IN_SECONDS = int(os.getenv("CF_DEFAULT_URL_EXP") or 3600)
+
+# Domain attribute of the signed cookies - a parent domain shared by the API and the CloudFront distribution (e.g.
+# .choiflix.com for api.choiflix.com and media.choiflix.com). Cookies scoped to the API host never reach
+# CloudFront, so signed cookies are refused with a 500 (a misconfigured function) while it is unset
+COOKIE_DOMAIN = os.getenv("CF_COOKIE_DOMAIN")
+
+# maximum number of media ids accepted by a single batch request
+MAX_BATCH_MEDIA_IDS = 100
 
 
+@inject_invocation_context
+@log_metrics
 def handler(event: APIGatewayProxyEvent, context: LambdaContext):
-    logger.debug(event)
+    # not the whole event - its Authorization and Cookie headers are credentials
+    logger.debug("%s %s", event.get("httpMethod"), event.get("path"))
 
     path_parameters: dict = event.get("pathParameters", {})
 
+    # check for signed cookies request - POST /media/{media-id}/signed-cookies
+    if (
+        path_parameters
+        and "media-id" in path_parameters
+        and (event.get("path") or "").endswith("/signed-cookies")
+    ):
+        if not COOKIE_DOMAIN:
+            logger.error("signed cookies requested but CF_COOKIE_DOMAIN is not set")
+            return generate_api_response(
+                status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+                body={"error": "Signed cookies are not enabled."},
+            )
+
+        logger.info("getting media key from ddb for signed cookies...")
+
+        cf_signer_future = prefetch_cf_signer()
+        s3_key = get_s3_key(media_id=path_parameters.get("media-id"))
+
+        if s3_key is None:
+            logger.error("s3_key not found")
+            cancel_prefetch(cf_signer_future)
+            return generate_api_response(
+                status_code=HTTPStatus.NOT_FOUND,
+                body={"error": "Media not found."},
+            )
+
+        return get_signed_cookies(s3_key, cf_signer_future)
+
     # check for missing media_id parameter
     if path_parameters and "media-id" in path_parameters:
         logger.info("getting url from ddb...")
 
-        url = make_url(media_id=path_parameters.get("media-id"))
+        media_id = path_parameters.get("media-id")
+        cf_signer_future = prefetch_cf_signer()
+        presigned_url_future = prefetch_warm_presigned_url(media_id)
+        url = make_url(media_id=media_id)
 
         if url is None:
             logger.error("url not found")
+            cancel_prefetch(cf_signer_future)
+            cancel_prefetch(presigned_url_future)
             return generate_api_response(
                 status_code=HTTPStatus.NOT_FOUND,
                 body={"error": "Media not found."},
             )
 
-        logger.debug(f"media url - {url}")
-    else:
-        logger.error(f"Invalid request")
+        presigned_url = resolve_prefetch(
+            presigned_url_future, get_warm_presigned_url, media_id
+        )
+
+        if presigned_url is not None:
+            cancel_prefetch(cf_signer_future)
+            return generate_api_response(
+                status_code=HTTPStatus.OK, body={"url": presigned_url}
+            )
+
+        logger.debug("media url - %s", url)
 
-        return generate_api_response(
-            status_code=HTTPStatus.BAD_REQUEST,
-            body={"error": f"Invalid request. Please provide a valid request."},
+        return get_presigned_url(url, cf_signer_future)
+
+    # check for batch request - POST /media/presigned-urls {"media_ids": [...]}
+    try:
+        request_body = parse_request_body(event)
+    except ValueError as e:
+        logger.error("%s", e)
+        request_body = {}
+
+    if "media_ids" in request_body:
+        logger.info("getting urls for a batch of medias...")
+
+        return get_presigned_urls(
+            request_body.get("media_ids"),
+            accept_encoding=get_header(event, "Accept-Encoding"),
         )
 
-    return get_presigned_url(url)
+    logger.error("Invalid request")
 
+    return generate_api_response(
+        status_code=HTTPStatus.BAD_REQUEST,
+        body={"error": f"Invalid request. Please provide a valid request."},
+    )
 
-def make_url(media_id: str):
+
+def build_media_url(s3_key: str) -> str:
+    return os.getenv("CLOUDFRONT_DOMAIN") + s3_key
+
+
+def get_s3_key(media_id: str):
     try:
         logger.info("getting media key from ddb")
         ddb_response: dict = ddb_table.get_item(
@@ -64,49 +196,299 @@ def make_url(media_id: str):
         item: dict = ddb_response.get("Item")
 
         if not item or "s3_key" not in item:
-            logger.info(f"s3_key not found for {media_id}")
+            logger.info("s3_key not found for %s", media_id)
             return
 
-        logger.info(f"s3_key found for {media_id}")
+        logger.info("s3_key found for %s", media_id)
+
+        return item.get("s3_key")
+
+    except Exception as e:
+        logger.error("An error occurred while fetching the media key: %s", e)
+        return
+
+
+def make_url(media_id: str):
+    try:
+        s3_key = get_s3_key(media_id)
+
+        if s3_key is None:
+            return
 
-        s3_key: str = item.get("s3_key")
-        url = os.getenv("CLOUDFRONT_DOMAIN") + s3_key
+        url = build_media_url(s3_key)
 
-        logger.debug(f"formulated url - {url}")
+        logger.debug("formulated url - %s", url)
 
         return url
 
     except Exception as e:
-        logger.error(f"An error occurred while fetching the URL: {e}")
+        logger.error("An error occurred while fetching the URL: %s", e)
         return
 
 
-def get_presigned_url(url: str):
+def get_warm_presigned_url(media_id: str) -> Optional[str]:
+    """
+    Returns the url pre-signed by presign_warmer for the media, or None when there is none with at least
+    CF_DEFAULT_URL_EXP seconds of validity left - the url is then signed live.
+    """
+    if presigned_url_table is None:
+        return
+
+    try:
+        item: dict = presigned_url_table.get_item(Key={"id": media_id}).get("Item")
+    except Exception as e:
+        logger.warning("pre-signed url lookup failed - %s", e)
+        return
+
+    if (
+        not item
+        or item.get("public_key_id") != os.getenv("CF_PUBLIC_KEY_ID")
+        or int(item.get("expires_at", 0)) - time.time() < URL_EXPIRATION_IN_SECONDS
+    ):
+        increment("presigned_url_warm_miss")
+        return
+
+    increment("presigned_url_warm_hit")
+    logger.info("pre-signed url found for %s", media_id)
+
+    return item.get("url")
+
+
+def get_s3_keys(media_ids: list[str]) -> dict:
+    """
+    Resolves the s3_key of every media id with a single chunked BatchGetItem.
+    Returns {media_id: s3_key} for found medias and the list of ids whose lookup did not complete.
+    """
+    ddb_response: dict = ddb_table.batch_get_item(
+        Keys=[{"id": media_id} for media_id in media_ids],
+        ProjectionExpression="id, s3_key",
+    )
+
+    s3_keys = {
+        item.get("id"): item.get("s3_key")
+        for item in ddb_response.get("Items", [])
+        if item.get("s3_key")
+    }
+    unprocessed_ids = [key.get("id") for key in ddb_response.get("UnprocessedKeys", [])]
+
+    logger.info("s3_key found for %s of %s medias", len(s3_keys), len(media_ids))
+
+    return {"s3_keys": s3_keys, "unprocessed_ids": unprocessed_ids}
+
+
+def get_cf_signer() -> CloudFrontSigner:
     global secrets_manager
 
+    logger.info("retrieving pem_key...")
+    # get pem_key using secret id of the private key
+    secret: dict = secrets_manager.get_secret_value(
+        SecretId=os.getenv("CF_PRIVATE_KEY_SECRET_ID")
+    )
+    pem_key: bytes = secret.get("SecretString")
+    logger.info("retrieved pem_key")
+
+    # instantiate cf_signer - Note: instantiated in this function scope for best security practice
+    # (the parsed private key itself is reused across warm invocations through the key registry)
+    return CloudFrontSigner(
+        public_key_id=os.getenv("CF_PUBLIC_KEY_ID"),
+        pem_key=pem_key,
+        url_cache=presigned_url_cache,
+    )
+
+
+def prefetch_cf_signer() -> Optional[Future]:
+    """
+    Starts get_cf_signer() on the io pool, so the secret fetch overlaps the ddb lookup of the media.
+    Returns None when the secret is already cached or the pool is disabled - resolve_cf_signer() then builds the
+    signer inline.
+    """
+    if io_executor is None:
+        return
+
+    if (
+        secrets_manager.cache is not None
+        and secrets_manager.cache.peek(SecretId=os.getenv("CF_PRIVATE_KEY_SECRET_ID"))
+        is not None
+    ):
+        return
+
+    return io_executor.submit(get_cf_signer)
+
+
+def prefetch_warm_presigned_url(media_id: str) -> Optional[Future]:
+    """
+    Starts get_warm_presigned_url() on the io pool, so medias without a pre-signed url pay no extra round trip
+    over the ddb lookup of the media. Returns None when there is no pre-signed url table or the pool is disabled.
+    """
+    if io_executor is None or presigned_url_table is None:
+        return
+
+    return io_executor.submit(get_warm_presigned_url, media_id)
+
+
+def resolve_prefetch(prefetch_future: Optional[Future], function, *args):
+    """
+    Returns the result of the prefetch of function(*args), or calls it inline when there was no prefetch or the
+    prefetch failed or was cancelled. Errors of the inline call are raised.
+    """
+    if prefetch_future is not None:
+        try:
+            return prefetch_future.result()
+        except Exception as e:
+            increment("prefetch_failed")
+            logger.warning("prefetch of %s failed - %r", function.__name__, e)
+
+    return function(*args)
+
+
+def resolve_cf_signer(cf_signer_future: Optional[Future] = None) -> CloudFrontSigner:
+    return resolve_prefetch(cf_signer_future, get_cf_signer)
+
+
+def cancel_prefetch(prefetch_future: Optional[Future]) -> None:
+    # a fetch that already started is left to complete - it only populates the secret or item cache
+    if prefetch_future is not None:
+        prefetch_future.cancel()
+
+
+def get_presigned_urls(media_ids: list[str], accept_encoding: Optional[str] = None):
+    if (
+        not isinstance(media_ids, list)
+        or not media_ids
+        or not all(isinstance(media_id, str) and media_id for media_id in media_ids)
+    ):
+        return generate_api_response(
+            status_code=HTTPStatus.BAD_REQUEST,
+            body={"error": "'media_ids' must be a non-empty list of media ids."},
+        )
+
+    # drop duplicates while keeping the requested order - BatchGetItem rejects duplicate keys
+    media_ids = list(dict.fromkeys(media_ids))
+
+    if len(media_ids) > MAX_BATCH_MEDIA_IDS:
+        return generate_api_response(
+            status_code=HTTPStatus.BAD_REQUEST,
+            body={
+                "error": f"A maximum of {MAX_BATCH_MEDIA_IDS} media ids can be requested at once."
+            },
+        )
+
+    cf_signer_future = prefetch_cf_signer()
+
+    try:
+        logger.info("getting media keys from ddb")
+        lookup = get_s3_keys(media_ids)
+        s3_keys: dict = lookup.get("s3_keys")
+        unprocessed_ids = set(lookup.get("unprocessed_ids"))
+
+        # one secret fetch and one parsed key shared by every url in the batch - none when nothing was found
+        if s3_keys:
+            cf_signer = resolve_cf_signer(cf_signer_future)
+        else:
+            cancel_prefetch(cf_signer_future)
+
+        expiration_in_seconds = URL_EXPIRATION_IN_SECONDS
+
+        logger.info("generating presigned urls...")
+        urls = {}
+
+        for media_id in media_ids:
+            if media_id in unprocessed_ids:
+                urls[media_id] = {"error": "Media lookup failed. Please retry."}
+                continue
+
+            if media_id not in s3_keys:
+                urls[media_id] = {"error": "Media not found."}
+                continue
+
+            try:
+                urls[media_id] = cf_signer.generate_presigned_url(
+                    url=build_media_url(s3_keys[media_id]),
+                    expiration_in_seconds=expiration_in_seconds,
+                )
+            except Exception as e:
+                urls[media_id] = {"error": f"{e}"}
+
+        logger.info("presigned urls generation completed")
+
+        status_code = HTTPStatus.OK
+        body = {"urls": urls}
+
+    except Exception as e:
+        status_code = HTTPStatus.BAD_REQUEST
+        body = {"message": f"{e}"}
+
+    finally:
+        # format/generate api response and return
+        return generate_api_response(
+            status_code=status_code, body=body, accept_encoding=accept_encoding
+        )
+
+
+def get_signed_cookies(s3_key: str, cf_signer_future: Optional[Future] = None):
     try:
-        logger.info("retrieving pem_key...")
-        # get pem_key using secret id of the private key
-        secret: dict = secrets_manager.get_secret_value(
-            SecretId=os.getenv("CF_PRIVATE_KEY_SECRET_ID")
+        # one policy covering every playlist/segment stored next to the media
+        media_prefix = posixpath.dirname(s3_key).rstrip("/")
+
+        if not media_prefix:
+            raise ValueError(
+                "Signed cookies require the media to be stored under a prefix."
+            )
+
+        resource = build_media_url(media_prefix) + "/*"
+
+        cf_signer = resolve_cf_signer(cf_signer_future)
+
+        logger.info("generating signed cookies...")
+        cf_signer_response = cf_signer.generate_signed_cookies(
+            resource=resource,
+            expiration_in_seconds=URL_EXPIRATION_IN_SECONDS,
+        )
+        logger.info("signed cookies generation successful")
+
+        cookie_attributes = [
+            f"Path={urlparse(build_media_url(media_prefix)).path or '/'}",
+            f"Max-Age={URL_EXPIRATION_IN_SECONDS}",
+            "Secure",
+            "HttpOnly",
+            "SameSite=Lax",
+            f"Domain={COOKIE_DOMAIN}",
+        ]
+
+        set_cookie_headers = [
+            "; ".join([f"{name}={value}", *cookie_attributes])
+            for name, value in cf_signer_response.get("cookies").items()
+        ]
+
+        return generate_api_response(
+            status_code=HTTPStatus.OK,
+            body={
+                "url": build_media_url(s3_key),
+                "resource": resource,
+                "expires": cf_signer_response.get("expires"),
+            },
+            multi_value_headers={"Set-Cookie": set_cookie_headers},
         )
-        pem_key: bytes = secret.get("SecretString")
-        logger.info("retrieved pem_key")
 
-        # instantiate cf_signer - Note: instantiated in this function scope for best security practice
-        cf_signer = CloudFrontSigner(
-            public_key_id=os.getenv("CF_PUBLIC_KEY_ID"), pem_key=pem_key
+    except Exception as e:
+        # format/generate api response and return
+        return generate_api_response(
+            status_code=HTTPStatus.BAD_REQUEST, body={"message": f"{e}"}
         )
 
+
+def get_presigned_url(url: str, cf_signer_future: Optional[Future] = None):
+    try:
+        cf_signer = resolve_cf_signer(cf_signer_future)
+
         logger.info("generating presigned url...")
         # generate a presigned url of the media
         cf_signer_response = cf_signer.generate_presigned_url(
             url=url,
-            expiration_in_seconds=os.getenv("CF_DEFAULT_URL_EXP", 3600),
+            expiration_in_seconds=URL_EXPIRATION_IN_SECONDS,
         )
 
         logger.info("presigned url generation successful")
-        logger.debug(cf_signer_response)
 
         status_code = HTTPStatus.OK
         body = cf_signer_response
@@ -120,39 +502,43 @@ def get_presigned_url(url: str):
         return generate_api_response(status_code=status_code, body=body)
 
 
-url = handler(
-    {
-        "resource": "/media/{media-id}/presigned-url",
-        "path": "/media/abc123/presigned-url",
-        "httpMethod": "POST",
-        "headers": None,
-        "multiValueHeaders": None,
-        "queryStringParameters": None,
-        "multiValueQueryStringParameters": None,
-        "pathParameters": {"media-id": "abc123"},
-        # "pathParameters": None,
-        "stageVariables": None,
-        "requestContext": {
-            "resourceId": "1c5yp2",
-            "resourcePath": "/media/{media-id}/presigned-url",
+# local test invocation - not run when the module is imported by the Lambda runtime
+if __name__ == "__main__":
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+
+    url = handler(
+        {
+            "resource": "/media/{media-id}/presigned-url",
+            "path": "/media/abc123/presigned-url",
             "httpMethod": "POST",
-            "extendedRequestId": "fWRzHEQ3iYcFSfg=",
-            "requestTime": "08/Oct/2024:20:30:50 +0000",
-            "path": "/media/{media-id}/presigned-url",
-            "accountId": "253320687396",
-            "protocol": "HTTP/1.1",
-            "stage": "test-invoke-stage",
-            "domainPrefix": "testPrefix",
-            "requestTimeEpoch": 1728419450066,
-            "requestId": "7f04cb34-b2a3-498a-bf39-6478fe511e04",
-            "identity": {},
-            "domainName": "testPrefix.testDomainName",
-            "apiId": "upgyrrudrg",
+            "headers": None,
+            "multiValueHeaders": None,
+            "queryStringParameters": None,
+            "multiValueQueryStringParameters": None,
+            "pathParameters": {"media-id": "abc123"},
+            # "pathParameters": None,
+            "stageVariables": None,
+            "requestContext": {
+                "resourceId": "1c5yp2",
+                "resourcePath": "/media/{media-id}/presigned-url",
+                "httpMethod": "POST",
+                "extendedRequestId": "fWRzHEQ3iYcFSfg=",
+                "requestTime": "08/Oct/2024:20:30:50 +0000",
+                "path": "/media/{media-id}/presigned-url",
+                "accountId": "253320687396",
+                "protocol": "HTTP/1.1",
+                "stage": "test-invoke-stage",
+                "domainPrefix": "testPrefix",
+                "requestTimeEpoch": 1728419450066,
+                "requestId": "7f04cb34-b2a3-498a-bf39-6478fe511e04",
+                "identity": {},
+                "domainName": "testPrefix.testDomainName",
+                "apiId": "upgyrrudrg",
+            },
+            "body": {"url": "https://choiflix.com/dev/test.mp4"},
+            "isBase64Encoded": False,
         },
-        "body": {"url": "https://choiflix.com/dev/test.mp4"},
-        "isBase64Encoded": False,
-    },
-    LambdaContext(),
-)
+        LambdaContext(),
+    )
 
-logger.debug(url)
+    logger.info(url.get("statusCode"))
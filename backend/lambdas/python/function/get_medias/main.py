@@ -1,37 +1,172 @@
-import os
+from __future__ import annotations
+import os, json, time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from http import HTTPStatus
-from dotenv import load_dotenv
-from jc_boto3_helper.dynamodb_resource_table import DynamoDBResourceTable
-from jc_custom_utilities.logger import logger_config
-from jc_custom_utilities.functions import generate_api_response
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+from jc_custom_utilities.env import load_env
+from boto3.dynamodb.conditions import Key
+from jc_boto3_helper.dynamodb_resource_table import (
+    DynamoDBResourceTable,
+    ItemCache,
+    build_projection,
+)
+from jc_boto3_helper.dynamodb_client_table import DynamoDBClientTable
+from jc_boto3_helper.client_factory import prewarm
+from jc_boto3_helper.catalog_snapshot_store import CatalogSnapshotStore
+from jc_custom_utilities.catalog_snapshot import CatalogSnapshot, listing_name
+from jc_custom_utilities.logger import logger_config, inject_invocation_context
+from jc_custom_utilities.metrics import increment, log_metrics, timer
+from jc_custom_utilities.cache import LRUCache
+from jc_custom_utilities.media_record import FIELDS, MediaRecord
+from jc_custom_utilities.search_index import SearchIndex, tokenize
+from jc_custom_utilities.exceptions import SearchIndexNotReadyError
+from jc_custom_utilities.functions import (
+    generate_api_response,
+    generate_not_modified_response,
+    get_header,
+    serialize_body,
+    compute_etag,
+    etag_matches,
+    encode_cursor,
+    decode_cursor,
+)
 from jc_custom_utilities.types import HTTPMethod
-from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent
-from aws_lambda_powertools.utilities.typing import LambdaContext
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent
+    from aws_lambda_powertools.utilities.typing import LambdaContext
 
 # Load env variable
-load_dotenv()
+load_env()
 
 # Setup logger config
 logger = logger_config(__name__)
 
-# instantiate ddb resource table globally
-metadata_table = DynamoDBResourceTable(os.getenv("METADATA_DDB_TABLE_NAME"))
+# ddb table backends - "client" skips the resource layer's Decimal deserialization (numbers are int/float)
+TABLE_BACKENDS = {"client": DynamoDBClientTable, "resource": DynamoDBResourceTable}
+
+# instantiate ddb table globally - items are cached as slotted MediaRecords, a fraction of the memory of dicts
+metadata_table: DynamoDBResourceTable = TABLE_BACKENDS[
+    os.getenv("METADATA_TABLE_BACKEND", "client")
+](
+    os.getenv("METADATA_DDB_TABLE_NAME"),
+    item_cache=ItemCache(record_type=MediaRecord),
+)
+
+# open the ddb connection during init, so the first invocation skips the TLS handshake
+if os.getenv("BOTO_PREWARM", "false").lower() == "true":
+    prewarm(("dynamodb", metadata_table.region))
+
+# page size of GET /medias when no limit is given, and the largest accepted limit
+DEFAULT_PAGE_SIZE = int(os.getenv("MEDIAS_DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.getenv("MEDIAS_MAX_PAGE_SIZE", 100))
+
+# GSIs backing the filtered listings:
+#   GENRE_INDEX_NAME   - partition key "genre", sort key "created_at"
+#   CATALOG_INDEX_NAME - partition key "catalog" (same value on every media), sort key "created_at"
+GENRE_INDEX_NAME = os.getenv("GENRE_INDEX_NAME", "genre-created_at-index")
+CATALOG_INDEX_NAME = os.getenv("CATALOG_INDEX_NAME", "catalog-created_at-index")
+CATALOG_PARTITION_VALUE = os.getenv("CATALOG_PARTITION_VALUE", "media")
+
+# sort query parameter -> ScanIndexForward
+SORT_ORDERS = {"newest": False, "oldest": True}
+
+# attributes the fields query parameter can select (e.g. fields=title,thumbnail) - id is always returned
+SELECTABLE_FIELDS = FIELDS
+
+# catalog snapshot published by build_catalog_snapshot - when configured, listings and items are served from it
+# without ddb, which remains the fallback while no snapshot is available
+catalog_snapshots = (
+    CatalogSnapshotStore(os.getenv("CATALOG_SNAPSHOT_BUCKET"))
+    if os.getenv("CATALOG_SNAPSHOT_BUCKET")
+    else None
+)
+
+# in-memory search index of GET /medias?q= - built on the first search of the container, then refreshed
+# incrementally: from the catalog snapshot when its version changes, otherwise by querying CATALOG_INDEX_NAME for
+# items created since the last refresh, with a full rescan (updated and deleted items) every rebuild interval.
+# Builds and refreshes run on a background thread, off the request path - searches are answered from the current
+# index meanwhile, and the first search of a container waits at most SEARCH_INDEX_BUILD_WAIT seconds for it before
+# answering 503 with a Retry-After of SEARCH_INDEX_RETRY_AFTER seconds
+search_index = SearchIndex()
+SEARCH_INDEX_REFRESH_INTERVAL = float(os.getenv("SEARCH_INDEX_REFRESH_INTERVAL", 60))
+SEARCH_INDEX_REBUILD_INTERVAL = float(os.getenv("SEARCH_INDEX_REBUILD_INTERVAL", 3600))
+SEARCH_INDEX_BUILD_WAIT = float(os.getenv("SEARCH_INDEX_BUILD_WAIT", 1))
+SEARCH_INDEX_RETRY_AFTER = int(os.getenv("SEARCH_INDEX_RETRY_AFTER", 5))
+search_index_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="search-index"
+)
+# ddb reads of the refresh thread - a client backend whatever METADATA_TABLE_BACKEND is, since clients are thread
+# safe and the resource of metadata_table is not
+search_index_table = DynamoDBClientTable(os.getenv("METADATA_DDB_TABLE_NAME"))
+# attributes read from ddb into the index - the searched ones, the genre filter and the catalog index keys
+SEARCH_INDEX_ATTRIBUTES = ("id", "title", "tags", "genre", "catalog", "created_at")
+search_index_state = {
+    "version": None,
+    "refreshed_at": None,
+    "rebuilt_at": None,
+    "newest": None,
+    "refresh": None,
+}
+
+# Cache-Control max-age of successful responses
+CACHE_MAX_AGE = int(os.getenv("MEDIAS_CACHE_MAX_AGE", 60))
+
+# serialized successful responses and their ETag per request - answers If-None-Match without ddb or serialization
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 30))
+response_cache = LRUCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 256)),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    ttl=RESPONSE_CACHE_TTL,
+)
 
 
+@inject_invocation_context
+@log_metrics
 def handler(event: APIGatewayProxyEvent, context: LambdaContext):
-    logger.debug(event)
+    # not the whole event - its Authorization and Cookie headers are credentials
+    logger.debug("%s %s", event.get("httpMethod"), event.get("path"))
 
     http_method: HTTPMethod = event.get("httpMethod")
     path: str = event.get("path")
     path_parameters: dict | None = event.get("pathParameters", {})
+    query_parameters: dict = event.get("queryStringParameters") or {}
+    accept_encoding: str | None = get_header(event, "Accept-Encoding")
+    if_none_match: str | None = get_header(event, "If-None-Match")
+
+    # Check for GET /medias?q=
+    if path == "/medias" and http_method == "GET" and "q" in query_parameters:
+        return search_medias(
+            query=query_parameters.get("q"),
+            limit=query_parameters.get("limit"),
+            cursor=query_parameters.get("cursor"),
+            genre=query_parameters.get("genre"),
+            sort=query_parameters.get("sort"),
+            fields=query_parameters.get("fields"),
+            accept_encoding=accept_encoding,
+            if_none_match=if_none_match,
+        )
 
     # Check for GET /medias
     if path == "/medias" and http_method == "GET":
-        return get_medias()
+        return get_medias(
+            limit=query_parameters.get("limit"),
+            cursor=query_parameters.get("cursor"),
+            genre=query_parameters.get("genre"),
+            sort=query_parameters.get("sort"),
+            fields=query_parameters.get("fields"),
+            accept_encoding=accept_encoding,
+            if_none_match=if_none_match,
+        )
 
     # Check for GET /medias/{id}
     if path.startswith("/medias/") and http_method == "GET" and path_parameters:
-        return get_media_by_id(path_parameters.get("media-id"))
+        return get_media_by_id(
+            path_parameters.get("media-id"),
+            fields=query_parameters.get("fields"),
+            accept_encoding=accept_encoding,
+            if_none_match=if_none_match,
+        )
 
     return generate_api_response(
         status_code=HTTPStatus.BAD_REQUEST,
@@ -39,46 +174,623 @@ def handler(event: APIGatewayProxyEvent, context: LambdaContext):
     )
 
 
-def get_medias():
+def generate_cached_response(
+    cached_response: tuple[str, bytes],
+    if_none_match: Optional[str],
+    accept_encoding: Optional[str],
+) -> dict:
+    etag, serialized_body = cached_response
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+
+    if etag_matches(if_none_match, etag):
+        logger.info("etag matched - not modified")
+        return generate_not_modified_response(headers=headers)
+
+    return generate_api_response(
+        status_code=HTTPStatus.OK,
+        body=serialized_body,
+        headers=headers,
+        accept_encoding=accept_encoding,
+    )
+
+
+def generate_cacheable_response(
+    status_code: int,
+    body: dict | bytes,
+    cache_key: tuple,
+    if_none_match: Optional[str],
+    accept_encoding: Optional[str],
+    error_headers: Optional[dict] = None,
+) -> dict:
+    """
+    Serializes a response once, tags it with an ETag and keeps it in the response cache. Errors are not cached,
+    and are sent with error_headers instead of the ETag and Cache-Control headers.
+    A bytes body is already serialized (e.g. read from the catalog snapshot).
+    """
+    if status_code != HTTPStatus.OK:
+        return generate_api_response(
+            status_code=status_code,
+            body=body,
+            headers=error_headers,
+            accept_encoding=accept_encoding,
+        )
+
+    serialized_body = body if isinstance(body, bytes) else serialize_body(body)
+    cached_response = (compute_etag(serialized_body), serialized_body)
+
+    if RESPONSE_CACHE_TTL > 0:
+        response_cache.put(cache_key, cached_response, size=len(serialized_body))
+
+    return generate_cached_response(cached_response, if_none_match, accept_encoding)
+
+
+def parse_limit(limit: Optional[str]) -> int:
+    if limit is None or limit == "":
+        return DEFAULT_PAGE_SIZE
+
+    if not str(limit).isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' must be an integer between 1 and {MAX_PAGE_SIZE}.")
+
+    return int(limit)
+
+
+def parse_sort(sort: Optional[str]) -> bool:
+    """
+    Returns the ScanIndexForward of a sort query parameter - newest first when none is given.
+    """
+    if sort is not None and sort not in SORT_ORDERS:
+        raise ValueError(f"'sort' must be one of {', '.join(SORT_ORDERS)}.")
+
+    return SORT_ORDERS.get(sort or "newest")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """
+    Returns the attributes selected by a fields query parameter, with id and in SELECTABLE_FIELDS order - the
+    same selection gives the same response whatever order it was given in. None when every attribute is
+    requested.
+    """
+    if fields is None or fields == "":
+        return None
+
+    names = {name.strip() for name in fields.split(",")}
+
+    if not names <= set(SELECTABLE_FIELDS):
+        raise ValueError(
+            f"'fields' must be a comma separated list of {', '.join(SELECTABLE_FIELDS)}."
+        )
+
+    return tuple(name for name in SELECTABLE_FIELDS if name in names or name == "id")
+
+
+def project(item: dict, fields: tuple[str, ...]) -> dict:
+    return {name: item[name] for name in fields if name in item}
+
+
+def project_json(items_json: bytes, fields: tuple[str, ...]) -> bytes:
+    """
+    Projects serialized items (an item or an array of items) read from the catalog snapshot, recording the bytes
+    the projection saved.
+    """
+    items = json.loads(items_json)
+    projected_json = serialize_body(
+        project(items, fields)
+        if isinstance(items, dict)
+        else [project(item, fields) for item in items]
+    )
+    record_projection(len(projected_json), len(items_json))
+
+    return projected_json
+
+
+def record_projection(projected_bytes: int, full_bytes: Optional[int] = None) -> None:
+    """
+    Per request metrics of a response with selected fields - the bytes of the projected items, and the bytes the
+    projection saved when the full items are at hand (catalog snapshot). DynamoDB does not return the size of the
+    attributes it leaves out, so the savings of a ddb read are not known.
+    """
+    increment("projection_bytes", projected_bytes)
+
+    if full_bytes is not None:
+        increment("projection_bytes_saved", full_bytes - projected_bytes)
+
+
+def build_listing_query(genre: Optional[str], sort: Optional[str]) -> dict:
+    """
+    Returns the Query input of a filtered listing - by genre and/or newest/oldest first - served from a GSI.
+    """
+    scan_index_forward = parse_sort(sort)
+
+    if genre:
+        return {
+            "IndexName": GENRE_INDEX_NAME,
+            "KeyConditionExpression": Key("genre").eq(genre),
+            "ScanIndexForward": scan_index_forward,
+        }
+
+    return {
+        "IndexName": CATALOG_INDEX_NAME,
+        "KeyConditionExpression": Key("catalog").eq(CATALOG_PARTITION_VALUE),
+        "ScanIndexForward": scan_index_forward,
+    }
+
+
+def current_snapshot() -> Optional[CatalogSnapshot]:
+    return catalog_snapshots.current() if catalog_snapshots is not None else None
+
+
+def read_snapshot_page(
+    snapshot: CatalogSnapshot,
+    limit: int,
+    exclusive_start_key: Optional[dict],
+    genre: Optional[str],
+    sort: Optional[str],
+    fields: Optional[tuple[str, ...]] = None,
+) -> Optional[bytes]:
+    """
+    Returns the serialized GET /medias body of a page read from the catalog snapshot - the body the ddb path
+    returns for the same page. None when the cursor does not point into the snapshot (e.g. to an item added
+    after it was built), so the page is read from ddb instead.
+    """
+    listing = None
+    forward = True
+
+    if genre or sort:
+        forward = parse_sort(sort)
+        listing = (
+            listing_name("genre", genre)
+            if genre
+            else listing_name("catalog", CATALOG_PARTITION_VALUE)
+        )
+
+    start_id = exclusive_start_key.get("id") if exclusive_start_key else None
+    if exclusive_start_key and start_id is None:
+        return None
+
+    try:
+        items_json, count, last_evaluated_key = snapshot.read_page(
+            limit, listing, start_id, forward
+        )
+
+    except KeyError:
+        logger.info("cursor not in catalog snapshot %s", snapshot.version)
+        return None
+
+    increment("catalog_snapshot_hit")
+
+    if fields:
+        items_json = project_json(items_json, fields)
+
+    return (
+        b'{"Items":'
+        + items_json
+        + b',"Count":'
+        + str(count).encode("ascii")
+        + b',"next_cursor":'
+        + serialize_body(encode_cursor(last_evaluated_key))
+        + b"}"
+    )
+
+
+def get_medias(
+    limit: Optional[str] = None,
+    cursor: Optional[str] = None,
+    genre: Optional[str] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+):
     global metadata_table
 
+    snapshot = current_snapshot()
+    cache_key = (
+        "medias",
+        snapshot and snapshot.version,
+        limit,
+        cursor,
+        genre,
+        sort,
+        fields,
+    )
+    cached_response = response_cache.get(cache_key)
+
+    if cached_response is not None:
+        increment("response_cache_hit")
+        logger.info("serving medias from response cache")
+        return generate_cached_response(cached_response, if_none_match, accept_encoding)
+
+    increment("response_cache_miss")
+
+    try:
+        page_kwargs = {"Limit": parse_limit(limit)}
+        selected_fields = parse_fields(fields)
+
+        if cursor:
+            page_kwargs["ExclusiveStartKey"] = decode_cursor(cursor)
+
+        body = None
+
+        if snapshot is not None:
+            logger.info("reading a page of items from the catalog snapshot...")
+            body = read_snapshot_page(
+                snapshot,
+                page_kwargs["Limit"],
+                page_kwargs.get("ExclusiveStartKey"),
+                genre,
+                sort,
+                selected_fields,
+            )
+
+        if body is None:
+            if selected_fields:
+                page_kwargs.update(build_projection(selected_fields))
+
+            if genre or sort:
+                logger.info("querying ddb index for a page of items...")
+                response: dict = metadata_table.query(
+                    **build_listing_query(genre, sort), **page_kwargs
+                )
+            else:
+                logger.info("scanning ddb for a page of items...")
+                response: dict = metadata_table.scan(**page_kwargs)
+
+            items: list = response.get("Items", [])
+
+            logger.info("read %s items", len(items))
+
+            if selected_fields:
+                items = [project(item, selected_fields) for item in items]
+                record_projection(len(serialize_body(items)))
+
+            body = {
+                "Items": items,
+                "Count": len(items),
+                "next_cursor": encode_cursor(response.get("LastEvaluatedKey")),
+            }
+
+        status_code = HTTPStatus.OK
+
+    except ValueError as e:
+        status_code = HTTPStatus.BAD_REQUEST
+        body = {"message": f"{e}"}
+
+    except Exception as e:
+        status_code = HTTPStatus.NOT_FOUND
+        body = {"message": f"{e}"}
+
+    finally:
+        # format/generate api response and return
+        return generate_cacheable_response(
+            status_code, body, cache_key, if_none_match, accept_encoding
+        )
+
+
+def track_newest(items: Iterable[dict]) -> Iterator[dict]:
+    # newest created_at indexed - the start of the next incremental refresh
+    for item in items:
+        created_at = item.get("created_at")
+
+        if created_at is not None and (
+            search_index_state["newest"] is None
+            or created_at > search_index_state["newest"]
+        ):
+            search_index_state["newest"] = created_at
+
+        yield item
+
+
+def search_index_refresh_due(snapshot: Optional[CatalogSnapshot], now: float) -> bool:
+    state = search_index_state
+
+    if snapshot is not None:
+        return state["version"] != snapshot.version
+
+    return (
+        state["rebuilt_at"] is None
+        or state["version"] is not None
+        or now - state["rebuilt_at"] >= SEARCH_INDEX_REBUILD_INTERVAL
+        or (
+            now - state["refreshed_at"] >= SEARCH_INDEX_REFRESH_INTERVAL
+            and state["newest"] is not None
+        )
+    )
+
+
+def schedule_search_index_refresh(snapshot: Optional[CatalogSnapshot]) -> bool:
+    """
+    Starts a background refresh of the search index when one is due and none is running. Returns whether the
+    index is usable - until the first build completes, waits for it at most SEARCH_INDEX_BUILD_WAIT seconds.
+    """
+    state = search_index_state
+    refresh: Optional[Future] = state["refresh"]
+
+    if (refresh is None or refresh.done()) and search_index_refresh_due(
+        snapshot, time.monotonic()
+    ):
+        refresh = state["refresh"] = search_index_executor.submit(
+            refresh_search_index, snapshot
+        )
+
+    if state["rebuilt_at"] is None and refresh is not None:
+        wait([refresh], timeout=SEARCH_INDEX_BUILD_WAIT)
+
+    return state["rebuilt_at"] is not None
+
+
+def refresh_search_index(snapshot: Optional[CatalogSnapshot]) -> bool:
+    """
+    Brings the search index up to date with the catalog, when due. Returns whether the index is usable - a failed
+    refresh keeps the previous index. Runs on the search index thread (see schedule_search_index_refresh).
+    """
+    now = time.monotonic()
+    state = search_index_state
+    projection = build_projection(SEARCH_INDEX_ATTRIBUTES)
+
+    try:
+        if snapshot is not None:
+            if state["version"] != snapshot.version:
+                with timer("search_index_refresh"):
+                    indexed, removed = search_index.sync(
+                        track_newest(snapshot.iter_items())
+                    )
+                logger.info(
+                    "search index synced to catalog snapshot %s (%s indexed, %s removed)",
+                    snapshot.version,
+                    indexed,
+                    removed,
+                )
+                state.update(version=snapshot.version, refreshed_at=now, rebuilt_at=now)
+
+        elif (
+            state["rebuilt_at"] is None
+            or state["version"] is not None
+            or now - state["rebuilt_at"] >= SEARCH_INDEX_REBUILD_INTERVAL
+        ):
+            with timer("search_index_refresh"):
+                indexed, removed = search_index.sync(
+                    track_newest(search_index_table.iter_scan(**projection))
+                )
+            logger.info(
+                "search index rebuilt from ddb (%s indexed, %s removed)",
+                indexed,
+                removed,
+            )
+            state.update(version=None, refreshed_at=now, rebuilt_at=now)
+
+        elif (
+            now - state["refreshed_at"] >= SEARCH_INDEX_REFRESH_INTERVAL
+            and state["newest"] is not None
+        ):
+            with timer("search_index_refresh"):
+                items = search_index_table.iter_query(
+                    IndexName=CATALOG_INDEX_NAME,
+                    KeyConditionExpression=Key("catalog").eq(CATALOG_PARTITION_VALUE)
+                    & Key("created_at").gt(state["newest"]),
+                    **projection,
+                )
+                indexed = sum(map(search_index.upsert, track_newest(items)))
+            logger.info("search index refreshed from ddb (%s indexed)", indexed)
+            state["refreshed_at"] = now
+
+    except Exception as e:
+        increment("search_index_refresh_failed")
+        logger.warning("search index refresh failed - %s", e)
+
+    return state["rebuilt_at"] is not None
+
+
+def read_search_results(
+    snapshot: Optional[CatalogSnapshot],
+    media_ids: list[str],
+    fields: Optional[tuple[str, ...]] = None,
+) -> tuple[bytes, int]:
+    """
+    Returns the serialized JSON array of the items, in the order of the ids, and its length. Items are read from
+    the catalog snapshot, or from ddb when not in it - items deleted since the index was refreshed are left out.
+    Only the attributes in `fields` are returned when given.
+    """
+    items_json: dict[str, bytes] = {}
+    missing_ids = []
+
+    for media_id in media_ids:
+        item_json = snapshot.get_item(media_id) if snapshot is not None else None
+
+        if item_json is None:
+            missing_ids.append(media_id)
+        else:
+            items_json[media_id] = (
+                project_json(item_json, fields) if fields else item_json
+            )
+
+    if missing_ids:
+        logger.info("retrieving %s search results from ddb...", len(missing_ids))
+        response: dict = metadata_table.batch_get_item(
+            Keys=[{"id": media_id} for media_id in missing_ids],
+            **(build_projection(fields) if fields else {}),
+        )
+
+        for item in response.get("Items", []):
+            item_json = serialize_body(project(item, fields) if fields else item)
+            items_json[item["id"]] = item_json
+
+            if fields:
+                record_projection(len(item_json))
+
+    page = [items_json[media_id] for media_id in media_ids if media_id in items_json]
+
+    return b"[" + b",".join(page) + b"]", len(page)
+
+
+def search_medias(
+    query: Optional[str],
+    limit: Optional[str] = None,
+    cursor: Optional[str] = None,
+    genre: Optional[str] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+):
+    """
+    GET /medias?q= - one page of the medias matching every word of the query (title, tags or genre, words as
+    prefixes), best match first, optionally of one genre.
+    """
+    snapshot = current_snapshot()
+    cache_key = (
+        "search",
+        snapshot and snapshot.version,
+        search_index.generation,
+        query,
+        limit,
+        cursor,
+        genre,
+        sort,
+        fields,
+    )
+    cached_response = response_cache.get(cache_key)
+
+    if cached_response is not None:
+        increment("response_cache_hit")
+        logger.info("serving search from response cache")
+        return generate_cached_response(cached_response, if_none_match, accept_encoding)
+
+    increment("response_cache_miss")
+    error_headers = None
+
     try:
-        logger.info("scanning ddb for items...")
-        response: dict = metadata_table.scan()
+        page_limit = parse_limit(limit)
+        selected_fields = parse_fields(fields)
+
+        if not tokenize(query):
+            raise ValueError("'q' must contain at least one word.")
+
+        if sort is not None:
+            raise ValueError("'sort' cannot be combined with 'q' - matches are ranked.")
+
+        offset = decode_cursor(cursor).get("offset", -1) if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("Invalid cursor.")
+
+        # after validation, so an invalid request never starts a build
+        if not schedule_search_index_refresh(snapshot):
+            raise SearchIndexNotReadyError()
 
-        logger.debug(response)
+        logger.info("searching the catalog...")
+        with timer("search"):
+            media_ids, total = search_index.search(
+                query, page_limit, offset, {"genre": genre} if genre else None
+            )
+
+        items_json, count = read_search_results(snapshot, media_ids, selected_fields)
+        next_offset = offset + page_limit
+
+        logger.info("%s matches, returning %s", total, count)
 
         status_code = HTTPStatus.OK
-        body = response
+        body = (
+            b'{"Items":'
+            + items_json
+            + b',"Count":'
+            + str(count).encode("ascii")
+            + b',"Total":'
+            + str(total).encode("ascii")
+            + b',"next_cursor":'
+            + serialize_body(
+                encode_cursor({"offset": next_offset}) if next_offset < total else None
+            )
+            + b"}"
+        )
 
     except ValueError as e:
         status_code = HTTPStatus.BAD_REQUEST
         body = {"message": f"{e}"}
 
+    except SearchIndexNotReadyError as e:
+        # transient - never stored by a shared cache, the client retries once the build had time to complete
+        status_code = HTTPStatus.SERVICE_UNAVAILABLE
+        body = {"message": f"{e}"}
+        error_headers = {
+            "Retry-After": str(SEARCH_INDEX_RETRY_AFTER),
+            "Cache-Control": "no-store",
+        }
+
     except Exception as e:
         status_code = HTTPStatus.NOT_FOUND
         body = {"message": f"{e}"}
 
     finally:
         # format/generate api response and return
-        return generate_api_response(status_code=status_code, body=body)
+        return generate_cacheable_response(
+            status_code,
+            body,
+            cache_key,
+            if_none_match,
+            accept_encoding,
+            error_headers=error_headers,
+        )
 
 
-def get_media_by_id(media_id: str):
+def get_media_by_id(
+    media_id: str,
+    fields: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+):
     global metadata_table
+
+    snapshot = current_snapshot()
+    cache_key = ("media", snapshot and snapshot.version, media_id, fields)
+    cached_response = response_cache.get(cache_key)
+
+    if cached_response is not None:
+        increment("response_cache_hit")
+        logger.info("serving media from response cache")
+        return generate_cached_response(cached_response, if_none_match, accept_encoding)
+
+    increment("response_cache_miss")
+
     try:
-        logger.info("retrieving metadata from ddb...")
-        response: dict = metadata_table.get_item(Key={"id": media_id})
-        logger.debug(response)
-
-        if not response.get("Item"):
-            logger.info("metadata not found")
-            status_code = HTTPStatus.NOT_FOUND
-            body = {"message": "Media not found."}
-        else:
-            logger.info("metadata found")
+        selected_fields = parse_fields(fields)
+
+        # items added after the snapshot was built are still read from ddb
+        item_json = snapshot.get_item(media_id) if snapshot is not None else None
+
+        if item_json is not None:
+            increment("catalog_snapshot_hit")
+            logger.info("metadata found in catalog snapshot")
             status_code = HTTPStatus.OK
-            body = response
+            body = (
+                b'{"Item":'
+                + (
+                    project_json(item_json, selected_fields)
+                    if selected_fields
+                    else item_json
+                )
+                + b"}"
+            )
+
+        else:
+            logger.info("retrieving metadata from ddb...")
+            response: dict = metadata_table.get_item(
+                Key={"id": media_id},
+                **(build_projection(selected_fields) if selected_fields else {}),
+            )
+            logger.debug(response)
+
+            if not response.get("Item"):
+                logger.info("metadata not found")
+                status_code = HTTPStatus.NOT_FOUND
+                body = {"message": "Media not found."}
+            elif selected_fields:
+                logger.info("metadata found")
+                status_code = HTTPStatus.OK
+                body = {"Item": project(response["Item"], selected_fields)}
+                record_projection(len(serialize_body(body["Item"])))
+            else:
+                logger.info("metadata found")
+                status_code = HTTPStatus.OK
+                body = response
 
     except ValueError as e:
         status_code = HTTPStatus.BAD_REQUEST
@@ -90,42 +802,48 @@ def get_media_by_id(media_id: str):
 
     finally:
         # format/generate api response and return
-        return generate_api_response(status_code=status_code, body=body)
-
-
-api_res = handler(
-    {
-        "resource": "/medias",
-        "path": "/medias/abc123",
-        "httpMethod": "GET",
-        "headers": None,
-        "multiValueHeaders": None,
-        "queryStringParameters": None,
-        "multiValueQueryStringParameters": None,
-        # "pathParameters": None,
-        "pathParameters": {"media-id": "abc123"},
-        "stageVariables": None,
-        "requestContext": {
-            "resourceId": "zf7ub0",
-            "resourcePath": "/media",
+        return generate_cacheable_response(
+            status_code, body, cache_key, if_none_match, accept_encoding
+        )
+
+
+# local test invocation - not run when the module is imported by the Lambda runtime
+if __name__ == "__main__":
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+
+    api_res = handler(
+        {
+            "resource": "/medias",
+            "path": "/medias/abc123",
             "httpMethod": "GET",
-            "extendedRequestId": "fWEOAFdziYcF_7A=",
-            "requestTime": "08/Oct/2024:18:58:07 +0000",
-            "path": "/media/{media_id}",
-            "accountId": "253320687396",
-            "protocol": "HTTP/1.1",
-            "stage": "test-invoke-stage",
-            "domainPrefix": "testPrefix",
-            "requestTimeEpoch": 1728413887748,
-            "requestId": "e8535d80-c9fd-43ae-94bd-f8bac240def2",
-            "identity": {},
-            "domainName": "testPrefix.testDomainName",
-            "apiId": "upgyrrudrg",
+            "headers": None,
+            "multiValueHeaders": None,
+            "queryStringParameters": None,
+            "multiValueQueryStringParameters": None,
+            # "pathParameters": None,
+            "pathParameters": {"media-id": "abc123"},
+            "stageVariables": None,
+            "requestContext": {
+                "resourceId": "zf7ub0",
+                "resourcePath": "/media",
+                "httpMethod": "GET",
+                "extendedRequestId": "fWEOAFdziYcF_7A=",
+                "requestTime": "08/Oct/2024:18:58:07 +0000",
+                "path": "/media/{media_id}",
+                "accountId": "253320687396",
+                "protocol": "HTTP/1.1",
+                "stage": "test-invoke-stage",
+                "domainPrefix": "testPrefix",
+                "requestTimeEpoch": 1728413887748,
+                "requestId": "e8535d80-c9fd-43ae-94bd-f8bac240def2",
+                "identity": {},
+                "domainName": "testPrefix.testDomainName",
+                "apiId": "upgyrrudrg",
+            },
+            "body": None,
+            "isBase64Encoded": False,
         },
-        "body": None,
-        "isBase64Encoded": False,
-    },
-    LambdaContext(),
-)
+        LambdaContext(),
+    )
 
-logger.info(api_res)
+    logger.info(api_res)
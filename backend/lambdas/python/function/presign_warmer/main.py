@@ -0,0 +1,163 @@
+from __future__ import annotations
+import os, time
+from typing import TYPE_CHECKING
+from boto3.dynamodb.conditions import Key
+from jc_custom_utilities.env import load_env
+from jc_boto3_helper.cloudfront_signer import CloudFrontSigner
+from jc_boto3_helper.secrets_manager import SecretsManager
+from jc_boto3_helper.dynamodb_resource_table import DynamoDBResourceTable
+from jc_custom_utilities.logger import logger_config, inject_invocation_context
+from jc_custom_utilities.metrics import log_metrics, increment, timer
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+
+# Load env variable
+load_env()
+
+# Setup logger config
+logger = logger_config(__name__)
+
+# instantiate secrets manager client globally
+secrets_manager = SecretsManager(os.getenv("DEFAULT_AWS_REGION"))
+
+# instantiate ddb resource clients globally
+metadata_table = DynamoDBResourceTable(os.getenv("METADATA_DDB_TABLE_NAME"))
+presigned_url_table = DynamoDBResourceTable(os.getenv("PRESIGNED_URL_DDB_TABLE_NAME"))
+
+# without media ids in the event, the newest medias of the catalog are warmed
+CATALOG_INDEX_NAME = os.getenv("CATALOG_INDEX_NAME", "catalog-created_at-index")
+CATALOG_PARTITION_VALUE = os.getenv("CATALOG_PARTITION_VALUE", "media")
+MAX_WARMED_MEDIAS = int(os.getenv("PRESIGN_WARMER_MAX_MEDIAS", 100))
+
+# get_media_url serves a pre-signed url while it has at least CF_DEFAULT_URL_EXP seconds left - urls are signed
+# for CF_DEFAULT_URL_EXP + PRESIGN_WARMER_OVERLAP_SECONDS, so consecutive runs have overlapping windows as long
+# as the overlap is longer than the schedule interval (twice as long tolerates one failed run)
+URL_EXPIRATION_IN_SECONDS = int(os.getenv("CF_DEFAULT_URL_EXP") or 3600) + int(
+    os.getenv("PRESIGN_WARMER_OVERLAP_SECONDS") or 1800
+)
+
+
+@inject_invocation_context
+@log_metrics
+def handler(event: dict, context: LambdaContext):
+    """
+    Pre-signs the urls of trending medias and writes them to the pre-signed url table, where get_media_url
+    serves them before signing live. Runs on a schedule.
+
+    The trending medias are the `media_ids` of the event - e.g. `{"media_ids": ["abc123", ...]}` from an
+    analytics job - or the newest medias of the catalog when the event has none.
+    """
+    media_ids = get_trending_media_ids(event or {})
+
+    if not media_ids:
+        logger.info("no medias to warm")
+        return {"requested": 0, "warmed": 0, "not_found": 0, "failed": 0}
+
+    logger.info("getting media keys of %s medias from ddb", len(media_ids))
+    lookup = metadata_table.batch_get_item(
+        Keys=[{"id": media_id} for media_id in media_ids],
+        ProjectionExpression="id, s3_key",
+    )
+    s3_keys = {
+        item.get("id"): item.get("s3_key")
+        for item in lookup.get("Items", [])
+        if item.get("s3_key")
+    }
+
+    unprocessed_ids = [key.get("id") for key in lookup.get("UnprocessedKeys", [])]
+
+    items = sign_urls(s3_keys) if s3_keys else []
+    unprocessed_items = (
+        presigned_url_table.batch_put_items(Items=items).get("UnprocessedItems")
+        if items
+        else []
+    )
+    warmed = len(items) - len(unprocessed_items)
+
+    result = {
+        "requested": len(media_ids),
+        "warmed": warmed,
+        "not_found": len(media_ids) - len(s3_keys) - len(unprocessed_ids),
+        # lookups, signatures and writes that did not complete - warmed again by the next run
+        "failed": len(s3_keys) + len(unprocessed_ids) - warmed,
+    }
+
+    increment("presigned_url_warmed", result["warmed"])
+    logger.info("presigned url warmer completed - %s", result)
+
+    return result
+
+
+def get_trending_media_ids(event: dict) -> list[str]:
+    media_ids = event.get("media_ids")
+
+    if media_ids is not None:
+        if not isinstance(media_ids, list) or not all(
+            isinstance(media_id, str) and media_id for media_id in media_ids
+        ):
+            raise ValueError("'media_ids' must be a list of media ids.")
+
+        # drop duplicates while keeping the order - BatchGetItem rejects duplicate keys
+        return list(dict.fromkeys(media_ids))[:MAX_WARMED_MEDIAS]
+
+    logger.info("warming the %s newest medias", MAX_WARMED_MEDIAS)
+    ddb_response: dict = metadata_table.query(
+        IndexName=CATALOG_INDEX_NAME,
+        KeyConditionExpression=Key("catalog").eq(CATALOG_PARTITION_VALUE),
+        ScanIndexForward=False,
+        Limit=MAX_WARMED_MEDIAS,
+        ProjectionExpression="id",
+    )
+
+    return list(dict.fromkeys(item.get("id") for item in ddb_response.get("Items")))
+
+
+def sign_urls(s3_keys: dict) -> list[dict]:
+    """
+    Signs the url of every {media_id: s3_key} with one parsed key. Returns the items of the pre-signed url
+    table - medias whose url could not be signed are left out.
+    """
+    logger.info("retrieving pem_key...")
+    secret: dict = secrets_manager.get_secret_value(
+        SecretId=os.getenv("CF_PRIVATE_KEY_SECRET_ID")
+    )
+    public_key_id = os.getenv("CF_PUBLIC_KEY_ID")
+    cf_signer = CloudFrontSigner(
+        public_key_id=public_key_id, pem_key=secret.get("SecretString")
+    )
+
+    items = []
+
+    with timer("presign_warmer_sign"):
+        for media_id, s3_key in s3_keys.items():
+            # taken before signing, so the url is valid at least until expires_at
+            expires_at = int(time.time()) + URL_EXPIRATION_IN_SECONDS
+
+            try:
+                cf_signer_response = cf_signer.generate_presigned_url(
+                    url=os.getenv("CLOUDFRONT_DOMAIN") + s3_key,
+                    expiration_in_seconds=URL_EXPIRATION_IN_SECONDS,
+                )
+            except ValueError as e:
+                logger.error("could not sign the url of %s: %s", media_id, e)
+                continue
+
+            items.append(
+                {
+                    "id": media_id,
+                    "url": cf_signer_response.get("url"),
+                    "public_key_id": public_key_id,
+                    # also the TTL attribute of the table - expired urls are deleted by DynamoDB
+                    "expires_at": expires_at,
+                }
+            )
+
+    return items
+
+
+# local test invocation - not run when the module is imported by the Lambda runtime
+if __name__ == "__main__":
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+
+    logger.info(handler({"media_ids": ["abc123"]}, LambdaContext()))
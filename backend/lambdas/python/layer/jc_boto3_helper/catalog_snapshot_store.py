@@ -0,0 +1,251 @@
+from __future__ import annotations
+import os, json, time, zlib, tempfile, threading
+from botocore.exceptions import ClientError
+from jc_boto3_helper.client_factory import get_client
+from jc_custom_utilities.catalog_snapshot import CatalogSnapshot
+from jc_custom_utilities.logger import logger_config
+from jc_custom_utilities.metrics import increment, timer
+from jc_custom_utilities.env import load_env
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+# Load env variable
+load_env()
+
+# Setup logger config
+logger = logger_config(__name__)
+
+# gzip container for zlib
+GZIP_WBITS = 31
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+# error codes of a conditional GET that matched, and of a missing object
+NOT_MODIFIED_ERROR_CODES = ("304", "NotModified")
+NOT_FOUND_ERROR_CODES = ("404", "NoSuchKey")
+
+
+def error_code(error: ClientError) -> Optional[str]:
+    return error.response.get("Error", {}).get("Code")
+
+
+class CatalogSnapshotStore:
+    """
+    Publishes catalog snapshots to S3 and keeps the latest one open in the container.
+
+    A snapshot is stored gzip compressed under `<prefix>snapshots/<version>.snapshot.gz`. `<prefix>latest.json`
+    is the version marker - written after the snapshot, so a reader never sees a version it cannot download.
+    Readers check the marker at most every `check_interval` seconds and decompress a new version into
+    `local_dir` once per container. A replaced snapshot is closed and deleted on the next swap, not on its own -
+    requests and the search index refresh may still be reading it, and swaps are at least `check_interval` apart.
+        :param [Required] bucket: S3 bucket of the snapshots.
+        :param [Optional] prefix: Key prefix of the snapshots and the marker.
+        :param [Optional] region: AWS region of the bucket. Defaults to the AWS configuration if None.
+        :param [Optional] local_dir: Directory the snapshot is decompressed to - /tmp in Lambda.
+        :param [Optional] check_interval: Seconds between two checks of the version marker.
+        :param [Optional] clock: Monotonic clock, replaceable for tests.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = os.getenv("CATALOG_SNAPSHOT_PREFIX", "catalog/"),
+        region: Optional[str] = os.getenv("DEFAULT_AWS_REGION"),
+        local_dir: str = os.getenv("CATALOG_SNAPSHOT_LOCAL_DIR", tempfile.gettempdir()),
+        check_interval: float = float(os.getenv("CATALOG_SNAPSHOT_CHECK_INTERVAL", 60)),
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.client: S3Client = get_client("s3", region_name=region)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.local_dir = local_dir
+        self.check_interval = check_interval
+        self.clock = clock
+        self.snapshot: Optional[CatalogSnapshot] = None
+        # the snapshot replaced by the last swap - closed by the next one
+        self._retired: Optional[CatalogSnapshot] = None
+        self._marker_etag: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def marker_key(self) -> str:
+        return f"{self.prefix}latest.json"
+
+    def snapshot_key(self, version: str) -> str:
+        return f"{self.prefix}snapshots/{version}.snapshot.gz"
+
+    def read_marker(self) -> Optional[dict]:
+        """
+        Returns the version marker, or None when no snapshot was published yet.
+        """
+        try:
+            response: dict = self.client.get_object(
+                Bucket=self.bucket, Key=self.marker_key
+            )
+        except ClientError as e:
+            if error_code(e) in NOT_FOUND_ERROR_CODES:
+                return None
+            raise
+
+        return json.loads(response["Body"].read())
+
+    def publish(self, path: str, footer: dict) -> bool:
+        """
+        Uploads the snapshot file written by SnapshotWriter and points the version marker to it. Skipped when the
+        marker already points to the same version. Returns whether a new version was published.
+            :param [Required] path: Snapshot file.
+            :param [Required] footer: Footer returned by SnapshotWriter.close().
+        """
+        version = footer["version"]
+
+        try:
+            marker = self.read_marker()
+
+            if marker is not None and marker.get("version") == version:
+                logger.info("catalog snapshot %s is already published", version)
+                return False
+
+            compressed_path = f"{path}.gz"
+            with open(path, "rb") as source, open(compressed_path, "wb") as target:
+                compressor = zlib.compressobj(level=6, wbits=GZIP_WBITS)
+                for chunk in iter(lambda: source.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    target.write(compressor.compress(chunk))
+                target.write(compressor.flush())
+
+            with open(compressed_path, "rb") as body:
+                self.client.put_object(
+                    Bucket=self.bucket,
+                    Key=self.snapshot_key(version),
+                    Body=body,
+                    ContentType="application/octet-stream",
+                )
+            os.remove(compressed_path)
+
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=self.marker_key,
+                Body=json.dumps(
+                    {
+                        "version": version,
+                        "key": self.snapshot_key(version),
+                        "item_count": footer["item_count"],
+                        "created_at": footer["created_at"],
+                    }
+                ).encode("utf-8"),
+                ContentType="application/json",
+                CacheControl="no-cache",
+            )
+
+            logger.info(
+                "published catalog snapshot %s (%s items)",
+                version,
+                footer["item_count"],
+            )
+
+            return True
+
+        except Exception as e:
+            logger.error("%s", e)
+            raise ValueError(e)
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """
+        Returns the open snapshot, first loading a newer version when the marker is due for a check. Returns None
+        when no snapshot is available - callers fall back to DynamoDB. A failed check keeps the open snapshot.
+        """
+        now = self.clock()
+
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self.check_interval
+        ):
+            return self.snapshot
+
+        with self._lock:
+            if (
+                self._checked_at is None
+                or now - self._checked_at >= self.check_interval
+            ):
+                try:
+                    self._refresh()
+                except Exception as e:
+                    increment("catalog_snapshot_check_failed")
+                    logger.warning("catalog snapshot check failed - %s", e)
+
+                self._checked_at = now
+
+        return self.snapshot
+
+    def _refresh(self) -> None:
+        request = {"Bucket": self.bucket, "Key": self.marker_key}
+        if self._marker_etag and self.snapshot is not None:
+            request["IfNoneMatch"] = self._marker_etag
+
+        try:
+            response: dict = self.client.get_object(**request)
+        except ClientError as e:
+            if error_code(e) in NOT_MODIFIED_ERROR_CODES:
+                logger.debug("catalog snapshot %s is current", self.snapshot.version)
+                return
+            if error_code(e) in NOT_FOUND_ERROR_CODES:
+                logger.info("no catalog snapshot published")
+                return
+            raise
+
+        marker = json.loads(response["Body"].read())
+
+        if self.snapshot is None or marker["version"] != self.snapshot.version:
+            self._open(marker)
+
+        self._marker_etag = response.get("ETag")
+
+    def _open(self, marker: dict) -> None:
+        version = marker["version"]
+        path = os.path.join(self.local_dir, f"catalog-{version}.snapshot")
+
+        with timer("catalog_snapshot_load"):
+            # a snapshot left in /tmp by an earlier load of this container is reused
+            if not os.path.exists(path):
+                self._download(marker["key"], path)
+
+            snapshot = CatalogSnapshot(path)
+
+        retired, self._retired, self.snapshot = self._retired, self.snapshot, snapshot
+        logger.info(
+            "catalog snapshot %s loaded (%s items)", version, snapshot.item_count
+        )
+
+        if retired is not None:
+            self._release(retired)
+
+    @staticmethod
+    def _release(snapshot: CatalogSnapshot) -> None:
+        snapshot.close()
+        os.remove(snapshot.path)
+
+    def _download(self, key: str, path: str) -> None:
+        response: dict = self.client.get_object(Bucket=self.bucket, Key=key)
+        decompressor = zlib.decompressobj(wbits=GZIP_WBITS)
+        partial_path = f"{path}.part"
+
+        with open(partial_path, "wb") as target:
+            for chunk in response["Body"].iter_chunks(DOWNLOAD_CHUNK_SIZE):
+                target.write(decompressor.decompress(chunk))
+            target.write(decompressor.flush())
+
+        # renamed only once complete - an interrupted download is never opened
+        os.replace(partial_path, path)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._retired is not None:
+                self._release(self._retired)
+                self._retired = None
+            if self.snapshot is not None:
+                self.snapshot.close()
+                self.snapshot = None
+            self._checked_at = None
+            self._marker_etag = None
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import os, threading
+from boto3.session import Session
+from jc_custom_utilities.logger import logger_config
+from jc_custom_utilities.env import load_env
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+    from botocore.config import Config
+
+# Load env variable
+load_env()
+
+# Setup logger config
+logger = logger_config(__name__)
+
+# connections kept open per client - ParallelScan segments and the io pool of get_media_url share them
+max_pool_connections = int(os.getenv("BOTO_MAX_POOL_CONNECTIONS", 20))
+# seconds - a Lambda request should fail fast and be retried rather than hang for the 60 second default
+connect_timeout = float(os.getenv("BOTO_CONNECT_TIMEOUT", 1))
+read_timeout = float(os.getenv("BOTO_READ_TIMEOUT", 3))
+# "adaptive" adds client side rate limiting on top of the "standard" retries of throttling and transient errors
+retry_mode = os.getenv("BOTO_RETRY_MODE", "adaptive")
+max_attempts = int(os.getenv("BOTO_MAX_ATTEMPTS", 3))
+
+# cheap calls that open a connection to the service endpoint - an error response (e.g. AccessDenied) still leaves
+# the connection in the pool
+PREWARM_OPERATIONS = {
+    "dynamodb": ("describe_endpoints", {}),
+    "secretsmanager": ("list_secrets", {"MaxResults": 1}),
+    "s3": ("list_buckets", {}),
+}
+
+_session: Optional[Session] = None
+_clients: dict[tuple[str, Optional[str]], BaseClient] = {}
+_resources: dict[tuple[str, Optional[str]], Any] = {}
+_lock = threading.Lock()
+
+
+def default_config() -> Config:
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=max_pool_connections,
+        tcp_keepalive=True,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={"mode": retry_mode, "max_attempts": max_attempts},
+    )
+
+
+def get_session() -> Session:
+    """
+    Returns the boto3 session shared by every jc_boto3_helper class.
+    """
+    global _session
+
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = Session()
+
+    return _session
+
+
+def get_client(service_name: str, region_name: Optional[str] = None) -> BaseClient:
+    """
+    Returns the client of the service in the region, created once per container with default_config().
+    Clients are thread safe and may be shared between threads.
+        :param [Required] service_name: e.g. 'dynamodb', 'secretsmanager'.
+        :param [Optional] region_name: Defaults to the AWS configuration if None.
+    """
+    key = (service_name, region_name)
+    client = _clients.get(key)
+
+    if client is None:
+        session = get_session()
+
+        with _lock:
+            client = _clients.get(key)
+
+            if client is None:
+                client = _clients[key] = session.client(
+                    service_name, region_name=region_name, config=default_config()
+                )
+
+    return client
+
+
+def get_resource(service_name: str, region_name: Optional[str] = None) -> Any:
+    """
+    Returns the service resource of the service in the region, created once per container with default_config().
+    Resources are not thread safe - worker threads should use new_resource().
+        :param [Required] service_name: e.g. 'dynamodb'.
+        :param [Optional] region_name: Defaults to the AWS configuration if None.
+    """
+    key = (service_name, region_name)
+    service_resource = _resources.get(key)
+
+    if service_resource is None:
+        service_resource = new_resource(service_name, region_name)
+
+        with _lock:
+            service_resource = _resources.setdefault(key, service_resource)
+
+    return service_resource
+
+
+def new_resource(service_name: str, region_name: Optional[str] = None) -> Any:
+    """
+    Returns a new service resource, for use by a single thread. Created from the shared session under the
+    factory lock, since sessions must not be used by several threads at once.
+
+    A resource keeps a client of its own - the dynamodb resource registers its (de)serialization on the client it
+    is given, which would change what the shared get_client() client returns.
+    """
+    session = get_session()
+
+    with _lock:
+        return session.resource(
+            service_name, region_name=region_name, config=default_config()
+        )
+
+
+def prewarm(*services: tuple[str, Optional[str]], timeout: Optional[float] = None):
+    """
+    Opens a connection to the endpoint of each (service_name, region_name) pair, in parallel, so the first request
+    of the first invocation does not pay for the TLS handshake. Warms the get_client() client and, once created,
+    the get_resource() resource of the pair. Meant for module init - failures are logged and ignored.
+        :param [Required] services: e.g. ("dynamodb", "us-east-2"), ("secretsmanager", "us-east-2").
+        :param [Optional] timeout: Seconds to wait for all connections. Defaults to connect + read timeout.
+    """
+    clients = []
+
+    for service_name, region_name in services:
+        key = (service_name, region_name)
+
+        if key in _resources:
+            clients.append((service_name, _resources[key].meta.client))
+        if key in _clients or key not in _resources:
+            clients.append((service_name, get_client(service_name, region_name)))
+
+    threads = [
+        threading.Thread(target=_prewarm_client, args=client, daemon=True)
+        for client in clients
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join(timeout if timeout is not None else connect_timeout + read_timeout)
+
+
+def clear_clients() -> None:
+    global _session
+
+    with _lock:
+        _clients.clear()
+        _resources.clear()
+        _session = None
+
+
+def _prewarm_client(service_name: str, client: BaseClient) -> None:
+    try:
+        operation = PREWARM_OPERATIONS.get(service_name)
+
+        if operation is not None:
+            operation_name, kwargs = operation
+            getattr(client, operation_name)(**kwargs)
+
+        logger.debug("prewarmed %s client", service_name)
+
+    except Exception as e:
+        logger.debug("prewarm of %s client failed - %s", service_name, e)
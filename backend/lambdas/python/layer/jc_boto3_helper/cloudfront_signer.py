@@ -1,24 +1,226 @@
+from __future__ import annotations
 import os, sys
-import datetime, validators
-from datetime import datetime, timezone, timedelta
+import hashlib, threading, base64, math, time, json
 from jc_custom_utilities.logger import logger_config
 from jc_custom_utilities.exceptions import InvalidSignedUrlError
-from dotenv import load_dotenv
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
-from botocore.signers import CloudFrontSigner as cfsigner
-from typing import Optional
+from jc_custom_utilities.cache import LRUCache
+from jc_custom_utilities.metrics import increment, timer
+from jc_custom_utilities.env import load_env
+from typing import TYPE_CHECKING, Optional
+
+# cryptography is imported on first signature, not on cold start
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 
 # Load env variable
-load_dotenv()
+load_env()
 
 # Setup logger config
 logger = logger_config(__name__)
 
+# process-wide registry of parsed private keys - keyed by (public_key_id, pem fingerprint)
+_private_key_registry: dict[tuple[str, str], RSAPrivateKey] = {}
+_private_key_registry_lock = threading.Lock()
+
+
+def pem_fingerprint(pem_key: bytes) -> str:
+    """
+    Returns a sha256 hex digest of the pem key. Used as the registry key so rotated keys are parsed again.
+    """
+    return hashlib.sha256(pem_key).hexdigest()
+
+
+def load_private_key(public_key_id: str, pem_key: bytes) -> RSAPrivateKey:
+    """
+    Returns the parsed private key for (public_key_id, pem_key), parsing the pem only on the first call per container.
+        :param [Required] public_key_id: CloudFront public key id the pem belongs to.
+        :param [Required] pem_key: PEM encoded private key.
+    """
+    registry_key = (public_key_id, pem_fingerprint(pem_key))
+
+    private_key = _private_key_registry.get(registry_key)
+    if private_key is not None:
+        increment("private_key_cache_hit")
+        return private_key
+
+    increment("private_key_cache_miss")
+
+    with _private_key_registry_lock:
+        # another thread may have parsed the key while waiting on the lock
+        private_key = _private_key_registry.get(registry_key)
+        if private_key is None:
+            from cryptography.hazmat.primitives import serialization
+
+            logger.info("parsing private key for %s", public_key_id)
+            with timer("private_key_parse"):
+                private_key = serialization.load_pem_private_key(pem_key, password=None)
+            _private_key_registry[registry_key] = private_key
+
+    return private_key
+
+
+def clear_private_key_registry() -> None:
+    with _private_key_registry_lock:
+        _private_key_registry.clear()
+
+
+# '+' -> '-', '=' -> '_', '/' -> '~' in one pass
+_CLOUDFRONT_B64_TABLE = bytes.maketrans(b"+=/", b"-_~")
+
+
+def cloudfront_b64encode(data: bytes) -> str:
+    """
+    Base64 encoding with the character substitution CloudFront requires ('+' -> '-', '=' -> '_', '/' -> '~').
+    """
+    return base64.b64encode(data).translate(_CLOUDFRONT_B64_TABLE).decode("utf-8")
+
+
+# the custom policy of botocore.signers.CloudFrontSigner.build_policy(resource, date_less_than, date_greater_than),
+# around the json encoded resource and the two epoch times
+_POLICY_HEAD = b'{"Statement":[{"Resource":'
+_POLICY_DATE_LESS_THAN = b',"Condition":{"DateLessThan":{"AWS:EpochTime":'
+_POLICY_DATE_GREATER_THAN = b'},"DateGreaterThan":{"AWS:EpochTime":'
+_POLICY_TAIL = b"}}}]}"
+
+
+class PolicyTemplate:
+    """
+    The custom policy of one resource up to its first epoch time, with the base64 encoding of that part
+    precomputed. Base64 encodes groups of 3 bytes independently, so the encoded policy is the encoded prefix of
+    the template followed by the encoding of the few remaining bytes and the epoch times.
+    """
+
+    __slots__ = ("head", "encoded_head", "rest")
+
+    def __init__(self, resource: str) -> None:
+        # json.dumps escapes the resource the same way as botocore's json.dumps of the whole policy
+        self.head = (
+            _POLICY_HEAD + json.dumps(resource).encode("utf-8") + _POLICY_DATE_LESS_THAN
+        )
+        split = len(self.head) - len(self.head) % 3
+        self.encoded_head = base64.b64encode(self.head[:split]).translate(
+            _CLOUDFRONT_B64_TABLE
+        )
+        self.rest = self.head[split:]
+
+    def render(self, expires_at: int, starts_at: int) -> tuple[bytes, str]:
+        """
+        Returns the policy valid from `starts_at` until `expires_at` (epoch seconds) and its CloudFront base64
+        encoding.
+        """
+        times = b"%d%s%d%s" % (
+            expires_at,
+            _POLICY_DATE_GREATER_THAN,
+            starts_at,
+            _POLICY_TAIL,
+        )
+        encoded_policy = self.encoded_head + base64.b64encode(
+            self.rest + times
+        ).translate(_CLOUDFRONT_B64_TABLE)
+
+        return self.head + times, encoded_policy.decode("utf-8")
+
+
+class PolicyTemplates:
+    """
+    Bounded cache of PolicyTemplates by resource - a template is built on the first signature of a resource
+    (a url, or a wildcard pattern for signed cookies) and reused by every signer of the container, as it holds
+    no key material.
+        :param [Optional] max_entries: Maximum number of templates held - the oldest is dropped first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = int(os.getenv("CF_POLICY_TEMPLATE_MAX_ENTRIES", 10000)),
+    ) -> None:
+        self.max_entries = max_entries
+        self._templates: dict[str, PolicyTemplate] = {}
+        # signers run on pool threads too - eviction iterates the dict while other threads insert
+        self._lock = threading.Lock()
+
+    def get(self, resource: str) -> PolicyTemplate:
+        template = self._templates.get(resource)
+
+        if template is None:
+            # built outside the lock - concurrent misses of one resource build equal templates, the first is kept
+            template = PolicyTemplate(resource)
+
+            with self._lock:
+                if resource not in self._templates:
+                    while len(self._templates) >= self.max_entries:
+                        self._templates.pop(next(iter(self._templates)))
+                template = self._templates.setdefault(resource, template)
+
+        return template
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+
+# process-wide policy templates, shared by the signers of the container
+policy_templates = PolicyTemplates()
+
+
+class PresignedUrlCache:
+    """
+    Bounded LRU cache of signed urls. Expiry times are rounded up to `bucket_seconds`, so requests for the same
+    url within a bucket reuse one signature instead of paying for an RSA operation each.
+        :param [Optional] bucket_seconds: Granularity the url expiry is rounded up to.
+        :param [Optional] max_entries: Maximum number of signed urls held.
+        :param [Optional] min_remaining_seconds: Minimum validity a cached url must have left to be reused.
+            Defaults to the requested expiration minus one bucket.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int = 60,
+        max_entries: int = 10000,
+        min_remaining_seconds: Optional[int] = None,
+    ) -> None:
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be greater than 0.")
+
+        self.bucket_seconds = bucket_seconds
+        self.min_remaining_seconds = min_remaining_seconds
+        self.cache = LRUCache(max_entries=max_entries)
+
+    def bucket_expiry(self, expires_at: float) -> int:
+        return math.ceil(expires_at / self.bucket_seconds) * self.bucket_seconds
+
+    def get(self, key: tuple) -> Optional[str]:
+        return self.cache.get(key)
+
+    def put(
+        self,
+        key: tuple,
+        signed_url: str,
+        expires_at: int,
+        expiration_in_seconds: int,
+        now: float,
+    ) -> None:
+        min_remaining_seconds = (
+            self.min_remaining_seconds
+            if self.min_remaining_seconds is not None
+            else expiration_in_seconds - self.bucket_seconds
+        )
+        # the entry is dropped once less than min_remaining_seconds of validity is left
+        reusable_for = expires_at - now - max(min_remaining_seconds, 0)
+
+        if reusable_for > 0:
+            self.cache.put(key, signed_url, ttl=reusable_for)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
 
 class CloudFrontSigner:
-    def __init__(self, public_key_id: str, pem_key: bytes) -> None:
+    def __init__(
+        self,
+        public_key_id: str,
+        pem_key: bytes,
+        url_cache: Optional[PresignedUrlCache] = None,
+    ) -> None:
         if not pem_key:
             raise TypeError("missing 1 required positional argument: 'pem_key'")
         elif not public_key_id:
@@ -29,66 +231,185 @@ class CloudFrontSigner:
             )
         self.pem_key = pem_key
         self.public_key_id = public_key_id
-        self.cloudfront_signer = cfsigner(public_key_id, self._rsa_signer)
+        self.url_cache = url_cache
+        self._private_key: Optional[RSAPrivateKey] = None
+        self._key_fingerprint: Optional[str] = None
 
-    # used exclusively for CloudFrontSigner
-    def _rsa_signer(self, message):
-        private_key = serialization.load_pem_private_key(
-            self.pem_key, password=None, backend=default_backend()
-        )
+    @property
+    def key_fingerprint(self) -> str:
+        if self._key_fingerprint is None:
+            self._key_fingerprint = pem_fingerprint(self.pem_key)
 
-        return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+        return self._key_fingerprint
 
-    def generate_presigned_url(
-        self,
-        url: str,
-        expiration_in_seconds: int | str = os.getenv("CF_DEFAULT_URL_EXP", 3600),
-        policy: Optional[str] = None,
-    ) -> str:
+    @property
+    def private_key(self) -> RSAPrivateKey:
+        # parsed lazily and shared through the process-wide registry
+        if self._private_key is None:
+            self._private_key = load_private_key(self.public_key_id, self.pem_key)
+
+        return self._private_key
+
+    def _rsa_signer(self, message: bytes) -> bytes:
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        return self.private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+
+    def _sign_url(self, url: str, expires_at: int, starts_at: int) -> str:
+        """
+        Signs a custom policy for the url, valid from `starts_at` until `expires_at` (epoch seconds). Returns the
+        url botocore's CloudFrontSigner.generate_presigned_url returns for
+        build_policy(url, date_less_than=expires_at, date_greater_than=starts_at), byte for byte.
+        """
+        policy, encoded_policy = policy_templates.get(url).render(expires_at, starts_at)
+        signature = cloudfront_b64encode(self._rsa_signer(policy))
+        separator = "&" if "?" in url else "?"
+
+        return f"{url}{separator}Policy={encoded_policy}&Signature={signature}&Key-Pair-Id={self.public_key_id}"
+
+    @staticmethod
+    def _validate_arguments(url: str, expiration_in_seconds: int | str) -> None:
         if not url:
             raise TypeError("missing 1 required positional argument: 'url")
         elif not expiration_in_seconds:
             raise TypeError(
                 "missing 1 required positional argument: 'expiration_in_seconds"
             )
-        elif not expiration_in_seconds.isdigit() and not isinstance(
-            expiration_in_seconds, int
+        elif (
+            not isinstance(expiration_in_seconds, int)
+            and not str(expiration_in_seconds).isdigit()
         ):
             raise TypeError(
                 f"expiration_in_seconds must be of type int. Received type {type(expiration_in_seconds)}"
             )
 
+    def generate_presigned_url(
+        self,
+        url: str,
+        expiration_in_seconds: int | str = os.getenv("CF_DEFAULT_URL_EXP", 3600),
+        policy: Optional[str] = None,
+    ) -> str:
+        self._validate_arguments(url, expiration_in_seconds)
+
         try:
+            if self.url_cache is not None:
+                return self._generate_cached_presigned_url(
+                    url, int(expiration_in_seconds)
+                )
+
             # set expiration time between now and delta
-            expiration_time = datetime.now(timezone.utc) + timedelta(
-                seconds=int(expiration_in_seconds)
-            )
+            now = int(time.time())
+            expires_at = now + int(expiration_in_seconds)
 
             logger.info(
-                f"url will expire after {expiration_time} ({expiration_in_seconds} seconds...)"
+                "url will expire at %s (%s seconds...)",
+                expires_at,
+                expiration_in_seconds,
             )
 
-            # builds custom policy to restrict presigned url access further
-            custom_policy = self.cloudfront_signer.build_policy(
-                url,
-                date_less_than=expiration_time,
-                date_greater_than=datetime.now(timezone.utc),
-            )
-
-            # generate presigned url
-            signed_url: str = self.cloudfront_signer.generate_presigned_url(
-                url=url, policy=custom_policy
-            )
+            # custom policy valid from now until expires_at, to restrict presigned url access further
+            with timer("sign_url"):
+                signed_url = self._sign_url(url, expires_at, now)
 
             # Leaving it for potential error handling in the future
             # if not validators.url(signed_url):
             #     raise InvalidSignedUrlError()
 
+            # the signed url itself is a bearer credential - never logged
             logger.info("signed url generation successful")
-            logger.debug(signed_url)
 
             return {"url": signed_url}
 
         except Exception as e:
-            logger.error(f"{e}")
+            logger.error("%s", e)
+            raise ValueError(e)
+
+    def _generate_cached_presigned_url(
+        self, url: str, expiration_in_seconds: int
+    ) -> dict:
+        # keyed by the key fingerprint so a rotated key never serves urls signed with the previous one
+        cache_key = (
+            self.public_key_id,
+            self.key_fingerprint,
+            url,
+            expiration_in_seconds,
+        )
+
+        signed_url = self.url_cache.get(cache_key)
+
+        if signed_url is not None:
+            increment("url_cache_hit")
+            logger.info("signed url served from cache")
+            return {"url": signed_url}
+
+        increment("url_cache_miss")
+
+        now = time.time()
+        expires_at = self.url_cache.bucket_expiry(now + expiration_in_seconds)
+
+        logger.info("url will expire at %s (bucketed expiry)", expires_at)
+
+        with timer("sign_url"):
+            signed_url = self._sign_url(url, expires_at, int(now))
+
+        self.url_cache.put(
+            cache_key,
+            signed_url,
+            expires_at=expires_at,
+            expiration_in_seconds=expiration_in_seconds,
+            now=now,
+        )
+
+        logger.info("signed url generation successful")
+
+        return {"url": signed_url}
+
+    def generate_signed_cookies(
+        self,
+        resource: str,
+        expiration_in_seconds: int | str = os.getenv("CF_DEFAULT_URL_EXP", 3600),
+    ) -> dict:
+        """
+        Signs a single custom policy for a resource pattern (e.g. 'https://domain/media/prefix/*') and returns
+        the CloudFront signed cookie values, so one signature grants access to every object under the prefix.
+            :param [Required] resource: Resource url of the policy. May contain '*' wildcards.
+            :param [Optional] expiration_in_seconds: Seconds until the cookies expire.
+
+        Returns:
+            {"cookies": {"CloudFront-Policy": ..., "CloudFront-Signature": ..., "CloudFront-Key-Pair-Id": ...},
+             "expires": <epoch seconds>}
+        """
+        self._validate_arguments(resource, expiration_in_seconds)
+
+        try:
+            now = int(time.time())
+            expires_at = now + int(expiration_in_seconds)
+
+            logger.info(
+                "cookies will expire at %s (%s seconds...)",
+                expires_at,
+                expiration_in_seconds,
+            )
+
+            custom_policy, encoded_policy = policy_templates.get(resource).render(
+                expires_at, now
+            )
+
+            with timer("sign_cookies"):
+                signature: bytes = self._rsa_signer(custom_policy)
+
+            logger.info("signed cookies generation successful")
+
+            return {
+                "cookies": {
+                    "CloudFront-Policy": encoded_policy,
+                    "CloudFront-Signature": cloudfront_b64encode(signature),
+                    "CloudFront-Key-Pair-Id": self.public_key_id,
+                },
+                "expires": expires_at,
+            }
+
+        except Exception as e:
+            logger.error("%s", e)
             raise ValueError(e)
@@ -0,0 +1,247 @@
+from __future__ import annotations
+import os, sys
+from decimal import Decimal
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from jc_boto3_helper.client_factory import get_client
+from jc_boto3_helper.dynamodb_resource_table import DynamoDBResourceTable, ItemCache
+from jc_custom_utilities.logger import logger_config
+from jc_custom_utilities.env import load_env
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb.client import DynamoDBClient
+
+# load env variable
+load_env()
+
+# Setup logger config
+logger = logger_config(__name__)
+
+# fallback for the attribute types the lean decoder/encoder does not handle (sets, binary sets)
+_type_deserializer = TypeDeserializer()
+_type_serializer = TypeSerializer()
+
+
+def decode_number(value: str) -> int | float:
+    """
+    Decodes a DynamoDB N value to int, or to float when it has a fraction or exponent.
+    Unlike the resource layer (Decimal) floats are limited to double precision.
+    """
+    if "." in value or "e" in value or "E" in value:
+        return float(value)
+
+    return int(value)
+
+
+def decode_attribute(attribute: dict) -> Any:
+    """
+    Decodes a low-level AttributeValue ({"S": "..."}, {"N": "..."}, ...) to a plain python value.
+    S, N, BOOL, NULL, L and M are decoded inline - every other type goes through boto3's TypeDeserializer.
+    """
+    for attribute_type, value in attribute.items():
+        if attribute_type == "S":
+            return value
+        if attribute_type == "N":
+            return decode_number(value)
+        if attribute_type == "M":
+            return {key: decode_attribute(item) for key, item in value.items()}
+        if attribute_type == "L":
+            return [decode_attribute(item) for item in value]
+        if attribute_type == "BOOL":
+            return value
+        if attribute_type == "NULL":
+            return None
+
+        return _type_deserializer.deserialize(attribute)
+
+
+def decode_item(item: Optional[dict]) -> Optional[dict]:
+    if item is None:
+        return None
+
+    return {key: decode_attribute(attribute) for key, attribute in item.items()}
+
+
+def encode_attribute(value: Any) -> dict:
+    """
+    Encodes a python value to a low-level AttributeValue. Accepts the floats produced by decode_attribute,
+    which boto3's TypeSerializer rejects.
+    """
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float, Decimal)):
+        return {"N": str(value)}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, dict):
+        return {"M": encode_item(value)}
+    if isinstance(value, (list, tuple)):
+        return {"L": [encode_attribute(item) for item in value]}
+
+    return _type_serializer.serialize(value)
+
+
+def encode_item(item: Optional[dict]) -> Optional[dict]:
+    if item is None:
+        return None
+
+    return {key: encode_attribute(value) for key, value in item.items()}
+
+
+class ClientTable:
+    """
+    Table-like wrapper around the low-level DynamoDB client. Takes and returns plain python values like the
+    boto3 Table resource, without the resource layer's TypeDeserializer/Decimal pass over every attribute.
+        :param [Required] ddb_client: Low-level DynamoDB client.
+        :param [Required] table_name: Name of the DynamoDB table.
+    """
+
+    def __init__(self, ddb_client: DynamoDBClient, table_name: str) -> None:
+        self.client = ddb_client
+        self.table_name = table_name
+
+    def scan(self, **kwargs) -> dict:
+        return self._decode_page(self.client.scan(**self._encode_input(kwargs)))
+
+    def query(self, **kwargs) -> dict:
+        return self._decode_page(self.client.query(**self._encode_input(kwargs)))
+
+    def get_item(self, **kwargs) -> dict:
+        response: dict = self.client.get_item(**self._encode_input(kwargs))
+
+        if "Item" in response:
+            response["Item"] = decode_item(response["Item"])
+
+        return response
+
+    def batch_get_item(self, RequestItems: dict) -> dict:
+        """
+        Same contract as DynamoDBServiceResource.batch_get_item - keys in, decoded items/UnprocessedKeys out.
+        """
+        request_items = {
+            table_name: {
+                **request,
+                "Keys": [encode_item(key) for key in request["Keys"]],
+            }
+            for table_name, request in RequestItems.items()
+        }
+        response: dict = self.client.batch_get_item(RequestItems=request_items)
+
+        response["Responses"] = {
+            table_name: [decode_item(item) for item in items]
+            for table_name, items in response.get("Responses", {}).items()
+        }
+        response["UnprocessedKeys"] = {
+            table_name: {
+                **request,
+                "Keys": [decode_item(key) for key in request["Keys"]],
+            }
+            for table_name, request in (response.get("UnprocessedKeys") or {}).items()
+        }
+
+        return response
+
+    def batch_write_item(self, RequestItems: dict) -> dict:
+        """
+        Same contract as DynamoDBServiceResource.batch_write_item - PutRequest items and DeleteRequest keys in,
+        decoded UnprocessedItems out.
+        """
+        response: dict = self.client.batch_write_item(
+            RequestItems=self._convert_write_requests(RequestItems, encode_item)
+        )
+        response["UnprocessedItems"] = self._convert_write_requests(
+            response.get("UnprocessedItems") or {}, decode_item
+        )
+
+        return response
+
+    @staticmethod
+    def _convert_write_requests(request_items: dict, convert) -> dict:
+        return {
+            table_name: [
+                (
+                    {"PutRequest": {"Item": convert(request["PutRequest"]["Item"])}}
+                    if "PutRequest" in request
+                    else {
+                        "DeleteRequest": {
+                            "Key": convert(request["DeleteRequest"]["Key"])
+                        }
+                    }
+                )
+                for request in requests
+            ]
+            for table_name, requests in request_items.items()
+        }
+
+    def _encode_input(self, kwargs: dict) -> dict:
+        request = {**kwargs, "TableName": self.table_name}
+        names = dict(request.get("ExpressionAttributeNames") or {})
+        values = dict(request.get("ExpressionAttributeValues") or {})
+        # one builder per request keeps the #n/:v placeholders unique across key condition and filter
+        builder = ConditionExpressionBuilder()
+
+        for parameter, is_key_condition in (
+            ("KeyConditionExpression", True),
+            ("FilterExpression", False),
+            ("ConditionExpression", False),
+        ):
+            condition = request.get(parameter)
+
+            if isinstance(condition, ConditionBase):
+                built_expression = builder.build_expression(
+                    condition, is_key_condition=is_key_condition
+                )
+                request[parameter] = built_expression.condition_expression
+                names.update(built_expression.attribute_name_placeholders)
+                values.update(built_expression.attribute_value_placeholders)
+
+        if names:
+            request["ExpressionAttributeNames"] = names
+        if values:
+            request["ExpressionAttributeValues"] = encode_item(values)
+
+        for parameter in ("Key", "ExclusiveStartKey"):
+            if request.get(parameter):
+                request[parameter] = encode_item(request[parameter])
+
+        return request
+
+    @staticmethod
+    def _decode_page(response: dict) -> dict:
+        response["Items"] = [decode_item(item) for item in response.get("Items", [])]
+
+        if response.get("LastEvaluatedKey"):
+            response["LastEvaluatedKey"] = decode_item(response["LastEvaluatedKey"])
+
+        return response
+
+
+class DynamoDBClientTable(DynamoDBResourceTable):
+    """
+    DynamoDBResourceTable backed by the low-level client API and a lean item decoder - same scan/query/get_item
+    interface, but numbers are returned as int/float instead of Decimal and large scans skip the resource layer.
+        :param [Required] table_name: Name of the DynamoDB table.
+        :param [Optional] region: AWS region where the table is hosted. Defaults to the AWS configuration if None.
+        :param [Optional] item_cache: Read-through cache used by get_item.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        region: Optional[str] = os.getenv("DEFAULT_AWS_REGION"),
+        item_cache: Optional[ItemCache] = None,
+    ) -> None:
+        self.client: DynamoDBClient = get_client("dynamodb", region_name=region)
+        self.region = region
+        self.table_name = table_name
+        self.table = ClientTable(self.client, self.table_name)
+        # batch_get_item/batch_put_items of the base class go through self.resource
+        self.resource = self.table
+        self.item_cache = item_cache
+
+    def _new_table(self) -> ClientTable:
+        # clients are thread safe - the parallel scan segments share the pooled connections of one client
+        return ClientTable(self.client, self.table_name)
@@ -1,36 +1,343 @@
-import os, sys
-from boto3 import resource
+from __future__ import annotations
+import os, sys, time, random, queue, threading
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from jc_custom_utilities.logger import logger_config
-from dotenv import load_dotenv
-from mypy_boto3_dynamodb.service_resource import Table, DynamoDBServiceResource
-from mypy_boto3_dynamodb.type_defs import (
-    GetItemInputTableGetItemTypeDef,
-    ScanInputRequestTypeDef,
-)
-from typing import Optional
+from jc_custom_utilities.cache import LRUCache, approximate_size
+from jc_custom_utilities.env import load_env
+from jc_boto3_helper.client_factory import get_resource, new_resource
+from jc_custom_utilities.metrics import increment, timer
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional
+
+# type stubs are only needed by the type checker - not imported at runtime
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb.service_resource import Table, DynamoDBServiceResource
+    from mypy_boto3_dynamodb.type_defs import (
+        GetItemInputTableGetItemTypeDef,
+        QueryInputTableQueryTypeDef,
+        ScanInputRequestTypeDef,
+    )
 
 # load env variable
-load_dotenv()
+load_env()
 
 # Setup logger config
 logger = logger_config(__name__)
 
+# DynamoDB BatchGetItem accepts at most 100 keys per request
+BATCH_GET_ITEM_MAX_KEYS = 100
+
+# DynamoDB BatchWriteItem accepts at most 25 put or delete requests per request
+BATCH_WRITE_ITEM_MAX_ITEMS = 25
+
+
+# error codes DynamoDB returns when the table or account throughput is exceeded
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+
+def build_projection(attributes: Iterable[str]) -> dict:
+    """
+    Returns the ProjectionExpression and ExpressionAttributeNames of a read returning only `attributes` - every
+    name goes through a '#name' placeholder, so reserved words (e.g. 'name') need no special care. Attribute names
+    must be letters, digits and underscores.
+    """
+    attributes = list(attributes)
+
+    if not attributes or not all(
+        isinstance(name, str) and name.isascii() and name.replace("_", "").isalnum()
+        for name in attributes
+    ):
+        raise ValueError(
+            "Projected attributes must be letters, digits and underscores."
+        )
+
+    return {
+        "ProjectionExpression": ", ".join(f"#{name}" for name in attributes),
+        "ExpressionAttributeNames": {f"#{name}": name for name in attributes},
+    }
+
+
+def backoff_delay(attempt: int, base: float = 0.05, cap: float = 2.0) -> float:
+    """
+    Exponential backoff with full jitter - seconds to wait before retry number `attempt` (0 based).
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def is_throttling_error(error: Exception) -> bool:
+    return (
+        isinstance(error, ClientError)
+        and error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+    )
+
+
+# returned by ItemCache.get() when the key is not cached
+CACHE_MISS = object()
+
+
+class ItemCache:
+    """
+    Read-through cache for DynamoDBResourceTable.get_item, bounded by entry count and bytes with LRU eviction
+    and TTL. Not-found results are cached for `negative_ttl` seconds so probes for missing ids stay in memory.
+        :param [Optional] max_entries: Maximum number of cached items.
+        :param [Optional] max_bytes: Maximum approximate size of the cached items.
+        :param [Optional] ttl: Seconds an item is served from the cache. 0 disables the cache.
+        :param [Optional] negative_ttl: Seconds a not-found result is served from the cache. 0 disables it.
+        :param [Optional] record_type: Compact form items are cached in (e.g. MediaRecord) - a class with
+            from_item(item) and to_item(). Each get() then returns a new item dict.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = int(os.getenv("ITEM_CACHE_MAX_ENTRIES", 10000)),
+        max_bytes: int = int(os.getenv("ITEM_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+        ttl: float = float(os.getenv("ITEM_CACHE_TTL", 60)),
+        negative_ttl: float = float(os.getenv("ITEM_CACHE_NEGATIVE_TTL", 5)),
+        record_type: Optional[type] = None,
+    ) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.record_type = record_type
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+
+    @staticmethod
+    def cache_key(
+        Key: dict,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        **kwargs,
+    ) -> tuple:
+        return (
+            tuple(sorted(Key.items())),
+            ProjectionExpression,
+            tuple(sorted((ExpressionAttributeNames or {}).items())),
+        )
+
+    def get(self, key: tuple) -> Any:
+        """
+        Returns the cached item, None for a cached not-found result, or CACHE_MISS.
+        """
+        cached_item = self.cache.get(key, CACHE_MISS)
+
+        if (
+            self.record_type is not None
+            and cached_item is not CACHE_MISS
+            and cached_item is not None
+        ):
+            return cached_item.to_item()
+
+        return cached_item
+
+    def put(self, key: tuple, item: Optional[dict]) -> None:
+        ttl = self.ttl if item is not None else self.negative_ttl
+
+        if ttl <= 0:
+            return
+
+        size = approximate_size(item)
+
+        if self.record_type is not None and item is not None:
+            item = self.record_type.from_item(item)
+
+        self.cache.put(key, item, size=size, ttl=ttl)
+
+    def invalidate(self, key: tuple) -> None:
+        self.cache.delete(key)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+# marks the end of a segment in the parallel scan page queue
+_SEGMENT_DONE = object()
+
+
+class ParallelScan:
+    """
+    Iterable over every item of a segmented (Segment/TotalSegments) scan, issued from a bounded thread pool.
+    Each worker scans its segments with its own Table resource and pages are merged into a single iterator.
+        :param [Required] table_factory: Callable returning a new Table resource - one is created per segment.
+        :param [Required] total_segments: Number of segments the table is split into.
+        :param [Optional] max_workers: Number of segments scanned concurrently. Defaults to total_segments.
+        :param [Optional] max_retries: Retries of a throttled page request before the scan fails.
+        :param [Optional] max_buffered_pages: Pages buffered ahead of the consumer before workers wait.
+        :param [Optional] scan_kwargs: Additional scan input parameters (e.g. ProjectionExpression).
+
+    `stats` reports items, pages, retries, consumed read capacity and items/sec once iteration has started.
+    """
+
+    def __init__(
+        self,
+        table_factory: Callable[[], Table],
+        total_segments: int,
+        max_workers: Optional[int] = None,
+        max_retries: int = 8,
+        max_buffered_pages: int = 16,
+        scan_kwargs: Optional[dict] = None,
+    ) -> None:
+        if total_segments <= 0:
+            raise ValueError("total_segments must be greater than 0.")
+
+        self.table_factory = table_factory
+        self.total_segments = total_segments
+        self.max_workers = max(1, min(max_workers or total_segments, total_segments))
+        self.max_retries = max_retries
+        self.max_buffered_pages = max_buffered_pages
+        self.scan_kwargs = scan_kwargs or {}
+        self._stats_lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._items = 0
+        self._pages = 0
+        self._retries = 0
+        self._consumed_capacity = 0.0
+
+    @property
+    def stats(self) -> dict:
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+
+        return {
+            "items": self._items,
+            "pages": self._pages,
+            "retries": self._retries,
+            "consumed_capacity": self._consumed_capacity,
+            "elapsed_seconds": elapsed,
+            "items_per_second": self._items / elapsed if elapsed else 0.0,
+            "total_segments": self.total_segments,
+            "max_workers": self.max_workers,
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        pages: queue.Queue = queue.Queue(maxsize=self.max_buffered_pages)
+        stop = threading.Event()
+        self._started_at = time.perf_counter()
+        self._finished_at = None
+
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="parallel-scan"
+        )
+        futures = [
+            executor.submit(self._scan_segment, segment, pages, stop)
+            for segment in range(self.total_segments)
+        ]
+
+        try:
+            finished_segments = 0
+
+            while finished_segments < self.total_segments:
+                page = pages.get()
+
+                if page is _SEGMENT_DONE:
+                    finished_segments += 1
+                elif isinstance(page, Exception):
+                    raise ValueError(page)
+                else:
+                    yield from page
+
+        finally:
+            # stops the workers when the consumer is done early or a segment failed
+            stop.set()
+
+            for future in futures:
+                future.cancel()
+
+            executor.shutdown(wait=True)
+            self._finished_at = time.perf_counter()
+
+            logger.info("parallel scan stats - %s", self.stats)
+
+    def _scan_segment(
+        self, segment: int, pages: queue.Queue, stop: threading.Event
+    ) -> None:
+        try:
+            # boto3 resources are not thread safe - every worker uses its own
+            table = self.table_factory()
+            kwargs = {
+                **self.scan_kwargs,
+                "Segment": segment,
+                "TotalSegments": self.total_segments,
+                "ReturnConsumedCapacity": "TOTAL",
+            }
+            attempt = 0
+
+            while not stop.is_set():
+                try:
+                    response: dict = table.scan(**kwargs)
+
+                except Exception as e:
+                    if not is_throttling_error(e) or attempt >= self.max_retries:
+                        raise
+
+                    with self._stats_lock:
+                        self._retries += 1
+                    increment("ddb_throttle_retry")
+
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+                    continue
+
+                attempt = 0
+                items: list = response.get("Items", [])
+
+                with self._stats_lock:
+                    self._items += len(items)
+                    self._pages += 1
+                    self._consumed_capacity += response.get("ConsumedCapacity", {}).get(
+                        "CapacityUnits", 0.0
+                    )
+
+                self._put(pages, items, stop)
+
+                if not response.get("LastEvaluatedKey"):
+                    break
+
+                kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
+
+        except Exception as e:
+            logger.error("segment %s failed - %s", segment, e)
+            self._put(pages, e, stop)
+
+        finally:
+            self._put(pages, _SEGMENT_DONE, stop)
+
+    @staticmethod
+    def _put(pages: queue.Queue, page: Any, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                pages.put(page, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
 
 class DynamoDBResourceTable:
     """
     Initialize the DynamoDB resource table with the specified table name and region.
         :param [Required] table_name: Name of the DynamoDB table.
         :param [Optional] region: AWS region where the table is hosted. Defaults to the AWS configuration if None.
+        :param [Optional] item_cache: Read-through cache used by get_item.
     """
 
     def __init__(
-        self, table_name: str, region: Optional[str] = os.getenv("DEFAULT_AWS_REGION")
+        self,
+        table_name: str,
+        region: Optional[str] = os.getenv("DEFAULT_AWS_REGION"),
+        item_cache: Optional[ItemCache] = None,
     ) -> None:
-        self.resource: DynamoDBServiceResource = resource(
+        self.resource: DynamoDBServiceResource = get_resource(
             "dynamodb", region_name=region
         )
+        self.region = region
         self.table_name = table_name
         self.table: Table = self.resource.Table(self.table_name)
+        self.item_cache = item_cache
 
     def scan(self, **kwargs: ScanInputRequestTypeDef) -> Optional[dict]:
         """
@@ -74,23 +381,194 @@ class DynamoDBResourceTable:
         """
 
         try:
-            response: dict = self.table.scan(**kwargs)
+            with timer("ddb_scan"):
+                response: dict = self.table.scan(**kwargs)
 
-            return {
+            result = {
                 "Items": response.get("Items", []),
                 "Count": response.get("Count", 0),
             }
 
+            if response.get("LastEvaluatedKey"):
+                result["LastEvaluatedKey"] = response.get("LastEvaluatedKey")
+
+            return result
+
         except Exception as e:
-            logger.error(f"{e}")
+            logger.error("%s", e)
             raise ValueError(e)
 
+    def iter_scan(
+        self,
+        pages: bool = False,
+        max_items: Optional[int] = None,
+        **kwargs: ScanInputRequestTypeDef,
+    ) -> Iterator[dict]:
+        """
+        Lazily scans the whole table, following `LastEvaluatedKey` one page at a time.
+        Accepts the same input parameters as scan() (e.g. ProjectionExpression, FilterExpression).
+
+        Attributes:
+            pages (Optional[bool]):
+                Yield one {"Items", "Count", "LastEvaluatedKey"} dict per page instead of individual items.
+            max_items (Optional[int]):
+                Stop after this many items have been yielded. The page `Limit` is capped to the remaining budget
+                so no more items than needed are read.
+        """
+        return self._paginate(self.table.scan, pages, max_items, kwargs)
+
+    def query(self, **kwargs: QueryInputTableQueryTypeDef) -> Optional[dict]:
+        """
+        Defines the input parameters for a DynamoDB Query operation. Returns a single page.
+
+        Attributes:
+            KeyConditionExpression (str | ConditionBase):
+                The condition on the partition key (and optionally the sort key) of the table or index,
+                e.g. `Key("genre").eq("drama")`. This parameter is required.
+            IndexName (Optional[str]):
+                The name of a global or local secondary index to query instead of the table.
+            ScanIndexForward (Optional[bool]):
+                Sort key order of the results - `True` (default) for ascending, `False` for descending.
+            Limit (Optional[int]):
+                The maximum number of items to evaluate (not necessarily the number of matching items).
+            ExclusiveStartKey (Optional[Dict[str, Any]]):
+                The primary key of the first item that this operation will evaluate. Use the value that was
+                returned for `LastEvaluatedKey` in the previous operation.
+            ProjectionExpression (Optional[str]):
+                A string that identifies one or more attributes to retrieve from the table.
+            FilterExpression (Optional[str | ConditionBase]):
+                A condition that DynamoDB applies after the items are read.
+            ExpressionAttributeNames (Optional[Dict[str, str]]):
+                One or more substitution tokens for attribute names in an expression.
+            ExpressionAttributeValues (Optional[Dict[str, Any]]):
+                One or more values that can be substituted in an expression.
+        """
+        if not kwargs.get("KeyConditionExpression"):
+            raise ValueError(
+                "The 'KeyConditionExpression' parameter must be provided and cannot be empty."
+            )
+
+        try:
+            with timer("ddb_query"):
+                response: dict = self.table.query(**kwargs)
+
+            result = {
+                "Items": response.get("Items", []),
+                "Count": response.get("Count", 0),
+            }
+
+            if response.get("LastEvaluatedKey"):
+                result["LastEvaluatedKey"] = response.get("LastEvaluatedKey")
+
+            return result
+
+        except Exception as e:
+            logger.error("%s", e)
+            raise ValueError(e)
+
+    def iter_query(
+        self,
+        pages: bool = False,
+        max_items: Optional[int] = None,
+        **kwargs: QueryInputTableQueryTypeDef,
+    ) -> Iterator[dict]:
+        """
+        Lazily queries the table or an index, following `LastEvaluatedKey` one page at a time.
+        Accepts the same input parameters as query() and the same `pages`/`max_items` options as iter_scan().
+        """
+        if not kwargs.get("KeyConditionExpression"):
+            raise ValueError(
+                "The 'KeyConditionExpression' parameter must be provided and cannot be empty."
+            )
+
+        return self._paginate(self.table.query, pages, max_items, kwargs)
+
+    def parallel_scan(
+        self,
+        total_segments: int = 4,
+        max_workers: Optional[int] = None,
+        max_retries: int = 8,
+        **kwargs: ScanInputRequestTypeDef,
+    ) -> ParallelScan:
+        """
+        Scans the whole table as `total_segments` segments from a bounded thread pool and merges the results
+        into a single iterator of items. Accepts the same input parameters as scan().
+
+        Attributes:
+            total_segments (Optional[int]):
+                Number of segments the table is split into (TotalSegments).
+            max_workers (Optional[int]):
+                Number of segments scanned concurrently. Defaults to total_segments.
+            max_retries (Optional[int]):
+                Retries of a throttled page request, with exponential backoff, before the scan fails.
+
+        Returns:
+            ParallelScan - iterate it for the items; its `stats` report items/sec and consumed capacity.
+        """
+        return ParallelScan(
+            table_factory=self._new_table,
+            total_segments=total_segments,
+            max_workers=max_workers,
+            max_retries=max_retries,
+            scan_kwargs=kwargs,
+        )
+
+    def _new_table(self) -> Table:
+        return new_resource("dynamodb", region_name=self.region).Table(self.table_name)
+
+    def _paginate(
+        self,
+        operation: Callable[..., dict],
+        pages: bool,
+        max_items: Optional[int],
+        kwargs: dict,
+    ) -> Iterator[dict]:
+        kwargs = dict(kwargs)
+        page_limit = kwargs.get("Limit")
+        remaining = max_items
+
+        while remaining is None or remaining > 0:
+            if remaining is not None:
+                kwargs["Limit"] = (
+                    min(page_limit, remaining) if page_limit else remaining
+                )
+
+            try:
+                response: dict = operation(**kwargs)
+
+            except Exception as e:
+                logger.error("%s", e)
+                raise ValueError(e)
+
+            items: list = response.get("Items", [])
+            last_evaluated_key = response.get("LastEvaluatedKey")
+
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+
+            if pages:
+                yield {
+                    "Items": items,
+                    "Count": len(items),
+                    "LastEvaluatedKey": last_evaluated_key,
+                }
+            else:
+                yield from items
+
+            if not last_evaluated_key:
+                return
+
+            kwargs["ExclusiveStartKey"] = last_evaluated_key
+
     def get_item(
         self,
         **kwargs: GetItemInputTableGetItemTypeDef,
     ) -> Optional[dict]:
         """
         Defines the input parameters for a DynamoDB GetItem operation.
+        Served from the item cache when one is configured, unless ConsistentRead or ReturnConsumedCapacity is
+        requested. Cached items are shared between callers and must not be mutated.
 
         Attributes:
             TableName (str):
@@ -120,13 +598,182 @@ class DynamoDBResourceTable:
                 "The 'key' parameter must be provided and cannot be empty."
             )
 
+        use_cache = (
+            self.item_cache is not None
+            and not kwargs.get("ConsistentRead")
+            and not kwargs.get("ReturnConsumedCapacity")
+        )
+
+        if use_cache:
+            cache_key = ItemCache.cache_key(**kwargs)
+            cached_item = self.item_cache.get(cache_key)
+
+            if cached_item is not CACHE_MISS:
+                increment("item_cache_hit")
+                logger.debug("item served from cache")
+                return {"Item": cached_item}
+
+            increment("item_cache_miss")
+
         try:
-            response: dict = self.table.get_item(**kwargs)
+            with timer("ddb_get_item"):
+                response: dict = self.table.get_item(**kwargs)
+
+            # not the item - tables such as the pre-signed urls hold credentials
+            logger.debug(
+                "get_item %s - %s",
+                key,
+                "found" if response.get("Item") else "not found",
+            )
 
-            logger.debug(response)
+            if use_cache:
+                self.item_cache.put(cache_key, response.get("Item"))
 
             return {"Item": response.get("Item")}
 
         except Exception as e:
-            logger.error(f"{e} - {key}")
+            logger.error("%s - %s", e, key)
+            raise ValueError(e)
+
+    def batch_get_item(
+        self,
+        Keys: list[dict],
+        max_retries: int = 5,
+        **kwargs,
+    ) -> Optional[dict]:
+        """
+        Retrieves the items for the given keys with DynamoDB BatchGetItem, chunked into requests of 100 keys.
+        UnprocessedKeys are retried with exponential backoff, up to max_retries per chunk.
+
+        Attributes:
+            Keys (List[Dict[str, Any]]):
+                The primary keys of the items to retrieve. Keys must be unique. This parameter is required.
+            max_retries (Optional[int]):
+                Number of times UnprocessedKeys of a chunk are retried before they are returned unprocessed.
+            ProjectionExpression (Optional[str]):
+                A string that identifies one or more attributes to retrieve from the table. Include the key
+                attributes to be able to match the returned items with the requested keys.
+            ExpressionAttributeNames (Optional[Dict[str, str]]):
+                One or more substitution tokens for attribute names in the ProjectionExpression.
+            ConsistentRead (Optional[bool]):
+                If set to `True`, the operation uses strongly consistent reads.
+
+        Returns:
+            {"Items": [...], "UnprocessedKeys": [...]} - items are returned in no particular order.
+        """
+        if not Keys:
+            raise ValueError(
+                "The 'Keys' parameter must be provided and cannot be empty."
+            )
+
+        items: list[dict] = []
+        unprocessed_keys: list[dict] = []
+
+        try:
+            for start in range(0, len(Keys), BATCH_GET_ITEM_MAX_KEYS):
+                request_items = {
+                    self.table_name: {
+                        "Keys": Keys[start : start + BATCH_GET_ITEM_MAX_KEYS],
+                        **kwargs,
+                    }
+                }
+                attempt = 0
+
+                while request_items:
+                    with timer("ddb_batch_get_item"):
+                        response: dict = self.resource.batch_get_item(
+                            RequestItems=request_items
+                        )
+                    items.extend(response.get("Responses", {}).get(self.table_name, []))
+
+                    request_items = response.get("UnprocessedKeys") or {}
+
+                    if not request_items:
+                        break
+
+                    if attempt >= max_retries:
+                        logger.warning(
+                            "giving up on %s unprocessed keys",
+                            len(request_items[self.table_name]["Keys"]),
+                        )
+                        unprocessed_keys.extend(request_items[self.table_name]["Keys"])
+                        break
+
+                    increment("ddb_batch_get_item_retry")
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+
+            return {"Items": items, "UnprocessedKeys": unprocessed_keys}
+
+        except Exception as e:
+            logger.error("%s", e)
+            raise ValueError(e)
+
+    def batch_put_items(
+        self,
+        Items: list[dict],
+        max_retries: int = 5,
+    ) -> Optional[dict]:
+        """
+        Writes the items with DynamoDB BatchWriteItem, chunked into requests of 25 items. An item replaces the
+        stored item with the same key. UnprocessedItems are retried with exponential backoff, up to max_retries
+        per chunk.
+
+        Attributes:
+            Items (List[Dict[str, Any]]):
+                The items to write, including their key attributes. Keys must be unique. This parameter is
+                required.
+            max_retries (Optional[int]):
+                Number of times UnprocessedItems of a chunk are retried before they are returned unprocessed.
+
+        Returns:
+            {"UnprocessedItems": [...]} - the items that were not written.
+        """
+        if not Items:
+            raise ValueError(
+                "The 'Items' parameter must be provided and cannot be empty."
+            )
+
+        unprocessed_items: list[dict] = []
+
+        try:
+            for start in range(0, len(Items), BATCH_WRITE_ITEM_MAX_ITEMS):
+                request_items = {
+                    self.table_name: [
+                        {"PutRequest": {"Item": item}}
+                        for item in Items[start : start + BATCH_WRITE_ITEM_MAX_ITEMS]
+                    ]
+                }
+                attempt = 0
+
+                while request_items:
+                    with timer("ddb_batch_write_item"):
+                        response: dict = self.resource.batch_write_item(
+                            RequestItems=request_items
+                        )
+
+                    request_items = response.get("UnprocessedItems") or {}
+
+                    if not request_items:
+                        break
+
+                    if attempt >= max_retries:
+                        logger.warning(
+                            "giving up on %s unprocessed items",
+                            len(request_items[self.table_name]),
+                        )
+                        unprocessed_items.extend(
+                            request["PutRequest"]["Item"]
+                            for request in request_items[self.table_name]
+                        )
+                        break
+
+                    increment("ddb_batch_write_item_retry")
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+
+            return {"UnprocessedItems": unprocessed_items}
+
+        except Exception as e:
+            logger.error("%s", e)
             raise ValueError(e)
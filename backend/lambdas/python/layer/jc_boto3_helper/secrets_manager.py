@@ -1,30 +1,237 @@
-import os, sys
-import boto3
-from dotenv import load_dotenv
+from __future__ import annotations
+import os, sys, time, threading
+from jc_custom_utilities.env import load_env
+from jc_boto3_helper.client_factory import get_client
 from jc_custom_utilities.logger import logger_config
-from mypy_boto3_secretsmanager.client import SecretsManagerClient
-from mypy_boto3_secretsmanager.type_defs import (
-    GetSecretValueRequestRequestTypeDef,
-)
+from jc_custom_utilities.metrics import increment, timer
 from botocore.exceptions import ClientError
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from mypy_boto3_secretsmanager.client import SecretsManagerClient
+    from mypy_boto3_secretsmanager.type_defs import (
+        GetSecretValueRequestRequestTypeDef,
+    )
 
 # Load env variable
-load_dotenv()
+load_env()
 
 # Setup logger config
 logger = logger_config(__name__)
 
 
+class CachedSecret:
+    """
+    A cached secret value along with the monotonic time it was fetched at.
+    """
+
+    __slots__ = ("value", "fetched_at", "refresh_thread")
+
+    def __init__(self, value: dict, fetched_at: float) -> None:
+        self.value = value
+        self.fetched_at = fetched_at
+        self.refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def version_id(self) -> Optional[str]:
+        return self.value.get("VersionId")
+
+
+class _InFlightFetch:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Optional[dict] = None
+        self.error: Optional[Exception] = None
+
+
+class SecretCache:
+    """
+    In-memory secret cache keyed by SecretId and VersionStage (or VersionId).
+        :param [Required] fetch: Callable that retrieves the secret from Secrets Manager given the request kwargs.
+        :param [Optional] ttl: Seconds a fetched secret is served from memory.
+        :param [Optional] refresh_ahead: Seconds before expiry at which a hit triggers a background refresh.
+        :param [Optional] max_stale: Seconds past expiry an entry is still served when a refresh fails.
+        :param [Optional] clock: Monotonic clock, replaceable for tests.
+
+    Concurrent misses for the same key collapse into a single fetch. A refreshed value with a new VersionId
+    replaces the cached one, so rotated secrets are picked up without a cold start.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[..., dict],
+        ttl: float = 300,
+        refresh_ahead: float = 30,
+        max_stale: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.fetch = fetch
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.max_stale = max_stale
+        self.clock = clock
+        self._entries: dict[tuple, CachedSecret] = {}
+        self._in_flight: dict[tuple, _InFlightFetch] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(**kwargs: GetSecretValueRequestRequestTypeDef) -> tuple:
+        if kwargs.get("VersionId"):
+            return (kwargs.get("SecretId"), "VersionId", kwargs.get("VersionId"))
+
+        return (
+            kwargs.get("SecretId"),
+            "VersionStage",
+            kwargs.get("VersionStage") or "AWSCURRENT",
+        )
+
+    def get(self, **kwargs: GetSecretValueRequestRequestTypeDef) -> dict:
+        key = self.cache_key(**kwargs)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            age = self.clock() - entry.fetched_at
+
+            if age < self.ttl:
+                if age >= self.ttl - self.refresh_ahead:
+                    self._refresh_in_background(key, entry, kwargs)
+
+                increment("secret_cache_hit")
+                return entry.value
+
+        increment("secret_cache_miss")
+
+        try:
+            return self._load(key, kwargs)
+
+        except Exception as e:
+            # serve the stale value for a bounded time when Secrets Manager is unavailable
+            if (
+                entry is not None
+                and self.clock() - entry.fetched_at < self.ttl + self.max_stale
+            ):
+                logger.warning("secret refresh failed, serving stale value - %s", e)
+                increment("secret_stale_served")
+                return entry.value
+
+            raise
+
+    def peek(self, **kwargs: GetSecretValueRequestRequestTypeDef) -> Optional[dict]:
+        """
+        Returns the cached value if it has not expired, without fetching.
+        """
+        entry = self._entries.get(self.cache_key(**kwargs))
+
+        if entry is not None and self.clock() - entry.fetched_at < self.ttl:
+            return entry.value
+
+    def invalidate(self, **kwargs: GetSecretValueRequestRequestTypeDef) -> None:
+        with self._lock:
+            self._entries.pop(self.cache_key(**kwargs), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _load(self, key: tuple, kwargs: dict) -> dict:
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            is_leader = in_flight is None
+
+            if is_leader:
+                in_flight = self._in_flight[key] = _InFlightFetch()
+
+        if not is_leader:
+            # another caller is already fetching this secret - wait for its result
+            in_flight.done.wait()
+
+            if in_flight.error is not None:
+                raise in_flight.error
+
+            return in_flight.value
+
+        try:
+            value = self.fetch(**kwargs)
+            self._store(key, value)
+            in_flight.value = value
+
+            return value
+
+        except Exception as e:
+            in_flight.error = e
+            raise
+
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+            in_flight.done.set()
+
+    def _store(self, key: tuple, value: dict) -> None:
+        with self._lock:
+            previous = self._entries.get(key)
+
+            if previous is not None and previous.version_id != value.get("VersionId"):
+                logger.info(
+                    "secret version changed (%s -> %s)",
+                    previous.version_id,
+                    value.get("VersionId"),
+                )
+
+            self._entries[key] = CachedSecret(value, self.clock())
+
+    def _refresh_in_background(
+        self, key: tuple, entry: CachedSecret, kwargs: dict
+    ) -> None:
+        with self._lock:
+            if entry.refresh_thread is not None or key in self._in_flight:
+                return
+
+            entry.refresh_thread = threading.Thread(
+                target=self._refresh, args=(key, kwargs), daemon=True
+            )
+
+        entry.refresh_thread.start()
+
+    def _refresh(self, key: tuple, kwargs: dict) -> None:
+        try:
+            self._load(key, kwargs)
+
+        except Exception as e:
+            # the current entry keeps being served until it expires
+            logger.warning("background secret refresh failed - %s", e)
+
+
 class SecretsManager:
     """
     :param region: AWS region where the target secret is hosted. Defaults to 'us-east-2'.
+    :param cache_ttl: Seconds a retrieved secret is cached in memory. 0 disables the cache.
+    :param refresh_ahead: Seconds before expiry at which the cached secret is refreshed in the background.
+    :param max_stale: Seconds past expiry a cached secret is still served if the refresh fails.
     """
 
-    def __init__(self, region: Optional[str] = os.getenv("DEFAULT_AWS_REGION")) -> None:
-        self.client: SecretsManagerClient = boto3.client(
+    def __init__(
+        self,
+        region: Optional[str] = os.getenv("DEFAULT_AWS_REGION"),
+        cache_ttl: int = int(os.getenv("SECRET_CACHE_TTL", 300)),
+        refresh_ahead: int = int(os.getenv("SECRET_CACHE_REFRESH_AHEAD", 30)),
+        max_stale: int = int(os.getenv("SECRET_CACHE_MAX_STALE", 300)),
+    ) -> None:
+        self.client: SecretsManagerClient = get_client(
             "secretsmanager", region_name=region
         )
+        self.cache: Optional[SecretCache] = (
+            SecretCache(
+                self._fetch_secret_value,
+                ttl=cache_ttl,
+                refresh_ahead=refresh_ahead,
+                max_stale=max_stale,
+            )
+            if cache_ttl > 0
+            else None
+        )
 
     def get_secret_value(
         self,
@@ -32,6 +239,7 @@ class SecretsManager:
     ) -> Optional[bytes]:
         """
         Defines the input parameters for retrieving a secret value from AWS Secrets Manager.
+        Served from the in-memory cache when enabled.
 
         Attributes:
             SecretId (str):
@@ -51,20 +259,36 @@ class SecretsManager:
                 "The 'SecretId' parameter must be provided and cannot be empty."
             )
 
+        if self.cache is None:
+            return self._fetch_secret_value(**kwargs)
+
+        return self.cache.get(**kwargs)
+
+    def _fetch_secret_value(
+        self,
+        **kwargs: GetSecretValueRequestRequestTypeDef,
+    ) -> dict:
+        secret_id = kwargs.get("SecretId")
+
         try:
-            response: dict = self.client.get_secret_value(**kwargs)
+            with timer("secrets_get_secret_value"):
+                response: dict = self.client.get_secret_value(**kwargs)
 
             secret = response.get("SecretString")
 
-            logger.info("secret string retrieval successful")
-            logger.debug(secret)
+            # never log the secret itself - only which version was retrieved
+            logger.info(
+                "secret string retrieval successful (VersionId=%s)",
+                response.get("VersionId"),
+            )
 
             return {
                 "SecretString": (
                     secret.encode("utf-8") if isinstance(secret, str) else secret
-                )
+                ),
+                "VersionId": response.get("VersionId"),
             }
 
         except Exception as e:
-            logger.error(f'{e}  (SecretId="{secret_id}")')
+            logger.error('%s  (SecretId="%s")', e, secret_id)
             raise ValueError(e)
@@ -0,0 +1,144 @@
+import time, threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+def approximate_size(value: Any) -> int:
+    """
+    Cheap estimate of the payload size of a (nested) item in bytes - strings by length, containers recursively.
+    Used to bound caches by bytes without serializing every entry.
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(
+            approximate_size(key) + approximate_size(item)
+            for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(approximate_size(item) for item in value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if value is None or isinstance(value, bool):
+        return 1
+
+    return 8
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache bounded by entry count and (optionally) bytes, with per-entry TTL.
+        :param [Required] max_entries: Maximum number of entries held before the least recently used is evicted.
+        :param [Optional] max_bytes: Maximum total size of the entries, as reported by the `size` passed to put().
+        :param [Optional] ttl: Default seconds an entry is served for. None keeps entries until evicted.
+        :param [Optional] clock: Monotonic clock, replaceable for tests.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0.")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.current_bytes = 0
+        # key -> (value, expires_at, size)
+        self._entries: OrderedDict[Hashable, tuple[Any, Optional[float], int]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+
+        return entry is not None and (entry[1] is None or entry[1] > self.clock())
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, size = entry
+
+            if expires_at is not None and expires_at <= self.clock():
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def put(
+        self, key: Hashable, value: Any, size: int = 0, ttl: Optional[float] = None
+    ) -> None:
+        ttl = self.ttl if ttl is None else ttl
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            # never cache a single entry larger than the whole cache
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+
+            if previous is not None:
+                self.current_bytes -= previous[2]
+
+            expires_at = None if ttl is None else self.clock() + ttl
+            self._entries[key] = (value, expires_at, size)
+            self.current_bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.current_bytes > self.max_bytes
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._remove(key, entry[2])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
+
+    def _remove(self, key: Hashable, size: int) -> None:
+        del self._entries[key]
+        self.current_bytes -= size
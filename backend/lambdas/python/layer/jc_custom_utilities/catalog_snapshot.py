@@ -0,0 +1,341 @@
+"""
+Catalog snapshot file - every item of the metadata table, pre-serialized, in one memory-mappable file:
+
+    MAGIC
+    items     item_0 "," item_1 "," ... item_n-1    compact JSON, in table scan order
+    offsets   uint64[n + 1]                          start of item i - item i ends at offsets[i + 1] - 1
+    listings  uint32[...] per listing                scan positions of a partition, ascending by sort attribute
+    ids       JSON array of the item ids             in scan order
+    footer    JSON - version, item count, section and listing locations
+    uint32    footer length
+    MAGIC
+
+A run of items in scan order is one contiguous slice - a JSON array body without re-serialization. Sections are
+8 byte aligned, so the offset and listing arrays are read in place from the mmap.
+"""
+
+import sys, json, mmap, struct, hashlib, time
+from array import array
+from jc_custom_utilities.functions import serialize_body
+from typing import Any, Iterable, Iterator, Optional
+
+MAGIC = b"JCCATLG1"
+FORMAT_VERSION = 1
+_FOOTER_LENGTH = struct.Struct("<I")
+
+
+def listing_name(partition_attribute: str, value: Any) -> str:
+    """
+    Name of the listing holding the items whose `partition_attribute` equals `value` - e.g. 'genre:drama'.
+    """
+    return f"{partition_attribute}:{value}"
+
+
+class SnapshotWriter:
+    """
+    Streams items into a snapshot file. Items are written as they are added - only their ids and listing keys
+    are held in memory.
+        :param [Required] path: File the snapshot is written to.
+        :param [Optional] partition_attributes: Attributes a listing is kept for, per distinct value - the
+            partition keys of the table's GSIs (e.g. 'genre').
+        :param [Optional] sort_attribute: Sort key of the listings (e.g. 'created_at'). Items without it are left
+            out of the listings, as they are out of a sparse GSI.
+        :param [Optional] id_attribute: Partition key of the table.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        partition_attributes: Iterable[str] = (),
+        sort_attribute: Optional[str] = None,
+        id_attribute: str = "id",
+    ) -> None:
+        self.path = path
+        self.partition_attributes = tuple(partition_attributes)
+        self.sort_attribute = sort_attribute
+        self.id_attribute = id_attribute
+        self.ids: list[str] = []
+        self.offsets = array("Q")
+        # listing name -> [(sort value, id, scan position)]
+        self.listings: dict[str, list[tuple]] = {}
+        self._digest = hashlib.blake2b(digest_size=16)
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._items_offset = self._file.tell()
+
+    def add(self, item: dict) -> None:
+        position = len(self.ids)
+        serialized_item = serialize_body(item)
+
+        if position:
+            self._file.write(b",")
+
+        self.offsets.append(self._file.tell())
+        self._file.write(serialized_item)
+        self._digest.update(serialized_item)
+
+        item_id = item[self.id_attribute]
+        self.ids.append(item_id)
+
+        sort_value = item.get(self.sort_attribute) if self.sort_attribute else None
+        if self.sort_attribute and sort_value is None:
+            return
+
+        for attribute in self.partition_attributes:
+            if item.get(attribute) is not None:
+                self.listings.setdefault(
+                    listing_name(attribute, item[attribute]), []
+                ).append((sort_value, item_id, position))
+
+    def close(self) -> dict:
+        """
+        Writes the index sections and the footer. Returns the footer - its `version` is a digest of the items, so
+        an unchanged table produces the same version.
+        """
+        items_end = self._file.tell()
+        # the end of the last item, as if it were followed by a separator
+        self.offsets.append(items_end + 1)
+
+        sections = {"items": [self._items_offset, items_end - self._items_offset]}
+        sections["offsets"] = self._write_section(self.offsets.tobytes())
+
+        listings = {}
+        for name, entries in self.listings.items():
+            entries.sort(key=lambda entry: entry[:2])
+            positions = array("I", (position for _, _, position in entries))
+            offset, length = self._write_section(positions.tobytes())
+            listings[name] = [offset, len(positions)]
+
+        sections["ids"] = self._write_section(
+            json.dumps(self.ids, separators=(",", ":")).encode("utf-8")
+        )
+
+        footer = {
+            "format": FORMAT_VERSION,
+            "version": self._digest.hexdigest(),
+            "created_at": int(time.time()),
+            "item_count": len(self.ids),
+            "byteorder": sys.byteorder,
+            "id_attribute": self.id_attribute,
+            "sort_attribute": self.sort_attribute,
+            "sections": sections,
+            "listings": listings,
+        }
+        serialized_footer = json.dumps(footer, separators=(",", ":")).encode("utf-8")
+
+        self._file.write(serialized_footer)
+        self._file.write(_FOOTER_LENGTH.pack(len(serialized_footer)))
+        self._file.write(MAGIC)
+        self._file.close()
+
+        return footer
+
+    def _write_section(self, data: bytes) -> list[int]:
+        # align every section to 8 bytes, so the arrays can be cast in place
+        padding = -self._file.tell() % 8
+        self._file.write(b"\0" * padding)
+
+        offset = self._file.tell()
+        self._file.write(data)
+
+        return [offset, len(data)]
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of a snapshot file through mmap - pages are sliced from the mapped file, so only the pages
+    actually read are paged in.
+        :param [Required] path: Snapshot file written by SnapshotWriter.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.footer = self._read_footer()
+        except Exception:
+            self._file.close()
+            raise
+
+        self.version: str = self.footer["version"]
+        self.item_count: int = self.footer["item_count"]
+        self.id_attribute: str = self.footer["id_attribute"]
+        self.sort_attribute: Optional[str] = self.footer["sort_attribute"]
+
+        view = memoryview(self._mmap)
+        offset, length = self.footer["sections"]["offsets"]
+        self._offsets = view[offset : offset + length].cast("Q")
+        self._listings = {
+            name: view[offset : offset + count * 4].cast("I")
+            for name, (offset, count) in self.footer["listings"].items()
+        }
+
+        offset, length = self.footer["sections"]["ids"]
+        self.ids: list[str] = json.loads(self._mmap[offset : offset + length])
+        self.positions = {
+            item_id: position for position, item_id in enumerate(self.ids)
+        }
+        # listing name -> {scan position: position in the listing}, built on the first cursor into the listing
+        self._listing_positions: dict[str, dict[int, int]] = {}
+
+    def _read_footer(self) -> dict:
+        trailer_length = _FOOTER_LENGTH.size + len(MAGIC)
+
+        if (
+            len(self._mmap) < len(MAGIC) + trailer_length
+            or self._mmap[: len(MAGIC)] != MAGIC
+            or self._mmap[-len(MAGIC) :] != MAGIC
+        ):
+            raise ValueError(f"{self.path} is not a catalog snapshot.")
+
+        (footer_length,) = _FOOTER_LENGTH.unpack(
+            self._mmap[-trailer_length : -len(MAGIC)]
+        )
+        footer_end = len(self._mmap) - trailer_length
+        footer = json.loads(self._mmap[footer_end - footer_length : footer_end])
+
+        if footer.get("format") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported catalog snapshot format {footer.get('format')}."
+            )
+        if footer.get("byteorder") != sys.byteorder:
+            raise ValueError(
+                "Catalog snapshot was written with a different byte order."
+            )
+
+        return footer
+
+    def close(self) -> None:
+        # the casted views have to be released before the mmap can be closed
+        self._offsets.release()
+        for positions in self._listings.values():
+            positions.release()
+        self._listings = {}
+        self._mmap.close()
+        self._file.close()
+
+    def _item_slice(self, position: int) -> bytes:
+        return self._mmap[self._offsets[position] : self._offsets[position + 1] - 1]
+
+    def get_item(self, item_id: str) -> Optional[bytes]:
+        """
+        Returns the serialized item with the id, or None when it is not in the snapshot.
+        """
+        position = self.positions.get(item_id)
+
+        if position is None:
+            return None
+
+        return self._item_slice(position)
+
+    def iter_items(self, page_size: int = 1000) -> Iterator[dict]:
+        """
+        Lazily yields every item, parsed, in scan order - one page of `page_size` items is parsed at a time.
+        """
+        start_id = None
+
+        while True:
+            items_json, _, last_key = self.read_page(
+                page_size, exclusive_start_id=start_id
+            )
+            yield from json.loads(items_json)
+
+            if last_key is None:
+                return
+
+            start_id = last_key[self.id_attribute]
+
+    def has_listing(self, name: str) -> bool:
+        return name in self._listings
+
+    def read_page(
+        self,
+        limit: int,
+        listing: Optional[str] = None,
+        exclusive_start_id: Optional[str] = None,
+        forward: bool = True,
+    ) -> tuple[bytes, int, Optional[dict]]:
+        """
+        Returns one page as (serialized JSON array of the items, item count, LastEvaluatedKey). The key has the
+        shape DynamoDB returns for the same page, so cursors work against the snapshot and the table alike.
+        Raises KeyError when exclusive_start_id is not part of the listing.
+            :param [Required] limit: Maximum number of items of the page.
+            :param [Optional] listing: listing_name() of a partition - None pages through the whole table in scan
+                order. An unknown listing is empty.
+            :param [Optional] exclusive_start_id: Id of the last item of the previous page.
+            :param [Optional] forward: Ascending by sort attribute (ScanIndexForward). Listings only.
+        """
+        if listing is None:
+            start = (
+                0
+                if exclusive_start_id is None
+                else self.positions[exclusive_start_id] + 1
+            )
+            end = min(start + limit, self.item_count)
+
+            if start >= end:
+                return b"[]", 0, None
+
+            items_json = (
+                b"[" + self._mmap[self._offsets[start] : self._offsets[end] - 1] + b"]"
+            )
+            last_key = (
+                {self.id_attribute: self.ids[end - 1]}
+                if end < self.item_count
+                else None
+            )
+
+            return items_json, end - start, last_key
+
+        positions = self._listings.get(listing)
+
+        if positions is None:
+            if exclusive_start_id is not None:
+                raise KeyError(exclusive_start_id)
+            return b"[]", 0, None
+
+        count = len(positions)
+        start = 0
+
+        if exclusive_start_id is not None:
+            listing_position = self._listing_position(listing)[
+                self.positions[exclusive_start_id]
+            ]
+            start = listing_position + 1 if forward else count - listing_position
+
+        end = min(start + limit, count)
+        page_positions = [
+            positions[index] if forward else positions[count - 1 - index]
+            for index in range(start, end)
+        ]
+        items_json = b"[" + b",".join(map(self._item_slice, page_positions)) + b"]"
+
+        last_key = None
+        if page_positions and end < count:
+            last_key = self._listing_key(listing, page_positions[-1])
+
+        return items_json, len(page_positions), last_key
+
+    def _listing_position(self, listing: str) -> dict[int, int]:
+        listing_positions = self._listing_positions.get(listing)
+
+        if listing_positions is None:
+            listing_positions = self._listing_positions[listing] = {
+                position: index
+                for index, position in enumerate(self._listings[listing])
+            }
+
+        return listing_positions
+
+    def _listing_key(self, listing: str, position: int) -> dict:
+        # LastEvaluatedKey of a GSI query - the table key plus the index keys
+        partition_attribute = listing.split(":", 1)[0]
+        item = json.loads(self._item_slice(position))
+        attributes = [self.id_attribute, partition_attribute]
+
+        if self.sort_attribute:
+            attributes.append(self.sort_attribute)
+
+        return {attribute: item[attribute] for attribute in attributes}
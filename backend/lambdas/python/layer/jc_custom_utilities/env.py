@@ -0,0 +1,32 @@
+import os
+
+# set once the .env file has been loaded (or skipped) for the process
+_env_loaded = False
+
+
+def running_in_lambda() -> bool:
+    """
+    True inside the Lambda runtime, which always sets AWS_LAMBDA_FUNCTION_NAME.
+    """
+    return "AWS_LAMBDA_FUNCTION_NAME" in os.environ
+
+
+def load_env() -> None:
+    """
+    Loads the .env file into os.environ once per process. Skipped inside Lambda - functions are configured
+    through their environment there, so python-dotenv is never imported on a cold start.
+    Safe to call from every module: calls after the first are a no-op.
+    """
+    global _env_loaded
+
+    if _env_loaded:
+        return
+
+    _env_loaded = True
+
+    if running_in_lambda():
+        return
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
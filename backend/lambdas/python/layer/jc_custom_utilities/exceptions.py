@@ -4,3 +4,11 @@ class InvalidSignedUrlError(Exception):
     def __init__(self, message="The pre-signed url is invalid"):
         self.message = message
         super().__init__(self.message)
+
+
+class SearchIndexNotReadyError(Exception):
+    """Exception raised when the search index of the container is not built yet."""
+
+    def __init__(self, message="Search is not available yet. Please retry."):
+        self.message = message
+        super().__init__(self.message)
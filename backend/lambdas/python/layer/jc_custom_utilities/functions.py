@@ -1,9 +1,254 @@
-import json
+import os, json, base64, binascii, gzip, hashlib
+from decimal import Decimal
+from typing import Any, Optional
 
+# faster backends - orjson is pinned in requirements.txt and installed in the layer, brotli is optional. Both fall
+# back to the standard library when missing (e.g. a local environment without them)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def generate_api_response(status_code: int, body: dict) -> dict:
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# bodies smaller than this are never compressed - 0 (default) disables compression. A compressed body is sent
+# base64 encoded, which API Gateway (REST) only decodes for the client once the API's binaryMediaTypes include
+# the response's media type (e.g. '*/*') - enable it only after configuring them
+COMPRESSION_THRESHOLD_BYTES = int(os.getenv("RESPONSE_COMPRESSION_THRESHOLD") or 0)
+
+
+def json_default(value: Any) -> Any:
+    """
+    Serializes the non-JSON types found in DynamoDB items - Decimal, sets and bytes.
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def serialize_body(body: Any) -> bytes:
+    """
+    Serializes a response body to compact JSON bytes, with orjson when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(body, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(body, default=json_default, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_content_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Returns the best supported content encoding ('br' or 'gzip') allowed by an Accept-Encoding header.
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+
+    for token in accept_encoding.lower().split(","):
+        coding, _, params = token.strip().partition(";")
+        quality = 1.0
+
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+
+        accepted[coding.strip()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [
+        (accepted.get(coding, accepted.get("*", 0.0)), -index, coding)
+        for index, coding in enumerate(supported)
+    ]
+    quality, _, coding = max(candidates)
+
+    return coding if quality > 0 else None
+
+
+def compress_body(data: bytes, content_encoding: str) -> bytes:
+    if content_encoding == "br":
+        return brotli.compress(data, quality=4)
+
+    return gzip.compress(data, compresslevel=5)
+
+
+def generate_api_response(
+    status_code: int,
+    body: dict,
+    headers: Optional[dict] = None,
+    multi_value_headers: Optional[dict] = None,
+    accept_encoding: Optional[str] = None,
+) -> dict:
+    """
+    Formats an API Gateway proxy response.
+        :param [Required] status_code: HTTP status code of the response.
+        :param [Required] body: JSON serializable response body. Decimal, sets and bytes are supported.
+            A top-level bytes body is treated as already serialized JSON (see serialize_body).
+        :param [Optional] headers: Additional response headers.
+        :param [Optional] multi_value_headers: Headers sent multiple times, e.g. {"Set-Cookie": [...]}.
+        :param [Optional] accept_encoding: Accept-Encoding header of the request. When
+            RESPONSE_COMPRESSION_THRESHOLD is set, bodies of at least that many bytes are then gzip/brotli
+            compressed and base64 encoded (requires binary media types to be enabled on the API).
+    """
+    serialized_body = body if isinstance(body, bytes) else serialize_body(body)
+    response_headers = {"Content-Type": "application/json", **(headers or {})}
+    response = {"statusCode": status_code, "headers": response_headers}
+
+    content_encoding = (
+        negotiate_content_encoding(accept_encoding)
+        if COMPRESSION_THRESHOLD_BYTES > 0
+        and len(serialized_body) >= COMPRESSION_THRESHOLD_BYTES
+        else None
+    )
+
+    if content_encoding:
+        response_headers["Content-Encoding"] = content_encoding
+        response_headers["Vary"] = "Accept-Encoding"
+        response["body"] = base64.b64encode(
+            compress_body(serialized_body, content_encoding)
+        ).decode("ascii")
+        response["isBase64Encoded"] = True
+    else:
+        response["body"] = serialized_body.decode("utf-8")
+
+    if multi_value_headers:
+        response["multiValueHeaders"] = multi_value_headers
+
+    return response
+
+
+def compute_etag(serialized_body: bytes) -> str:
+    """
+    Returns a weak ETag derived from the serialized response body. Weak, since the same entity may be sent
+    with different content encodings.
+    """
+    return f'W/"{hashlib.blake2b(serialized_body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match request header against an ETag.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag.removeprefix("W/")
+
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def generate_not_modified_response(headers: Optional[dict] = None) -> dict:
+    """
+    Formats a bodyless 304 Not Modified API Gateway proxy response.
+    """
     return {
-        "statusCode": status_code,
-        "headers": {"Content-Type": "application/json"},
-        "body": json.dumps(body),
+        "statusCode": 304,
+        "headers": {**(headers or {})},
+        "body": "",
     }
+
+
+def get_header(event: dict, name: str) -> Optional[str]:
+    """
+    Case-insensitive lookup of a request header of an API Gateway proxy event.
+    """
+    headers: dict = event.get("headers") or {}
+    name = name.lower()
+
+    for header, value in headers.items():
+        if header.lower() == name:
+            return value
+
+    return None
+
+
+def parse_request_body(event: dict) -> dict:
+    """
+    Returns the request body of an API Gateway proxy event as a dict. Raises ValueError for a non-JSON body.
+    """
+    body = event.get("body")
+
+    if not body:
+        return {}
+
+    if isinstance(body, dict):
+        return body
+
+    try:
+        parsed_body = json.loads(body)
+
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Request body is not valid JSON - {e}")
+
+    if not isinstance(parsed_body, dict):
+        raise ValueError("Request body must be a JSON object.")
+
+    return parsed_body
+
+
+def _encode_cursor_value(value):
+    # DynamoDB number keys are Decimal - tagged so they decode back to Decimal
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+
+    raise TypeError(f"Object of type {type(value).__name__} is not cursor serializable")
+
+
+def _decode_cursor_value(value: dict):
+    if len(value) == 1 and "__decimal__" in value:
+        return Decimal(value["__decimal__"])
+
+    return value
+
+
+def encode_cursor(last_evaluated_key: Optional[dict]) -> Optional[str]:
+    """
+    Encodes a DynamoDB LastEvaluatedKey into a compact, opaque, URL-safe pagination cursor.
+    Returns None when there is no next page.
+    """
+    if not last_evaluated_key:
+        return None
+
+    serialized = json.dumps(
+        last_evaluated_key, separators=(",", ":"), default=_encode_cursor_value
+    )
+
+    return (
+        base64.urlsafe_b64encode(serialized.encode("utf-8"))
+        .rstrip(b"=")
+        .decode("ascii")
+    )
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decodes a cursor created by encode_cursor back into an ExclusiveStartKey. Raises ValueError for an invalid cursor.
+    """
+    try:
+        padded_cursor = cursor + "=" * (-len(cursor) % 4)
+        serialized = base64.urlsafe_b64decode(padded_cursor.encode("ascii"))
+        exclusive_start_key = json.loads(serialized, object_hook=_decode_cursor_value)
+
+    except (UnicodeError, binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid cursor - {e}")
+
+    if not isinstance(exclusive_start_key, dict) or not exclusive_start_key:
+        raise ValueError("Invalid cursor.")
+
+    return exclusive_start_key
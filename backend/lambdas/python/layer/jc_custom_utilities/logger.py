@@ -1,14 +1,24 @@
-import os, json
+import os, json, time, random, functools
 import logging
 from logging import Logger
-from dotenv import load_dotenv
+from jc_custom_utilities.env import load_env, running_in_lambda
+from typing import Any, Callable, Optional
 
 # Load env variable
-load_dotenv()
+load_env()
 
 log_level = os.getenv("LOG_LEVEL", "INFO").upper()
 level_val = getattr(logging, log_level, logging.INFO)
 
+# "json": one json object per line (default inside Lambda) - "text": the multi-line format below (default locally)
+log_format = os.getenv("LOG_FORMAT", "json" if running_in_lambda() else "text").lower()
+
+# share of invocations logged at DEBUG level, 0 disables sampling
+debug_sample_rate = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 0))
+
+# messages and payloads longer than this many characters are truncated
+max_payload_bytes = int(os.getenv("LOG_MAX_PAYLOAD_BYTES", 8192))
+
 # Set up the logging configuration with the desired format
 config = {
     "level": level_val,
@@ -17,10 +27,22 @@ config = {
     "handlers": [logging.StreamHandler()],  # Also logs to console
 }
 
+# loggers created by logger_config - their level follows the debug sampling of the current invocation
+_configured_loggers: dict[str, Logger] = {}
+
+# request id, function name and cold start flag of the invocation being handled - added to every json record
+invocation_context: dict[str, Any] = {}
+_cold_start = True
+
+# attributes every LogRecord has - anything else was passed through `extra=` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
 
 def logger_config(name: str) -> Logger:
     logger = logging.getLogger(name)
     logger.setLevel(level_val)
+    # records are handled here only - the Lambda runtime's root handler would write them a second time
+    logger.propagate = False
 
     # Clear any existing handlers to avoid duplicates
     if logger.hasHandlers():
@@ -28,20 +50,128 @@ def logger_config(name: str) -> Logger:
 
     # Create a stream handler (console)
     stream_handler = logging.StreamHandler()
-    # Apply the CustomFormatter with your existing format
-    formatter = CustomFormatter(config["format"])
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        # Apply the CustomFormatter with your existing format
+        formatter = CustomFormatter(config["format"])
     stream_handler.setFormatter(formatter)
     logger.addHandler(stream_handler)
 
+    _configured_loggers[name] = logger
+
     return logger
 
 
+def truncate(text: str, limit: Optional[int] = None) -> str:
+    limit = max_payload_bytes if limit is None else limit
+
+    if limit <= 0 or len(text) <= limit:
+        return text
+
+    return f"{text[:limit]}...(truncated {len(text) - limit} chars)"
+
+
+def is_truncated(text: str) -> bool:
+    return 0 < max_payload_bytes < len(text)
+
+
+def format_payload(payload: Any, indent: Optional[int] = None) -> str:
+    return truncate(json.dumps(payload, indent=indent, default=str))
+
+
+def start_invocation(event: Optional[dict] = None, context: Any = None) -> None:
+    """
+    Sets the invocation context logged with every json record and decides whether this invocation is logged at
+    DEBUG level (LOG_DEBUG_SAMPLE_RATE). Called at the start of every handler invocation.
+    """
+    global _cold_start
+
+    request_id = getattr(context, "aws_request_id", None) or (
+        (event or {}).get("requestContext") or {}
+    ).get("requestId")
+
+    invocation_context.clear()
+    invocation_context["request_id"] = request_id
+    invocation_context["function_name"] = getattr(
+        context, "function_name", None
+    ) or os.getenv("AWS_LAMBDA_FUNCTION_NAME")
+    invocation_context["cold_start"] = _cold_start
+    _cold_start = False
+
+    sampled = debug_sample_rate > 0 and random.random() < debug_sample_rate
+    invocation_context["debug_sampled"] = sampled
+    set_log_level(logging.DEBUG if sampled else level_val)
+
+
+def set_log_level(level: int) -> None:
+    for logger in _configured_loggers.values():
+        if logger.level != level:
+            logger.setLevel(level)
+
+
+def inject_invocation_context(handler: Callable) -> Callable:
+    """
+    Decorator for Lambda handlers - calls start_invocation() with the handler's event and context.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event: dict, context: Any = None, *args, **kwargs):
+        start_invocation(event, context)
+
+        return handler(event, context, *args, **kwargs)
+
+    return wrapper
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One json object per record: timestamp, level, logger, location, message, the invocation context and any
+    `extra=` fields. dict/list messages are logged as a `payload` field. The message is only built (from the
+    %-style arguments) once the record passed the level check.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+        }
+
+        if isinstance(record.msg, (dict, list)):
+            payload = format_payload(record.msg)
+            entry["message"] = ""
+            # kept as an object while it is whole, so its fields stay queryable
+            entry["payload"] = record.msg if not is_truncated(payload) else payload
+        else:
+            entry["message"] = truncate(record.getMessage())
+
+        entry.update(invocation_context)
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+
+        if record.exc_info:
+            entry["exception"] = truncate(self.formatException(record.exc_info))
+
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
 class CustomFormatter(logging.Formatter):
     def format(self, record):
         # Check if the message is a dictionary or list
         if isinstance(record.msg, (dict, list)):
-            # Convert it to a JSON string with indentation
-            record.msg = json.dumps(record.msg, indent=4)
+            # Convert it to an indented json string - on a copy, so other handlers still get the original
+            record = logging.makeLogRecord(
+                {**vars(record), "msg": format_payload(record.msg, indent=4)}
+            )
+        else:
+            record = logging.makeLogRecord(
+                {**vars(record), "msg": truncate(record.getMessage()), "args": None}
+            )
 
         # Use the base Formatter to format everything else
         return super().format(record)
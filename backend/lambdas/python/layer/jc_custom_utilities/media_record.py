@@ -0,0 +1,117 @@
+import sys
+from decimal import Decimal
+from jc_custom_utilities.functions import json_default
+from typing import Any
+
+# attributes of a media item held in slots - any other attribute is kept in the record's extra dict
+FIELDS = (
+    "id",
+    "title",
+    "description",
+    "genre",
+    "catalog",
+    "s3_key",
+    "thumbnail",
+    "tags",
+    "duration",
+    "rating",
+    "created_at",
+)
+_FIELD_NAMES = frozenset(FIELDS)
+
+# attributes whose values repeat across the catalog - every record shares one string object per distinct value
+INTERNED_FIELDS = frozenset(("genre", "catalog", "tags"))
+
+# distinct attribute orders of the records - shared, so a record keeps the order of its item for 8 bytes
+MAX_LAYOUTS = 1024
+_layouts: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+def _layout(names: tuple[str, ...]) -> tuple[str, ...]:
+    layout = _layouts.get(names)
+
+    if layout is None:
+        if len(_layouts) >= MAX_LAYOUTS:
+            return names
+        layout = _layouts.setdefault(names, names)
+
+    return layout
+
+
+def _compact(name: str, value: Any) -> Any:
+    if isinstance(value, Decimal):
+        # the JSON value of the Decimal - int, or float when it has a fraction
+        return json_default(value)
+
+    if name in INTERNED_FIELDS:
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, list):
+            return tuple(
+                sys.intern(element) if isinstance(element, str) else element
+                for element in value
+            )
+
+    return value
+
+
+class MediaRecord:
+    """
+    Compact in-memory form of a metadata item, for caches holding a large share of the catalog:
+
+        - attributes in __slots__ instead of a per-item dict - attributes the item lacks are left unset
+        - genre, catalog and tags values interned, tags as a tuple
+        - Decimal numbers (resource backend) as int/float - the same JSON as serialize_body writes for them
+        - the item's attribute order as a shared tuple
+
+    Converted from an item with from_item() and back on demand with to_item(), which returns an equal item with
+    the same attribute order - its serialized JSON is byte for byte that of the original item. Single attributes
+    are read with get()/[] without building the dict.
+    """
+
+    __slots__ = FIELDS + ("_layout", "_extra")
+
+    @classmethod
+    def from_item(cls, item: dict) -> "MediaRecord":
+        record = cls.__new__(cls)
+        extra = None
+
+        for name, value in item.items():
+            if name in _FIELD_NAMES:
+                setattr(record, name, _compact(name, value))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[name] = value
+
+        record._layout = _layout(tuple(item))
+        record._extra = extra
+
+        return record
+
+    def to_item(self) -> dict:
+        return {name: self[name] for name in self._layout}
+
+    def __getitem__(self, name: str) -> Any:
+        if self._extra is not None and name in self._extra:
+            return self._extra[name]
+
+        if name not in _FIELD_NAMES:
+            raise KeyError(name)
+
+        try:
+            value = getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+        # tags were a list in the item
+        return list(value) if type(value) is tuple else value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._layout
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self[name] if name in self._layout else default
+
+    def __repr__(self) -> str:
+        return f"MediaRecord({self.to_item()!r})"
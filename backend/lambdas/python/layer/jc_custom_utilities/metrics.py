@@ -0,0 +1,217 @@
+import os, sys, json, time, threading, functools
+from jc_custom_utilities.env import load_env
+from typing import Any, Callable, Optional
+
+# Load env variable
+load_env()
+
+# CloudWatch namespace the metrics are published under
+namespace = os.getenv("METRICS_NAMESPACE", "JCMediaStreaming")
+
+# "false" turns every timer and counter into a no-op and skips the flush
+enabled = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# CloudWatch accepts at most 100 values per metric in one EMF document
+MAX_VALUES_PER_METRIC = 100
+
+_cold_start = True
+
+
+def _write_stdout(line: str) -> None:
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+class Metrics:
+    """
+    Stage durations (ms), counters and properties of the invocation being handled. flush() writes them as one
+    CloudWatch Embedded Metric Format line - Lambda ships stdout to CloudWatch Logs, which extracts the metrics
+    without any API call.
+
+    :param namespace: [Optional] CloudWatch namespace. Defaults to METRICS_NAMESPACE.
+    :param emit: [Optional] Called with the EMF line on flush. Defaults to writing to stdout.
+    """
+
+    def __init__(
+        self, namespace: str = namespace, emit: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        self.namespace = namespace
+        self.emit = emit or _write_stdout
+        self.timings: dict[str, list[float]] = {}
+        self.counters: dict[str, float] = {}
+        self.dimensions: dict[str, str] = {}
+        self.properties: dict[str, Any] = {}
+        # stages may be timed from worker threads
+        self._lock = threading.Lock()
+
+    def record_timing(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            values = self.timings.setdefault(name, [])
+
+            if len(values) < MAX_VALUES_PER_METRIC:
+                values.append(round(duration_ms, 3))
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_dimension(self, name: str, value: str) -> None:
+        self.dimensions[name] = value
+
+    def set_property(self, name: str, value: Any) -> None:
+        self.properties[name] = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timings = {}
+            self.counters = {}
+            self.dimensions = {}
+            self.properties = {}
+
+    def serialize(self) -> Optional[str]:
+        """
+        Returns the EMF document of the recorded metrics, or None when nothing was recorded.
+        """
+        if not self.timings and not self.counters:
+            return None
+
+        definitions = [
+            {"Name": name, "Unit": "Milliseconds"} for name in self.timings
+        ] + [{"Name": name, "Unit": "Count"} for name in self.counters]
+
+        document = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [list(self.dimensions)],
+                        "Metrics": definitions,
+                    }
+                ],
+            },
+            **self.properties,
+            **self.dimensions,
+            **{
+                name: values[0] if len(values) == 1 else values
+                for name, values in self.timings.items()
+            },
+            **self.counters,
+        }
+
+        return json.dumps(document, separators=(",", ":"), default=str)
+
+    def flush(self) -> Optional[str]:
+        """
+        Emits the recorded metrics as one EMF line and clears them. Returns the line.
+        """
+        line = self.serialize()
+
+        if line is not None:
+            self.emit(line)
+
+        self.reset()
+
+        return line
+
+
+# the metrics of the current invocation - recorded by the layer helpers, flushed by the @log_metrics handler
+metrics = Metrics()
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        metrics.record_timing(self.name, (time.perf_counter() - self.start) * 1000)
+
+    def __call__(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(self.name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def __call__(self, func: Callable) -> Callable:
+        return func
+
+
+_null_timer = _NullTimer()
+
+
+def timer(name: str):
+    """
+    Records the duration of a block (context manager) or of every call of a function (decorator) in ms.
+
+        with timer("ddb_get_item"):
+            ...
+
+        @timer("parse_private_key")
+        def load_private_key(...):
+    """
+    if not enabled:
+        return _null_timer
+
+    return _Timer(name)
+
+
+def increment(name: str, value: float = 1) -> None:
+    if enabled:
+        metrics.increment(name, value)
+
+
+def log_metrics(handler: Callable) -> Callable:
+    """
+    Decorator for Lambda handlers - starts a clean set of metrics, records the cold start and the handler
+    duration and flushes everything as one EMF line once the handler returned (or raised).
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event: dict, context: Any = None, *args, **kwargs):
+        global _cold_start
+
+        if not enabled:
+            return handler(event, context, *args, **kwargs)
+
+        metrics.reset()
+        metrics.set_dimension(
+            "function_name",
+            getattr(context, "function_name", None)
+            or os.getenv("AWS_LAMBDA_FUNCTION_NAME")
+            or handler.__module__,
+        )
+        request_id = getattr(context, "aws_request_id", None)
+        if request_id:
+            metrics.set_property("request_id", request_id)
+        metrics.increment("cold_start", 1 if _cold_start else 0)
+        _cold_start = False
+
+        start = time.perf_counter()
+        try:
+            return handler(event, context, *args, **kwargs)
+
+        finally:
+            metrics.record_timing(
+                "handler_duration", (time.perf_counter() - start) * 1000
+            )
+            metrics.flush()
+
+    return wrapper
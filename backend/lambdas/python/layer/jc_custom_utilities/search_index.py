@@ -0,0 +1,362 @@
+import re, math, zlib, threading, unicodedata
+from bisect import bisect_left
+from itertools import islice
+from typing import Any, Iterable, Optional
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# attribute -> weight of one of its terms in the score of an item
+DEFAULT_FIELDS = {"title": 3.0, "tags": 1.5, "genre": 1.0}
+
+# a query word matching the start of a term (e.g. 'star' -> 'stars') scores this share of an exact match
+PREFIX_WEIGHT = 0.5
+
+
+def tokenize(value: Any) -> list[str]:
+    """
+    Lowercased, accent-free words of a string, or of every string of a list - 'Amélie (2001)' -> ['amelie', '2001'].
+    """
+    if value is None:
+        return []
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [token for element in value for token in tokenize(element)]
+
+    text = unicodedata.normalize("NFKD", str(value).casefold())
+
+    if not text.isascii():
+        text = "".join(char for char in text if not unicodedata.combining(char))
+
+    return TOKEN_PATTERN.findall(text)
+
+
+class SearchIndex:
+    """
+    Thread-safe in-memory inverted index of catalog items, answering ranked term and prefix queries.
+
+    Every query word must match a term of the item - exactly, or as the start of a term when it is at least
+    `min_prefix_length` long. Items are ranked by the field weights of their matching terms, weighted by how rare
+    the term is (idf). Equal scores are ordered by a checksum of the id - the same order in every container, so
+    offset pagination is stable across containers, and cheaper to sort than the ids themselves. Items are indexed through upsert()/sync(), which only re-index changed items.
+        :param [Optional] fields: Attribute -> weight of the attributes searched (e.g. title, tags, genre).
+        :param [Optional] filter_attributes: Attributes search() can filter on by equality (e.g. genre).
+        :param [Optional] id_attribute: Attribute identifying an item.
+        :param [Optional] min_prefix_length: Shortest query word matched as a prefix - shorter words match exactly.
+        :param [Optional] max_prefix_terms: Most terms a query word expands to as a prefix, in term order.
+        :param [Optional] word_cache_size: Query words whose ranked matches are kept until the index changes - a
+            repeated word (e.g. a common one, matching much of the catalog) is answered without re-scoring.
+    """
+
+    def __init__(
+        self,
+        fields: Optional[dict[str, float]] = None,
+        filter_attributes: Iterable[str] = ("genre",),
+        id_attribute: str = "id",
+        min_prefix_length: int = 2,
+        max_prefix_terms: int = 64,
+        word_cache_size: int = 256,
+    ) -> None:
+        self.fields = dict(fields or DEFAULT_FIELDS)
+        self.filter_attributes = tuple(filter_attributes)
+        self.id_attribute = id_attribute
+        self.min_prefix_length = min_prefix_length
+        self.max_prefix_terms = max_prefix_terms
+        self.word_cache_size = word_cache_size
+        # incremented by every change, so results can be cached per generation
+        self.generation = 0
+        # documents are numbered - numbers of removed items are reused
+        self._doc_numbers: dict[str, int] = {}
+        self._doc_ids: list[Optional[str]] = []
+        self._doc_order: list[int] = []
+        self._doc_terms: list[Optional[dict[str, float]]] = []
+        self._doc_filters: list[Optional[tuple]] = []
+        self._free_doc_numbers: list[int] = []
+        # term -> {document: weight}
+        self._postings: dict[str, dict[int, float]] = {}
+        # (attribute, value) -> documents
+        self._filters: dict[tuple[str, Any], set[int]] = {}
+        # sorted terms for prefix lookups - rebuilt on the first search after terms were added or removed
+        self._terms: list[str] = []
+        self._terms_stale = False
+        # query word -> [scores of its matches, matches best first - ranked on the first single word query]
+        self._word_cache: dict[str, list] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_numbers)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._doc_numbers
+
+    def upsert(self, item: dict) -> bool:
+        """
+        Indexes an item, replacing its previous version. Returns False when its searched attributes are unchanged.
+        """
+        item_id = item[self.id_attribute]
+        terms = self._weigh(item)
+        filters = tuple(
+            (attribute, item[attribute])
+            for attribute in self.filter_attributes
+            if isinstance(item.get(attribute), (str, int, float))
+        )
+
+        with self._lock:
+            doc = self._doc_numbers.get(item_id)
+
+            if doc is not None:
+                if self._doc_terms[doc] == terms and self._doc_filters[doc] == filters:
+                    return False
+                self._unindex(doc)
+
+            elif self._free_doc_numbers:
+                doc = self._free_doc_numbers.pop()
+
+            else:
+                doc = len(self._doc_ids)
+                self._doc_ids.append(None)
+                self._doc_order.append(0)
+                self._doc_terms.append(None)
+                self._doc_filters.append(None)
+
+            self._doc_numbers[item_id] = doc
+            self._doc_ids[doc] = item_id
+            self._doc_order[doc] = zlib.crc32(item_id.encode("utf-8"))
+            self._doc_terms[doc] = terms
+            self._doc_filters[doc] = filters
+
+            for term, weight in terms.items():
+                postings = self._postings.get(term)
+
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._terms_stale = True
+
+                postings[doc] = weight
+
+            for key in filters:
+                self._filters.setdefault(key, set()).add(doc)
+
+            self.generation += 1
+            self._word_cache.clear()
+
+        return True
+
+    def remove(self, item_id: str) -> bool:
+        with self._lock:
+            doc = self._doc_numbers.pop(item_id, None)
+
+            if doc is None:
+                return False
+
+            self._unindex(doc)
+            self._doc_ids[doc] = None
+            self._doc_terms[doc] = None
+            self._doc_filters[doc] = None
+            self._free_doc_numbers.append(doc)
+            self.generation += 1
+            self._word_cache.clear()
+
+        return True
+
+    def sync(self, items: Iterable[dict]) -> tuple[int, int]:
+        """
+        Makes the index match a full listing of the catalog - changed items are re-indexed, items missing from
+        the listing removed. Returns (indexed, removed) counts.
+        """
+        seen: set[str] = set()
+        indexed = 0
+
+        for item in items:
+            seen.add(item[self.id_attribute])
+            indexed += self.upsert(item)
+
+        with self._lock:
+            removed_ids = [
+                item_id for item_id in self._doc_numbers if item_id not in seen
+            ]
+
+            for item_id in removed_ids:
+                self.remove(item_id)
+
+        return indexed, len(removed_ids)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        filters: Optional[dict[str, Any]] = None,
+    ) -> tuple[list[str], int]:
+        """
+        Returns the ids of one page of matching items, best match first, and the total number of matches.
+            :param [Required] query: Words to search for - all of them must match.
+            :param [Required] limit: Maximum number of ids returned.
+            :param [Optional] offset: Number of best matches skipped - the position of the page.
+            :param [Optional] filters: Attribute -> value the items must have, for filter_attributes.
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+
+        if not words:
+            return [], 0
+
+        needed = offset + limit
+
+        with self._lock:
+            if self._terms_stale:
+                self._terms = sorted(self._postings)
+                self._terms_stale = False
+
+            documents = None
+            if filters:
+                filtered = [
+                    self._filters.get((attribute, value), set())
+                    for attribute, value in filters.items()
+                ]
+                documents = filtered[0].intersection(*filtered[1:])
+
+            # the rarest word selects the candidates, the others are only looked up
+            word_entries = sorted(
+                (self._word_entry(word) for word in words),
+                key=lambda entry: len(entry[0]),
+            )
+            scores = word_entries[0][0]
+
+            if len(word_entries) == 1 and self.word_cache_size > 0:
+                entry = word_entries[0]
+                if entry[1] is None:
+                    entry[1] = self._rank(scores)
+                ranked = entry[1]
+
+                if documents is None:
+                    return self._ids(ranked[offset:needed]), len(ranked)
+
+                page = islice(
+                    (doc for doc in ranked if doc in documents), offset, needed
+                )
+                return self._ids(page), len(scores.keys() & documents)
+
+            if len(word_entries) > 1:
+                other_scores = [entry[0] for entry in word_entries[1:]]
+                matching = scores.keys()
+                for word_scores in other_scores:
+                    matching = matching & word_scores.keys()
+
+                scores = {
+                    doc: scores[doc]
+                    + sum(word_scores[doc] for word_scores in other_scores)
+                    for doc in matching
+                }
+
+            if documents is not None:
+                scores = {doc: scores[doc] for doc in scores.keys() & documents}
+
+            return self._ids(self._rank(scores, needed)[offset:]), len(scores)
+
+    def _word_entry(self, word: str) -> list:
+        entry = self._word_cache.get(word)
+
+        if entry is None:
+            entry = [self._score(self._match(word, len(self._doc_numbers))), None]
+
+            if self.word_cache_size > 0:
+                self._word_cache[word] = entry
+
+                if len(self._word_cache) > self.word_cache_size:
+                    del self._word_cache[next(iter(self._word_cache))]
+
+        return entry
+
+    def _rank(
+        self, scores: dict[int, float], needed: Optional[int] = None
+    ) -> list[int]:
+        # documents best first, equal scores in checksum order - only the first `needed` when given
+        order = self._doc_order.__getitem__
+
+        if needed is None or len(scores) <= needed:
+            ranked = sorted(scores, key=order)
+            ranked.sort(key=scores.__getitem__, reverse=True)
+            return ranked
+
+        # only documents scoring at least the needed-th best score can be ranked - and of the documents scoring
+        # exactly that, only the first in order
+        threshold = sorted(scores.values(), reverse=True)[needed - 1]
+        above = [doc for doc, score in scores.items() if score > threshold]
+        tied = [doc for doc, score in scores.items() if score == threshold]
+
+        above.sort(key=order)
+        above.sort(key=scores.__getitem__, reverse=True)
+        tied.sort(key=order)
+
+        return above + tied[: needed - len(above)]
+
+    def _ids(self, docs: Iterable[int]) -> list[str]:
+        return [self._doc_ids[doc] for doc in docs]
+
+    def _weigh(self, item: dict) -> dict[str, float]:
+        terms: dict[str, float] = {}
+
+        for attribute, weight in self.fields.items():
+            for term in tokenize(item.get(attribute)):
+                terms[term] = terms.get(term, 0.0) + weight
+
+        return terms
+
+    def _unindex(self, doc: int) -> None:
+        for term in self._doc_terms[doc]:
+            postings = self._postings[term]
+            del postings[doc]
+
+            if not postings:
+                del self._postings[term]
+                self._terms_stale = True
+
+        for key in self._doc_filters[doc]:
+            documents = self._filters[key]
+            documents.discard(doc)
+
+            if not documents:
+                del self._filters[key]
+
+    def _match(
+        self, word: str, document_count: int
+    ) -> list[tuple[dict[int, float], float]]:
+        # (postings, multiplier) of the terms the word matches - the exact term first
+        matches = []
+
+        def add(term: str, multiplier: float) -> None:
+            postings = self._postings[term]
+            idf = math.log(1 + document_count / len(postings))
+            matches.append((postings, multiplier * idf))
+
+        if word in self._postings:
+            add(word, 1.0)
+
+        if len(word) >= self.min_prefix_length:
+            start = bisect_left(self._terms, word)
+
+            for term in self._terms[start : start + self.max_prefix_terms + 1]:
+                if not term.startswith(word):
+                    break
+                if term != word:
+                    add(term, PREFIX_WEIGHT)
+
+        return matches
+
+    @staticmethod
+    def _score(matches: list[tuple[dict[int, float], float]]) -> dict[int, float]:
+        # best score of the word per document, over the terms it matches
+        word_scores: dict[int, float] = {}
+
+        for postings, multiplier in matches:
+            if not word_scores:
+                word_scores = {
+                    doc: weight * multiplier for doc, weight in postings.items()
+                }
+                continue
+
+            for doc, weight in postings.items():
+                score = weight * multiplier
+                if score > word_scores.get(doc, 0.0):
+                    word_scores[doc] = score
+
+        return word_scores
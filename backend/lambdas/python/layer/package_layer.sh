@@ -22,7 +22,7 @@ rsync -av --exclude="package_layer.sh" --exclude="*.zip" --exclude="${SCRIPT_DIR
 # Step 3: Install dependencies from the generated requirements.txt files
 echo "Installing dependencies from requirements.txt files into python/lib/python3.12/site-packages/..."
 # installing separately with unique options due to the need for wheel files
-pip install --platform manylinux2014_x86_64 -t "${SCRIPT_DIR}/python/lib/python3.12/site-packages/" --implementation cp --python-version 3.12 --only-binary=:all: --upgrade cryptography
+pip install --platform manylinux2014_x86_64 -t "${SCRIPT_DIR}/python/lib/python3.12/site-packages/" --implementation cp --python-version 3.12 --only-binary=:all: --upgrade cryptography "orjson==3.10.7"
 pip install -r "${PROJECT_ROOT_DIR}/requirements.txt" -t "${SCRIPT_DIR}/python/lib/python3.12/site-packages/"
 echo "Dependency installation completed!"
 
@@ -0,0 +1,54 @@
+import os, sys, pytest
+
+# the handler tests run the handlers against the in-process stand-ins of the benchmarks
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "benchmarks",
+    ),
+)
+
+from bench_handlers import HANDLER_ENV, PRESIGNED_URL_TABLE_NAME, SECRET_ID
+from fakes import (
+    FakeAWS,
+    FakeDynamoDBTable,
+    FakeItemTable,
+    FakeSecretsManager,
+    generate_pem_key,
+)
+
+CATALOG_SIZE = 100
+
+# registered once on the shared session - clients are created once per process and keep the session's handlers,
+# so every test swaps the stand-ins behind it instead
+_fake_aws = None
+
+
+@pytest.fixture(scope="session")
+def pem_key() -> bytes:
+    return generate_pem_key()
+
+
+@pytest.fixture
+def fake_aws(monkeypatch, pem_key) -> FakeAWS:
+    """
+    HANDLER_ENV and fresh DynamoDB/Secrets Manager stand-ins - a catalog of CATALOG_SIZE medias and an empty
+    pre-signed url table. Load the handler after any change to the environment, it is read at import.
+    """
+    global _fake_aws
+
+    for name, value in HANDLER_ENV.items():
+        monkeypatch.setenv(name, value)
+
+    table = FakeDynamoDBTable(CATALOG_SIZE)
+    secrets_manager = FakeSecretsManager({SECRET_ID: pem_key})
+    tables = {PRESIGNED_URL_TABLE_NAME: FakeItemTable()}
+
+    if _fake_aws is None:
+        _fake_aws = FakeAWS(table=table, secrets_manager=secrets_manager, tables=tables)
+        _fake_aws.install()
+    else:
+        _fake_aws.replace(table, secrets_manager, tables)
+
+    return _fake_aws
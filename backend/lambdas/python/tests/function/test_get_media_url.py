@@ -0,0 +1,230 @@
+import json, time, pytest
+from concurrent.futures import Future
+from bench_handlers import PRESIGNED_URL_TABLE_NAME, api_event, load_handler
+from fakes import media_id
+
+
+@pytest.fixture
+def get_media_url(fake_aws):
+    module, _ = load_handler("get_media_url")
+    yield module
+    module.io_executor.shutdown(wait=True)
+
+
+def request_urls(module, media_ids: list) -> dict:
+    response = module.handler(
+        api_event("/media/presigned-urls", "POST", body={"media_ids": media_ids}),
+        None,
+    )
+
+    return {"statusCode": response["statusCode"], **json.loads(response["body"])}
+
+
+def assert_signed(entry: dict, selected_id: str) -> None:
+    url = entry["url"]
+    assert url.startswith("https://media.example.com/media/")
+    assert f"/{selected_id[-6:]}/index.m3u8?" in url
+    assert "Signature=" in url and "Key-Pair-Id=BENCHMARKKEYID" in url
+
+
+class TestGetPresignedUrls:
+    def test_maximum_batch_size(self, get_media_url):
+        media_ids = [media_id(index) for index in range(100)]
+
+        response = request_urls(get_media_url, media_ids)
+
+        assert response["statusCode"] == 200
+        assert list(response["urls"]) == media_ids
+
+        response = request_urls(get_media_url, media_ids + ["media-000100"])
+
+        assert response["statusCode"] == 400
+        assert "maximum of 100" in response["error"]
+
+    def test_duplicate_ids(self, get_media_url):
+        # counted once against the maximum, answered once in the requested order
+        media_ids = [media_id(2), media_id(1), media_id(2)] + [media_id(1)] * 100
+
+        response = request_urls(get_media_url, media_ids)
+
+        assert response["statusCode"] == 200
+        assert list(response["urls"]) == [media_id(2), media_id(1)]
+        for selected_id, entry in response["urls"].items():
+            assert_signed(entry, selected_id)
+
+    def test_missing_and_present_ids(self, get_media_url):
+        response = request_urls(
+            get_media_url, ["missing-1", media_id(3), "missing-2", media_id(4)]
+        )
+
+        assert response["statusCode"] == 200
+        assert list(response["urls"]) == [
+            "missing-1",
+            media_id(3),
+            "missing-2",
+            media_id(4),
+        ]
+        assert response["urls"]["missing-1"] == {"error": "Media not found."}
+        assert response["urls"]["missing-2"] == {"error": "Media not found."}
+        assert_signed(response["urls"][media_id(3)], media_id(3))
+        assert_signed(response["urls"][media_id(4)], media_id(4))
+
+    @pytest.mark.parametrize("media_ids", [[], "media-000001", [media_id(1), ""]])
+    def test_invalid_ids(self, get_media_url, media_ids):
+        response = request_urls(get_media_url, media_ids)
+
+        assert response["statusCode"] == 400
+
+
+def request_cookies(module, selected_id: str) -> dict:
+    return module.handler(
+        api_event(
+            f"/media/{selected_id}/signed-cookies",
+            "POST",
+            path_parameters={"media-id": selected_id},
+        ),
+        None,
+    )
+
+
+class TestGetSignedCookies:
+    def test_cookies(self, get_media_url):
+        response = request_cookies(get_media_url, media_id(5))
+        cookies = response["multiValueHeaders"]["Set-Cookie"]
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["resource"] == (
+            "https://media.example.com/media/horror/000005/*"
+        )
+        assert sorted(cookie.split("=", 1)[0] for cookie in cookies) == [
+            "CloudFront-Key-Pair-Id",
+            "CloudFront-Policy",
+            "CloudFront-Signature",
+        ]
+        for cookie in cookies:
+            attributes = cookie.split("; ")[1:]
+            assert "Domain=.example.com" in attributes
+            assert "Secure" in attributes
+            assert "HttpOnly" in attributes
+            assert "Path=/media/horror/000005" in attributes
+
+    def test_missing_media(self, get_media_url):
+        response = request_cookies(get_media_url, "missing")
+
+        assert response["statusCode"] == 404
+        assert "multiValueHeaders" not in response
+
+    def test_cookie_domain_unset(self, fake_aws, monkeypatch):
+        monkeypatch.delenv("CF_COOKIE_DOMAIN")
+        module, _ = load_handler("get_media_url")
+
+        response = request_cookies(module, media_id(5))
+
+        assert response["statusCode"] == 500
+        assert "multiValueHeaders" not in response
+        module.io_executor.shutdown(wait=True)
+
+
+class Flaky:
+    """
+    Fails the first `failures` requests sent to a stand-in of benchmarks/fakes.py.
+    """
+
+    def __init__(self, stand_in, failures: float) -> None:
+        self.stand_in = stand_in
+        self.failures = failures
+
+    def handle(self, operation: str, request: dict) -> str:
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError(f"{operation} failed")
+
+        return self.stand_in.handle(operation, request)
+
+
+def warm_url(fake_aws, selected_id: str) -> str:
+    url = f"https://media.example.com/warm/{selected_id}?Signature=warm"
+    fake_aws.tables[PRESIGNED_URL_TABLE_NAME].items_json[selected_id] = json.dumps(
+        {
+            "id": {"S": selected_id},
+            "url": {"S": url},
+            "public_key_id": {"S": "BENCHMARKKEYID"},
+            "expires_at": {"N": str(int(time.time()) + 7200)},
+        }
+    )
+
+    return url
+
+
+def request_url(module, selected_id: str) -> dict:
+    response = module.handler(
+        api_event(
+            f"/media/{selected_id}/presigned-url",
+            "POST",
+            path_parameters={"media-id": selected_id},
+        ),
+        None,
+    )
+
+    return {"statusCode": response["statusCode"], "body": json.loads(response["body"])}
+
+
+class TestPrefetch:
+    def test_failed_signer_prefetch_signs_inline(
+        self, get_media_url, fake_aws, monkeypatch
+    ):
+        fake_aws.services["secretsmanager"] = Flaky(
+            fake_aws.services["secretsmanager"], failures=1
+        )
+        counters = []
+        monkeypatch.setattr(get_media_url, "increment", counters.append)
+
+        response = request_url(get_media_url, media_id(1))
+
+        assert response["statusCode"] == 200
+        assert "/000001/index.m3u8?" in response["body"]["url"]
+        assert "prefetch_failed" in counters
+
+    def test_failed_warm_url_prefetch_signs_live(self, get_media_url, fake_aws):
+        warm_url(fake_aws, media_id(1))
+        fake_aws.tables[PRESIGNED_URL_TABLE_NAME] = Flaky(
+            fake_aws.tables[PRESIGNED_URL_TABLE_NAME], failures=float("inf")
+        )
+
+        response = request_url(get_media_url, media_id(1))
+
+        assert response["statusCode"] == 200
+        assert response["body"]["url"].startswith(
+            "https://media.example.com/media/comedy/000001/index.m3u8?"
+        )
+
+    def test_cancelled_prefetch_resolves_inline(self, get_media_url, fake_aws):
+        url = warm_url(fake_aws, media_id(1))
+        cf_signer_future, presigned_url_future = Future(), Future()
+        cf_signer_future.cancel()
+        presigned_url_future.cancel()
+
+        cf_signer = get_media_url.resolve_cf_signer(cf_signer_future)
+
+        assert cf_signer.public_key_id == "BENCHMARKKEYID"
+        assert (
+            get_media_url.resolve_prefetch(
+                presigned_url_future,
+                get_media_url.get_warm_presigned_url,
+                media_id(1),
+            )
+            == url
+        )
+
+    def test_invocations_do_not_share_prefetches(self, get_media_url, fake_aws):
+        url = warm_url(fake_aws, media_id(1))
+
+        assert request_url(get_media_url, media_id(1))["body"] == {"url": url}
+        # cancels both prefetches of the invocation
+        assert request_url(get_media_url, "missing")["statusCode"] == 404
+
+        response = request_url(get_media_url, media_id(2))
+
+        assert response["statusCode"] == 200
+        assert "/000002/index.m3u8?" in response["body"]["url"]
+        assert request_url(get_media_url, media_id(1))["body"] == {"url": url}
@@ -0,0 +1,166 @@
+import json, threading, pytest
+from bench_handlers import api_event, load_handler, rebuild_search_index
+from jc_custom_utilities.catalog_snapshot import CatalogSnapshot, SnapshotWriter
+
+
+@pytest.fixture
+def get_medias(fake_aws):
+    module, _ = load_handler("get_medias")
+    yield module
+    module.search_index_executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def snapshot(get_medias, tmp_path):
+    """
+    Catalog snapshot of the stand-in table, as build_catalog_snapshot writes it.
+    """
+    path = str(tmp_path / "catalog.snapshot")
+    writer = SnapshotWriter(
+        path, partition_attributes=("genre", "catalog"), sort_attribute="created_at"
+    )
+    for item in get_medias.metadata_table.iter_scan():
+        writer.add(item)
+    writer.close()
+
+    snapshot = CatalogSnapshot(path)
+    yield snapshot
+    snapshot.close()
+
+
+def invoke(
+    module, path="/medias", query=None, path_parameters=None, headers=None
+) -> dict:
+    event = api_event(path, query=query, path_parameters=path_parameters)
+    event["headers"] = headers or {}
+
+    return module.handler(event, None)
+
+
+class TestSearchMedias:
+    def test_cold_index(self, get_medias, monkeypatch):
+        monkeypatch.setattr(get_medias, "SEARCH_INDEX_BUILD_WAIT", 0)
+        # holds the first build of the index back on the search index thread
+        release = threading.Event()
+        get_medias.search_index_executor.submit(release.wait)
+
+        response = invoke(get_medias, query={"q": "number 5"})
+
+        assert response["statusCode"] == 503
+        assert response["headers"]["Retry-After"] == "5"
+        assert response["headers"]["Cache-Control"] == "no-store"
+        assert "ETag" not in response["headers"]
+        assert len(get_medias.response_cache) == 0
+
+        release.set()
+        get_medias.search_index_state["refresh"].result()
+        response = invoke(get_medias, query={"q": "number 5"})
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["Items"][0]["id"] == "media-000005"
+
+
+class TestGetMedias:
+    def test_not_modified_on_matching_etag(self, get_medias):
+        response = invoke(get_medias, query={"limit": "10"})
+        etag = response["headers"]["ETag"]
+
+        assert response["statusCode"] == 200
+
+        # answered from the response cache, then serialized again after it is cleared
+        for _ in range(2):
+            response = invoke(
+                get_medias, query={"limit": "10"}, headers={"If-None-Match": etag}
+            )
+
+            assert response["statusCode"] == 304
+            assert response["body"] == ""
+            assert response["headers"]["ETag"] == etag
+            get_medias.response_cache.clear()
+
+    def test_ok_on_stale_etag(self, get_medias):
+        first = invoke(get_medias, query={"limit": "10"})
+        response = invoke(
+            get_medias, query={"limit": "10"}, headers={"If-None-Match": '"stale"'}
+        )
+
+        assert response["statusCode"] == 200
+        assert response["headers"]["ETag"] == first["headers"]["ETag"]
+        assert response["body"] == first["body"]
+        assert len(json.loads(response["body"])["Items"]) == 10
+
+    @pytest.mark.parametrize(
+        "path, query, path_parameters, status_code",
+        [
+            ("/medias", {"limit": "abc"}, None, 400),
+            ("/medias/missing", None, {"media-id": "missing"}, 404),
+        ],
+    )
+    def test_errors_not_cached(
+        self, get_medias, path, query, path_parameters, status_code
+    ):
+        for _ in range(2):
+            response = invoke(
+                get_medias, path=path, query=query, path_parameters=path_parameters
+            )
+
+            assert response["statusCode"] == status_code
+            assert "ETag" not in response["headers"]
+            assert "Cache-Control" not in response["headers"]
+            assert len(get_medias.response_cache) == 0
+
+
+class TestFields:
+    @pytest.mark.parametrize(
+        "path, query, path_parameters",
+        [
+            ("/medias", {"limit": "5", "fields": "title,thumbnail"}, None),
+            ("/medias", {"genre": "drama", "fields": " thumbnail , title"}, None),
+            (
+                "/medias/media-000007",
+                {"fields": "duration,genre"},
+                {"media-id": "media-000007"},
+            ),
+            ("/medias", {"q": "number 12", "fields": "title"}, None),
+        ],
+    )
+    def test_same_projection_on_every_path(
+        self, get_medias, snapshot, fake_aws, monkeypatch, path, query, path_parameters
+    ):
+        selected = {"id"} | {name.strip() for name in query["fields"].split(",")}
+        rebuild_search_index(get_medias)
+
+        from_ddb = invoke(get_medias, path, query, path_parameters)
+        body = json.loads(from_ddb["body"])
+
+        assert from_ddb["statusCode"] == 200
+        for item in body.get("Items") or [body["Item"]]:
+            assert set(item) == selected
+
+        monkeypatch.setattr(get_medias, "current_snapshot", lambda: snapshot)
+        rebuild_search_index(get_medias)
+        ddb_calls = dict(fake_aws.services["DynamoDB_20120810"].calls)
+
+        from_snapshot = invoke(get_medias, path, query, path_parameters)
+
+        assert fake_aws.services["DynamoDB_20120810"].calls == ddb_calls
+        assert from_snapshot["statusCode"] == 200
+        assert json.loads(from_snapshot["body"]) == body
+
+    @pytest.mark.parametrize(
+        "path, query, path_parameters",
+        [
+            ("/medias", {"fields": "title,secret"}, None),
+            (
+                "/medias/media-000007",
+                {"fields": "secret"},
+                {"media-id": "media-000007"},
+            ),
+            ("/medias", {"q": "number", "fields": "title,secret"}, None),
+        ],
+    )
+    def test_unknown_fields(self, get_medias, path, query, path_parameters):
+        response = invoke(get_medias, path, query, path_parameters)
+
+        assert response["statusCode"] == 400
+        assert "'fields' must be" in json.loads(response["body"])["message"]
@@ -0,0 +1,158 @@
+import io, os, json, zlib, pytest
+from botocore.exceptions import ClientError
+from unittest.mock import MagicMock
+from jc_boto3_helper.catalog_snapshot_store import CatalogSnapshotStore
+from jc_custom_utilities.catalog_snapshot import SnapshotWriter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeBody(io.BytesIO):
+    def iter_chunks(self, chunk_size):
+        return iter(lambda: self.read(chunk_size), b"")
+
+
+class FakeS3:
+    """
+    In-memory get_object/put_object with ETags and IfNoneMatch.
+    """
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.get_object = MagicMock(side_effect=self._get_object)
+        self.put_object = MagicMock(side_effect=self._put_object)
+
+    def _put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body if isinstance(Body, bytes) else Body.read()
+
+    def _get_object(self, Bucket, Key, IfNoneMatch=None):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+
+        etag = str(hash(self.objects[Key]))
+        if IfNoneMatch == etag:
+            raise ClientError({"Error": {"Code": "304"}}, "GetObject")
+
+        return {"Body": FakeBody(self.objects[Key]), "ETag": etag}
+
+
+def build(path, *titles: str) -> dict:
+    writer = SnapshotWriter(str(path))
+    for index, title in enumerate(titles):
+        writer.add({"id": str(index), "title": title})
+    return writer.close()
+
+
+@pytest.fixture
+def s3():
+    return FakeS3()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(tmp_path, s3, clock):
+    store = CatalogSnapshotStore(
+        "bucket", local_dir=str(tmp_path), check_interval=60, clock=clock
+    )
+    store.client = s3
+    yield store
+    store.close()
+
+
+class TestPublish:
+    def test_uploads_gzip_snapshot_then_marker(self, tmp_path, s3, store):
+        path = tmp_path / "build.snapshot"
+        footer = build(path, "A", "B")
+
+        assert store.publish(str(path), footer) is True
+
+        keys = [call.kwargs["Key"] for call in s3.put_object.call_args_list]
+        assert keys == [store.snapshot_key(footer["version"]), store.marker_key]
+        assert zlib.decompress(s3.objects[keys[0]], wbits=31) == path.read_bytes()
+        assert json.loads(s3.objects[store.marker_key])["version"] == footer["version"]
+
+    def test_skips_published_version(self, tmp_path, s3, store):
+        path = tmp_path / "build.snapshot"
+        footer = build(path, "A")
+
+        store.publish(str(path), footer)
+        s3.put_object.reset_mock()
+
+        assert store.publish(str(path), footer) is False
+        s3.put_object.assert_not_called()
+
+
+class TestCurrent:
+    def test_none_until_published(self, store):
+        assert store.current() is None
+
+    def test_loads_and_checks_marker_once_per_interval(
+        self, tmp_path, s3, clock, store
+    ):
+        store.publish(str(tmp_path / "v1"), build(tmp_path / "v1", "A"))
+
+        snapshot = store.current()
+        assert json.loads(snapshot.get_item("0"))["title"] == "A"
+
+        s3.get_object.reset_mock()
+        clock.now = 59
+        assert store.current() is snapshot
+        s3.get_object.assert_not_called()
+
+        # an unchanged marker is answered with a 304
+        clock.now = 60
+        assert store.current() is snapshot
+        assert s3.get_object.call_args.kwargs["IfNoneMatch"]
+
+    def test_swaps_to_new_version(self, tmp_path, clock, store):
+        store.publish(str(tmp_path / "v1"), build(tmp_path / "v1", "A"))
+        first = store.current()
+        first_path = first.path
+
+        store.publish(str(tmp_path / "v2"), build(tmp_path / "v2", "B"))
+        clock.now = 60
+        second = store.current()
+
+        assert second.version != first.version
+        assert json.loads(second.get_item("0"))["title"] == "B"
+
+        store.publish(str(tmp_path / "v3"), build(tmp_path / "v3", "C"))
+        clock.now = 120
+        store.current()
+
+        assert not os.path.exists(first_path)
+        assert os.path.exists(second.path)
+
+    def test_swap_keeps_snapshot_held_by_reader(self, tmp_path, clock, store):
+        store.publish(str(tmp_path / "v1"), build(tmp_path / "v1", "A", "B"))
+        held = store.current()
+        pages = held.iter_items(page_size=1)
+        assert next(pages)["title"] == "A"
+
+        store.publish(str(tmp_path / "v2"), build(tmp_path / "v2", "C"))
+        clock.now = 60
+        assert store.current() is not held
+
+        # the reader finishes on the snapshot it started with
+        assert next(pages)["title"] == "B"
+        assert json.loads(held.get_item("0"))["title"] == "A"
+        assert os.path.exists(held.path)
+
+    def test_failed_check_keeps_snapshot(self, tmp_path, s3, clock, store):
+        store.publish(str(tmp_path / "v1"), build(tmp_path / "v1", "A"))
+        snapshot = store.current()
+
+        s3.get_object.side_effect = Exception("timeout")
+        clock.now = 60
+
+        assert store.current() is snapshot
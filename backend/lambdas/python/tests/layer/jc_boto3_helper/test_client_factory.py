@@ -0,0 +1,84 @@
+import pytest
+from botocore.stub import Stubber
+from unittest.mock import patch
+from jc_boto3_helper import client_factory
+from jc_boto3_helper.client_factory import (
+    get_client,
+    get_resource,
+    get_session,
+    new_resource,
+    prewarm,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_clients():
+    client_factory.clear_clients()
+    yield
+    client_factory.clear_clients()
+
+
+class TestGetClient:
+    def test_memoised_per_service_and_region(self):
+        client = get_client("dynamodb", "us-east-2")
+
+        assert get_client("dynamodb", "us-east-2") is client
+        assert get_client("dynamodb", "us-west-2") is not client
+        assert get_client("secretsmanager", "us-east-2") is not client
+
+    def test_tuned_config(self):
+        config = get_client("dynamodb", "us-east-2").meta.config
+
+        assert config.max_pool_connections == client_factory.max_pool_connections
+        assert config.tcp_keepalive is True
+        assert config.connect_timeout == client_factory.connect_timeout
+        assert config.read_timeout == client_factory.read_timeout
+        assert config.retries["mode"] == client_factory.retry_mode
+
+    def test_shared_session(self):
+        session = get_session()
+
+        get_client("dynamodb", "us-east-2")
+        get_resource("dynamodb", "us-east-2")
+
+        assert get_session() is session
+
+
+class TestGetResource:
+    def test_memoised_and_new_resource_per_thread(self):
+        resource = get_resource("dynamodb", "us-east-2")
+
+        assert get_resource("dynamodb", "us-east-2") is resource
+        assert new_resource("dynamodb", "us-east-2") is not resource
+
+    def test_resource_does_not_transform_shared_client(self):
+        get_resource("dynamodb", "us-east-2").Table("table")
+        client = get_client("dynamodb", "us-east-2")
+
+        # the resource layer's deserialization must not be registered on the shared client
+        with Stubber(client) as stubber:
+            stubber.add_response(
+                "scan", {"Items": [{"id": {"S": "abc123"}}]}, {"TableName": "table"}
+            )
+
+            assert client.scan(TableName="table")["Items"] == [{"id": {"S": "abc123"}}]
+
+
+class TestPrewarm:
+    def test_opens_connection_and_ignores_errors(self):
+        client = get_client("dynamodb", "us-east-2")
+
+        with patch.object(
+            client, "describe_endpoints", side_effect=Exception("AccessDenied")
+        ) as mock_describe_endpoints:
+            prewarm(("dynamodb", "us-east-2"))
+
+        mock_describe_endpoints.assert_called_once_with()
+
+    def test_warms_resource_client(self):
+        resource_client = get_resource("dynamodb", "us-east-2").meta.client
+
+        with patch.object(resource_client, "describe_endpoints") as mock_describe:
+            prewarm(("dynamodb", "us-east-2"))
+
+        mock_describe.assert_called_once_with()
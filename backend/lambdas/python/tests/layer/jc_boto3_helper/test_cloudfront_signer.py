@@ -1,7 +1,19 @@
-import os, pytest
+import os, pytest, json, base64
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from botocore.signers import CloudFrontSigner as BotocoreCloudFrontSigner
 from unittest.mock import patch, MagicMock
-from jc_boto3_helper.cloudfront_signer import CloudFrontSigner
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jc_boto3_helper import cloudfront_signer
+from jc_boto3_helper.cloudfront_signer import (
+    CloudFrontSigner,
+    PolicyTemplates,
+    PresignedUrlCache,
+    cloudfront_b64encode,
+)
 from jc_boto3_helper.secrets_manager import SecretsManager
 from jc_custom_utilities.logger import logger_config
 
@@ -53,3 +65,213 @@ class TestCloudFrontSigner:
     def test_generate_presigned_url_missing_expiration(cloudfront_signer):
         with pytest.raises(TypeError):
             cf_signer.generate_presigned_url("https://example.com/test", None)
+
+
+def generate_pem_key() -> bytes:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+class TestPrivateKeyRegistry:
+    def setup_method(self):
+        cloudfront_signer.clear_private_key_registry()
+
+    def test_pem_parsed_once_across_signers(self):
+        real_pem_key = generate_pem_key()
+
+        with patch.object(
+            serialization,
+            "load_pem_private_key",
+            wraps=serialization.load_pem_private_key,
+        ) as mock_load_pem_private_key:
+            for _ in range(3):
+                signer = CloudFrontSigner(public_key_id, real_pem_key)
+                signed_url = signer.generate_presigned_url(
+                    "https://example.com/test", "3600"
+                )
+
+                assert "Signature=" in signed_url["url"]
+
+            mock_load_pem_private_key.assert_called_once()
+
+    def test_rotated_pem_parsed_again(self):
+        first_signer = CloudFrontSigner(public_key_id, generate_pem_key())
+        second_signer = CloudFrontSigner(public_key_id, generate_pem_key())
+
+        assert first_signer.private_key is not second_signer.private_key
+        assert (
+            first_signer.private_key
+            is CloudFrontSigner(public_key_id, first_signer.pem_key).private_key
+        )
+
+
+class TestSignedCookies:
+    def test_generate_signed_cookies(self):
+        signer = CloudFrontSigner(public_key_id, generate_pem_key())
+        resource = "https://example.com/dev/title/*"
+
+        response = signer.generate_signed_cookies(resource, "3600")
+        cookies = response["cookies"]
+
+        assert cookies["CloudFront-Key-Pair-Id"] == public_key_id
+
+        policy = base64.b64decode(
+            cookies["CloudFront-Policy"].translate(str.maketrans("-_~", "+=/"))
+        )
+        signature = base64.b64decode(
+            cookies["CloudFront-Signature"].translate(str.maketrans("-_~", "+=/"))
+        )
+        statement = json.loads(policy)["Statement"][0]
+
+        assert statement["Resource"] == resource
+        assert (
+            statement["Condition"]["DateLessThan"]["AWS:EpochTime"]
+            == response["expires"]
+        )
+        signer.private_key.public_key().verify(
+            signature, policy, padding.PKCS1v15(), hashes.SHA1()
+        )
+
+    def test_generate_signed_cookies_missing_resource(self):
+        with pytest.raises(TypeError):
+            cf_signer.generate_signed_cookies("", 3600)
+
+
+class TestPresignedUrlCache:
+    def test_bucket_expiry(self):
+        url_cache = PresignedUrlCache(bucket_seconds=60)
+
+        assert url_cache.bucket_expiry(120) == 120
+        assert url_cache.bucket_expiry(121) == 180
+
+    def test_signed_url_reused_within_bucket(self):
+        url_cache = PresignedUrlCache(bucket_seconds=60)
+        pem = generate_pem_key()
+        signer = CloudFrontSigner(public_key_id, pem, url_cache=url_cache)
+
+        first = signer.generate_presigned_url("https://example.com/a", 3600)
+        second = CloudFrontSigner(
+            public_key_id, pem, url_cache=url_cache
+        ).generate_presigned_url("https://example.com/a", "3600")
+        other = signer.generate_presigned_url("https://example.com/b", 3600)
+
+        assert first == second
+        assert first != other
+        assert url_cache.stats()["hits"] == 1
+
+        # expiry is rounded up to the bucket
+        policy = first["url"].split("Policy=")[1].split("&")[0]
+        statement = json.loads(
+            base64.b64decode(policy.translate(str.maketrans("-_~", "+=/")))
+        )["Statement"][0]
+        assert statement["Condition"]["DateLessThan"]["AWS:EpochTime"] % 60 == 0
+
+    def test_rotated_key_not_served_from_cache(self):
+        url_cache = PresignedUrlCache(bucket_seconds=60)
+
+        first = CloudFrontSigner(
+            public_key_id, generate_pem_key(), url_cache=url_cache
+        ).generate_presigned_url("https://example.com/a", 3600)
+        second = CloudFrontSigner(
+            public_key_id, generate_pem_key(), url_cache=url_cache
+        ).generate_presigned_url("https://example.com/a", 3600)
+
+        assert first != second
+        assert url_cache.stats()["hits"] == 0
+
+
+# resources of every length modulo 3, a query string, a wildcard and characters json escapes
+GOLDEN_RESOURCES = [
+    "https://example.com/a",
+    "https://example.com/ab",
+    "https://example.com/abc",
+    "https://example.com/dev/title/index.m3u8?lang=en&q=1",
+    "https://example.com/dev/title/*",
+    'https://example.com/Amélie (2001)/"quoted"\\path\t/ü.mp4',
+]
+GOLDEN_TIMES = [(1728417487, 1728413887), (9999999999, 0), (1728417487, 1728417487)]
+
+
+def botocore_policy(resource: str, expires_at: int, starts_at: int) -> bytes:
+    return (
+        BotocoreCloudFrontSigner(public_key_id, None)
+        .build_policy(
+            resource,
+            date_less_than=datetime.fromtimestamp(expires_at, timezone.utc),
+            date_greater_than=datetime.fromtimestamp(starts_at, timezone.utc),
+        )
+        .encode("utf-8")
+    )
+
+
+@pytest.fixture(scope="module")
+def golden_pem_key() -> bytes:
+    # one key for the golden tests - generating a 2048 bit key takes a while
+    return generate_pem_key()
+
+
+class TestPolicyTemplates:
+    @pytest.mark.parametrize("resource", GOLDEN_RESOURCES)
+    @pytest.mark.parametrize("expires_at, starts_at", GOLDEN_TIMES)
+    def test_policy_matches_botocore(self, resource, expires_at, starts_at):
+        policy, encoded_policy = (
+            PolicyTemplates().get(resource).render(expires_at, starts_at)
+        )
+
+        assert policy == botocore_policy(resource, expires_at, starts_at)
+        assert encoded_policy == cloudfront_b64encode(policy)
+
+    @pytest.mark.parametrize("url", GOLDEN_RESOURCES)
+    def test_signed_url_matches_botocore(self, url, golden_pem_key):
+        signer = CloudFrontSigner(public_key_id, golden_pem_key)
+
+        with patch.object(cloudfront_signer.time, "time", return_value=1728413887.9):
+            signed_url = signer.generate_presigned_url(url, 3600)["url"]
+
+        # PKCS1v15 signatures are deterministic - the whole url must match
+        assert signed_url == BotocoreCloudFrontSigner(
+            public_key_id, signer._rsa_signer
+        ).generate_presigned_url(
+            url, policy=botocore_policy(url, 1728413887 + 3600, 1728413887)
+        )
+
+    def test_signed_cookies_policy_matches_botocore(self, golden_pem_key):
+        signer = CloudFrontSigner(public_key_id, golden_pem_key)
+        resource = "https://example.com/dev/title/*"
+
+        with patch.object(cloudfront_signer.time, "time", return_value=1728413887.9):
+            cookies = signer.generate_signed_cookies(resource, 3600)["cookies"]
+
+        policy = botocore_policy(resource, 1728413887 + 3600, 1728413887)
+        assert cookies["CloudFront-Policy"] == cloudfront_b64encode(policy)
+        assert cookies["CloudFront-Signature"] == cloudfront_b64encode(
+            signer._rsa_signer(policy)
+        )
+
+    def test_bounded(self):
+        policy_templates = PolicyTemplates(max_entries=2)
+
+        first = policy_templates.get("https://example.com/a")
+        assert policy_templates.get("https://example.com/a") is first
+
+        policy_templates.get("https://example.com/b")
+        policy_templates.get("https://example.com/c")
+
+        assert policy_templates.get("https://example.com/a") is not first
+
+    def test_concurrent_misses(self):
+        policy_templates = PolicyTemplates(max_entries=8)
+        resources = [f"https://example.com/{index}" for index in range(64)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            templates = list(executor.map(policy_templates.get, resources * 20))
+
+        assert [template.render(1, 0) for template in templates[:64]] == [
+            PolicyTemplates().get(resource).render(1, 0) for resource in resources
+        ]
+        assert len(policy_templates._templates) <= 8
@@ -0,0 +1,167 @@
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer
+from jc_boto3_helper.dynamodb_client_table import (
+    DynamoDBClientTable,
+    decode_attribute,
+    decode_item,
+    encode_item,
+)
+from jc_boto3_helper.dynamodb_resource_table import ItemCache
+
+table_name = "METADATA_TABLE"
+
+low_level_item = {
+    "id": {"S": "abc123"},
+    "duration": {"N": "3600"},
+    "rating": {"N": "4.5"},
+    "published": {"BOOL": True},
+    "subtitle": {"NULL": True},
+    "tags": {"L": [{"S": "drama"}, {"N": "1"}]},
+    "files": {"M": {"hls": {"S": "/abc123/index.m3u8"}, "size": {"N": "-12"}}},
+    "regions": {"SS": ["us", "eu"]},
+}
+
+
+def make_table(**kwargs) -> DynamoDBClientTable:
+    ddb_table = DynamoDBClientTable(table_name, "us-east-2", **kwargs)
+    ddb_table.client = MagicMock()
+    ddb_table.table.client = ddb_table.client
+
+    return ddb_table
+
+
+class TestLeanDecoder:
+    def test_decode_item(self):
+        assert decode_item(low_level_item) == {
+            "id": "abc123",
+            "duration": 3600,
+            "rating": 4.5,
+            "published": True,
+            "subtitle": None,
+            "tags": ["drama", 1],
+            "files": {"hls": "/abc123/index.m3u8", "size": -12},
+            "regions": {"us", "eu"},
+        }
+
+    def test_numbers_are_int_or_float(self):
+        assert type(decode_attribute({"N": "10"})) is int
+        assert type(decode_attribute({"N": "1E+2"})) is float
+        assert decode_attribute({"N": "12345678901234567890"}) == 12345678901234567890
+
+    def test_matches_type_deserializer(self):
+        deserializer = TypeDeserializer()
+        expected = {
+            key: deserializer.deserialize(value)
+            for key, value in low_level_item.items()
+        }
+
+        # Decimal compares equal to the int/float values of the lean decoder
+        assert decode_item(low_level_item) == expected
+
+    def test_encode_round_trip(self):
+        item = decode_item(low_level_item)
+
+        assert decode_item(encode_item(item)) == item
+        assert encode_item({"rating": Decimal("4.5")}) == {"rating": {"N": "4.5"}}
+
+
+class TestDynamoDBClientTable:
+    def test_scan_decodes_items_and_start_key(self):
+        ddb_table = make_table()
+        ddb_table.client.scan.return_value = {
+            "Items": [low_level_item],
+            "Count": 1,
+            "LastEvaluatedKey": {"id": {"S": "abc123"}},
+        }
+
+        response = ddb_table.scan(Limit=1, ExclusiveStartKey={"id": "abc000"})
+
+        assert response["Items"][0]["duration"] == 3600
+        assert response["LastEvaluatedKey"] == {"id": "abc123"}
+        ddb_table.client.scan.assert_called_once_with(
+            TableName=table_name, Limit=1, ExclusiveStartKey={"id": {"S": "abc000"}}
+        )
+
+    def test_query_builds_condition_expressions(self):
+        ddb_table = make_table()
+        ddb_table.client.query.return_value = {"Items": [], "Count": 0}
+
+        ddb_table.query(
+            IndexName="genre-created_at-index",
+            KeyConditionExpression=Key("genre").eq("drama"),
+            FilterExpression=Attr("rating").gt(Decimal("4")),
+        )
+
+        request = ddb_table.client.query.call_args.kwargs
+        assert request["KeyConditionExpression"] == "#n0 = :v0"
+        assert request["FilterExpression"] == "#n1 > :v1"
+        assert request["ExpressionAttributeNames"] == {"#n0": "genre", "#n1": "rating"}
+        assert request["ExpressionAttributeValues"] == {
+            ":v0": {"S": "drama"},
+            ":v1": {"N": "4"},
+        }
+
+    def test_get_item_cached(self):
+        ddb_table = make_table(item_cache=ItemCache(ttl=60))
+        ddb_table.client.get_item.return_value = {"Item": low_level_item}
+
+        for _ in range(2):
+            response = ddb_table.get_item(Key={"id": "abc123"})
+
+        assert response["Item"]["rating"] == 4.5
+        ddb_table.client.get_item.assert_called_once_with(
+            TableName=table_name, Key={"id": {"S": "abc123"}}
+        )
+
+    def test_batch_get_item(self):
+        ddb_table = make_table()
+        ddb_table.client.batch_get_item.return_value = {
+            "Responses": {table_name: [{"id": {"S": "a"}, "duration": {"N": "1"}}]},
+            "UnprocessedKeys": {},
+        }
+
+        response = ddb_table.batch_get_item(Keys=[{"id": "a"}])
+
+        assert response == {
+            "Items": [{"id": "a", "duration": 1}],
+            "UnprocessedKeys": [],
+        }
+        request_items = ddb_table.client.batch_get_item.call_args.kwargs["RequestItems"]
+        assert request_items[table_name]["Keys"] == [{"id": {"S": "a"}}]
+
+    def test_batch_put_items(self):
+        ddb_table = make_table()
+        ddb_table.client.batch_write_item.return_value = {
+            "UnprocessedItems": {
+                table_name: [
+                    {
+                        "PutRequest": {
+                            "Item": {"id": {"S": "b"}, "expires_at": {"N": "2"}}
+                        }
+                    }
+                ]
+            }
+        }
+
+        response = ddb_table.batch_put_items(
+            Items=[{"id": "a", "expires_at": 1}, {"id": "b", "expires_at": 2}],
+            max_retries=0,
+        )
+
+        assert response == {"UnprocessedItems": [{"id": "b", "expires_at": 2}]}
+        request_items = ddb_table.client.batch_write_item.call_args.kwargs[
+            "RequestItems"
+        ]
+        assert request_items[table_name][0] == {
+            "PutRequest": {"Item": {"id": {"S": "a"}, "expires_at": {"N": "1"}}}
+        }
+
+    def test_scan_error(self):
+        ddb_table = make_table()
+        ddb_table.client.scan.side_effect = Exception("boom")
+
+        with pytest.raises(ValueError):
+            ddb_table.scan()
@@ -0,0 +1,471 @@
+import io, logging, pytest
+from unittest.mock import patch, MagicMock
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from jc_boto3_helper import dynamodb_resource_table
+from jc_custom_utilities.media_record import MediaRecord
+from jc_boto3_helper.dynamodb_resource_table import (
+    DynamoDBResourceTable,
+    ItemCache,
+    ParallelScan,
+    build_projection,
+)
+
+table_name = "METADATA_TABLE"
+
+
+def make_table() -> DynamoDBResourceTable:
+    ddb_table = DynamoDBResourceTable(table_name, "us-east-2")
+    ddb_table.resource = MagicMock()
+    ddb_table.table = MagicMock()
+
+    return ddb_table
+
+
+class TestBatchGetItem:
+    def test_keys_chunked_by_100(self):
+        ddb_table = make_table()
+        ddb_table.resource.batch_get_item.side_effect = lambda RequestItems: {
+            "Responses": {
+                table_name: [
+                    {"id": key["id"], "s3_key": f"/{key['id']}.mp4"}
+                    for key in RequestItems[table_name]["Keys"]
+                ]
+            }
+        }
+
+        keys = [{"id": f"id-{i}"} for i in range(250)]
+        response = ddb_table.batch_get_item(
+            Keys=keys, ProjectionExpression="id, s3_key"
+        )
+
+        assert ddb_table.resource.batch_get_item.call_count == 3
+        assert len(response["Items"]) == 250
+        assert response["UnprocessedKeys"] == []
+
+        request_items = ddb_table.resource.batch_get_item.call_args.kwargs[
+            "RequestItems"
+        ]
+        assert request_items[table_name]["ProjectionExpression"] == "id, s3_key"
+
+    @patch("jc_boto3_helper.dynamodb_resource_table.time.sleep")
+    def test_unprocessed_keys_retried(self, mock_sleep):
+        ddb_table = make_table()
+        ddb_table.resource.batch_get_item.side_effect = [
+            {
+                "Responses": {table_name: [{"id": "a"}]},
+                "UnprocessedKeys": {table_name: {"Keys": [{"id": "b"}]}},
+            },
+            {"Responses": {table_name: [{"id": "b"}]}, "UnprocessedKeys": {}},
+        ]
+
+        response = ddb_table.batch_get_item(Keys=[{"id": "a"}, {"id": "b"}])
+
+        assert [item["id"] for item in response["Items"]] == ["a", "b"]
+        assert ddb_table.resource.batch_get_item.call_args.kwargs["RequestItems"][
+            table_name
+        ]["Keys"] == [{"id": "b"}]
+        mock_sleep.assert_called_once()
+
+    @patch("jc_boto3_helper.dynamodb_resource_table.time.sleep")
+    def test_unprocessed_keys_returned_after_max_retries(self, mock_sleep):
+        ddb_table = make_table()
+        ddb_table.resource.batch_get_item.return_value = {
+            "Responses": {table_name: []},
+            "UnprocessedKeys": {table_name: {"Keys": [{"id": "a"}]}},
+        }
+
+        response = ddb_table.batch_get_item(Keys=[{"id": "a"}], max_retries=2)
+
+        assert response["UnprocessedKeys"] == [{"id": "a"}]
+        assert ddb_table.resource.batch_get_item.call_count == 3
+
+    def test_missing_keys(self):
+        with pytest.raises(ValueError):
+            make_table().batch_get_item(Keys=[])
+
+
+class TestBatchPutItems:
+    def test_items_chunked_by_25(self):
+        ddb_table = make_table()
+        ddb_table.resource.batch_write_item.return_value = {"UnprocessedItems": {}}
+
+        response = ddb_table.batch_put_items(
+            Items=[{"id": f"id-{i}"} for i in range(60)]
+        )
+
+        assert ddb_table.resource.batch_write_item.call_count == 3
+        assert response["UnprocessedItems"] == []
+        assert ddb_table.resource.batch_write_item.call_args.kwargs["RequestItems"][
+            table_name
+        ] == [{"PutRequest": {"Item": {"id": f"id-{i}"}}} for i in range(50, 60)]
+
+    @patch("jc_boto3_helper.dynamodb_resource_table.time.sleep")
+    def test_unprocessed_items_retried(self, mock_sleep):
+        ddb_table = make_table()
+        ddb_table.resource.batch_write_item.side_effect = [
+            {"UnprocessedItems": {table_name: [{"PutRequest": {"Item": {"id": "b"}}}]}},
+            {"UnprocessedItems": {}},
+        ]
+
+        response = ddb_table.batch_put_items(Items=[{"id": "a"}, {"id": "b"}])
+
+        assert response["UnprocessedItems"] == []
+        assert ddb_table.resource.batch_write_item.call_args.kwargs["RequestItems"] == {
+            table_name: [{"PutRequest": {"Item": {"id": "b"}}}]
+        }
+        mock_sleep.assert_called_once()
+
+    @patch("jc_boto3_helper.dynamodb_resource_table.time.sleep")
+    def test_unprocessed_items_returned_after_max_retries(self, mock_sleep):
+        ddb_table = make_table()
+        ddb_table.resource.batch_write_item.return_value = {
+            "UnprocessedItems": {table_name: [{"PutRequest": {"Item": {"id": "a"}}}]}
+        }
+
+        response = ddb_table.batch_put_items(Items=[{"id": "a"}], max_retries=2)
+
+        assert response["UnprocessedItems"] == [{"id": "a"}]
+        assert ddb_table.resource.batch_write_item.call_count == 3
+
+    def test_missing_items(self):
+        with pytest.raises(ValueError):
+            make_table().batch_put_items(Items=[])
+
+
+def make_scan_pages(total_items: int, page_size: int):
+    def scan(**kwargs):
+        start = int(kwargs.get("ExclusiveStartKey", {}).get("id", 0))
+        end = min(start + min(page_size, kwargs.get("Limit", page_size)), total_items)
+        response = {
+            "Items": [{"id": str(i)} for i in range(start, end)],
+            "Count": end - start,
+        }
+
+        if end < total_items:
+            response["LastEvaluatedKey"] = {"id": str(end)}
+
+        return response
+
+    return MagicMock(side_effect=scan)
+
+
+class TestIterScan:
+    def test_follows_last_evaluated_key(self):
+        ddb_table = make_table()
+        ddb_table.table.scan = make_scan_pages(total_items=25, page_size=10)
+
+        items = list(ddb_table.iter_scan(ProjectionExpression="id"))
+
+        assert [item["id"] for item in items] == [str(i) for i in range(25)]
+        assert ddb_table.table.scan.call_count == 3
+        assert ddb_table.table.scan.call_args.kwargs == {
+            "ProjectionExpression": "id",
+            "ExclusiveStartKey": {"id": "20"},
+        }
+
+    def test_is_lazy(self):
+        ddb_table = make_table()
+        ddb_table.table.scan = make_scan_pages(total_items=25, page_size=10)
+
+        items = ddb_table.iter_scan()
+        ddb_table.table.scan.assert_not_called()
+
+        next(items)
+        assert ddb_table.table.scan.call_count == 1
+
+    def test_pages(self):
+        ddb_table = make_table()
+        ddb_table.table.scan = make_scan_pages(total_items=25, page_size=10)
+
+        pages = list(ddb_table.iter_scan(pages=True))
+
+        assert [page["Count"] for page in pages] == [10, 10, 5]
+        assert pages[0]["LastEvaluatedKey"] == {"id": "10"}
+        assert pages[-1]["LastEvaluatedKey"] is None
+
+    def test_max_items(self):
+        ddb_table = make_table()
+        ddb_table.table.scan = make_scan_pages(total_items=25, page_size=10)
+
+        items = list(ddb_table.iter_scan(max_items=15))
+
+        assert len(items) == 15
+        # the last page only asks for the remaining budget
+        assert ddb_table.table.scan.call_args.kwargs["Limit"] == 5
+
+    def test_scan_error(self):
+        ddb_table = make_table()
+        ddb_table.table.scan.side_effect = Exception("ddb error")
+
+        with pytest.raises(ValueError):
+            list(ddb_table.iter_scan())
+
+
+class FakeSegmentTable:
+    """Serves `items_per_segment` items per segment, two items per page."""
+
+    def __init__(self, items_per_segment: int, throttle_first_calls: int = 0) -> None:
+        self.items_per_segment = items_per_segment
+        self.throttle_first_calls = throttle_first_calls
+        self.calls = []
+
+    def scan(self, **kwargs):
+        self.calls.append(kwargs)
+
+        if len(self.calls) <= self.throttle_first_calls:
+            raise ClientError(
+                {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "Scan"
+            )
+
+        segment = kwargs["Segment"]
+        start = kwargs.get("ExclusiveStartKey", {}).get("n", 0)
+        end = min(start + 2, self.items_per_segment)
+        response = {
+            "Items": [{"id": f"{segment}-{n}"} for n in range(start, end)],
+            "ConsumedCapacity": {"CapacityUnits": 0.5},
+        }
+
+        if end < self.items_per_segment:
+            response["LastEvaluatedKey"] = {"n": end}
+
+        return response
+
+
+class TestParallelScan:
+    def test_segments_merged(self):
+        tables = []
+
+        def table_factory():
+            tables.append(FakeSegmentTable(items_per_segment=5))
+            return tables[-1]
+
+        parallel_scan = ParallelScan(
+            table_factory, total_segments=4, max_workers=2, scan_kwargs={"Limit": 2}
+        )
+        items = list(parallel_scan)
+
+        assert sorted(item["id"] for item in items) == sorted(
+            f"{segment}-{n}" for segment in range(4) for n in range(5)
+        )
+        # every segment is scanned with its own table resource
+        assert len(tables) == 4
+        assert tables[0].calls[0]["TotalSegments"] == 4
+        assert tables[0].calls[0]["Limit"] == 2
+
+        stats = parallel_scan.stats
+        assert stats["items"] == 20
+        assert stats["pages"] == 12
+        assert stats["consumed_capacity"] == 6.0
+        assert stats["items_per_second"] > 0
+
+    @patch("jc_boto3_helper.dynamodb_resource_table.time.sleep")
+    def test_throttling_retried(self, mock_sleep):
+        table = FakeSegmentTable(items_per_segment=1, throttle_first_calls=2)
+        parallel_scan = ParallelScan(lambda: table, total_segments=1)
+
+        assert list(parallel_scan) == [{"id": "0-0"}]
+        assert parallel_scan.stats["retries"] == 2
+        assert mock_sleep.call_count == 2
+
+    @patch("jc_boto3_helper.dynamodb_resource_table.time.sleep")
+    def test_throttling_exhausted(self, mock_sleep):
+        table = FakeSegmentTable(items_per_segment=1, throttle_first_calls=10)
+        parallel_scan = ParallelScan(lambda: table, total_segments=1, max_retries=2)
+
+        with pytest.raises(ValueError):
+            list(parallel_scan)
+
+    def test_early_stop(self):
+        parallel_scan = ParallelScan(
+            lambda: FakeSegmentTable(items_per_segment=1000),
+            total_segments=4,
+        )
+
+        items = iter(parallel_scan)
+        first_items = [next(items) for _ in range(3)]
+        items.close()
+
+        assert len(first_items) == 3
+        assert parallel_scan.stats["items"] < 4000
+
+    def test_parallel_scan_from_table(self):
+        ddb_table = make_table()
+
+        parallel_scan = ddb_table.parallel_scan(
+            total_segments=8, max_workers=3, ProjectionExpression="id"
+        )
+
+        assert parallel_scan.total_segments == 8
+        assert parallel_scan.max_workers == 3
+        assert parallel_scan.scan_kwargs == {"ProjectionExpression": "id"}
+
+
+class TestGetItem:
+    def test_item_not_logged(self):
+        signed_url = "https://cdn.example.com/media/a/index.m3u8?Policy=cG9saWN5&Signature=c2ln&Key-Pair-Id=KEY"
+        ddb_table = make_table()
+        ddb_table.table.get_item.return_value = {
+            "Item": {"id": "a", "url": signed_url, "expires_at": 1}
+        }
+        logger = dynamodb_resource_table.logger
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        level = logger.level
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+
+        try:
+            response = ddb_table.get_item(Key={"id": "a"})
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(level)
+
+        assert response["Item"]["url"] == signed_url
+        assert "get_item {'id': 'a'} - found" in stream.getvalue()
+        assert "Signature" not in stream.getvalue()
+
+
+class TestItemCache:
+    def make_cached_table(self, **item_cache_kwargs) -> DynamoDBResourceTable:
+        ddb_table = make_table()
+        ddb_table.item_cache = ItemCache(
+            **{"max_entries": 100, "max_bytes": 10000, **item_cache_kwargs}
+        )
+        ddb_table.table.get_item.side_effect = lambda **kwargs: (
+            {"Item": {"id": kwargs["Key"]["id"], "title": "Title"}}
+            if kwargs["Key"]["id"] != "missing"
+            else {}
+        )
+
+        return ddb_table
+
+    def test_get_item_read_through(self):
+        ddb_table = self.make_cached_table()
+
+        first = ddb_table.get_item(Key={"id": "abc"})
+        second = ddb_table.get_item(Key={"id": "abc"})
+
+        assert first == second == {"Item": {"id": "abc", "title": "Title"}}
+        ddb_table.table.get_item.assert_called_once()
+        assert ddb_table.item_cache.stats()["hits"] == 1
+
+    def test_keyed_by_projection(self):
+        ddb_table = self.make_cached_table()
+
+        ddb_table.get_item(Key={"id": "abc"})
+        ddb_table.get_item(Key={"id": "abc"}, ProjectionExpression="s3_key")
+        ddb_table.get_item(Key={"id": "abc"}, ProjectionExpression="s3_key")
+
+        assert ddb_table.table.get_item.call_count == 2
+
+    def test_not_found_cached(self):
+        ddb_table = self.make_cached_table()
+
+        assert ddb_table.get_item(Key={"id": "missing"}) == {"Item": None}
+        assert ddb_table.get_item(Key={"id": "missing"}) == {"Item": None}
+        ddb_table.table.get_item.assert_called_once()
+
+    def test_negative_caching_disabled(self):
+        ddb_table = self.make_cached_table(negative_ttl=0)
+
+        ddb_table.get_item(Key={"id": "missing"})
+        ddb_table.get_item(Key={"id": "missing"})
+
+        assert ddb_table.table.get_item.call_count == 2
+
+    def test_consistent_read_bypasses_cache(self):
+        ddb_table = self.make_cached_table()
+
+        ddb_table.get_item(Key={"id": "abc"})
+        ddb_table.get_item(Key={"id": "abc"}, ConsistentRead=True)
+
+        assert ddb_table.table.get_item.call_count == 2
+
+    def test_bounded_by_entries(self):
+        ddb_table = self.make_cached_table(max_entries=2)
+
+        for media_id in ["a", "b", "c"]:
+            ddb_table.get_item(Key={"id": media_id})
+        ddb_table.get_item(Key={"id": "a"})
+
+        assert ddb_table.table.get_item.call_count == 4
+        assert ddb_table.item_cache.stats()["evictions"] == 2
+
+    def test_record_type(self):
+        ddb_table = self.make_cached_table(record_type=MediaRecord)
+
+        first = ddb_table.get_item(Key={"id": "abc"})
+        first["Item"]["title"] = "Changed"
+        second = ddb_table.get_item(Key={"id": "abc"})
+
+        assert second == {"Item": {"id": "abc", "title": "Title"}}
+        assert ddb_table.get_item(Key={"id": "missing"}) == {"Item": None}
+        assert ddb_table.get_item(Key={"id": "missing"}) == {"Item": None}
+        assert ddb_table.table.get_item.call_count == 2
+
+
+class TestQuery:
+    def test_query_single_page(self):
+        ddb_table = make_table()
+        ddb_table.table.query.return_value = {
+            "Items": [{"id": "a"}],
+            "Count": 1,
+            "LastEvaluatedKey": {"id": "a", "genre": "drama"},
+        }
+        key_condition = Key("genre").eq("drama")
+
+        response = ddb_table.query(
+            IndexName="genre-created_at-index",
+            KeyConditionExpression=key_condition,
+            ScanIndexForward=False,
+            Limit=1,
+        )
+
+        assert response == {
+            "Items": [{"id": "a"}],
+            "Count": 1,
+            "LastEvaluatedKey": {"id": "a", "genre": "drama"},
+        }
+        ddb_table.table.query.assert_called_once_with(
+            IndexName="genre-created_at-index",
+            KeyConditionExpression=key_condition,
+            ScanIndexForward=False,
+            Limit=1,
+        )
+
+    def test_iter_query_follows_last_evaluated_key(self):
+        ddb_table = make_table()
+        ddb_table.table.query = make_scan_pages(total_items=25, page_size=10)
+
+        items = list(
+            ddb_table.iter_query(
+                max_items=12, KeyConditionExpression=Key("genre").eq("drama")
+            )
+        )
+
+        assert len(items) == 12
+        assert ddb_table.table.query.call_count == 2
+
+    def test_missing_key_condition(self):
+        with pytest.raises(ValueError):
+            make_table().query(IndexName="genre-created_at-index")
+        with pytest.raises(ValueError):
+            make_table().iter_query()
+
+
+class TestBuildProjection:
+    def test_placeholders(self):
+        assert build_projection(["id", "name", "s3_key"]) == {
+            "ProjectionExpression": "#id, #name, #s3_key",
+            "ExpressionAttributeNames": {
+                "#id": "id",
+                "#name": "name",
+                "#s3_key": "s3_key",
+            },
+        }
+
+    @pytest.mark.parametrize("attributes", [[], ["id", ""], ["id, title"], ["#id"]])
+    def test_invalid_attributes(self, attributes):
+        with pytest.raises(ValueError):
+            build_projection(attributes)
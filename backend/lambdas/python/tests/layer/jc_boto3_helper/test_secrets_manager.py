@@ -0,0 +1,153 @@
+import threading, pytest
+from unittest.mock import MagicMock
+from jc_boto3_helper.secrets_manager import SecretCache, SecretsManager
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_fetch(*version_ids: str) -> MagicMock:
+    return MagicMock(
+        side_effect=[
+            {
+                "SecretString": f"PEM {version_id}".encode("utf-8"),
+                "VersionId": version_id,
+            }
+            for version_id in version_ids
+        ]
+    )
+
+
+class TestSecretCache:
+    def test_hit_within_ttl(self):
+        clock = FakeClock()
+        fetch = make_fetch("v1")
+        cache = SecretCache(fetch, ttl=300, refresh_ahead=0, clock=clock)
+
+        assert cache.get(SecretId="secret")["VersionId"] == "v1"
+        clock.now = 299
+        assert cache.get(SecretId="secret")["VersionId"] == "v1"
+
+        fetch.assert_called_once_with(SecretId="secret")
+
+    def test_keyed_by_version_stage(self):
+        fetch = make_fetch("v1", "v0")
+        cache = SecretCache(fetch, ttl=300, clock=FakeClock())
+
+        assert cache.get(SecretId="secret")["VersionId"] == "v1"
+        assert (
+            cache.get(SecretId="secret", VersionStage="AWSPREVIOUS")["VersionId"]
+            == "v0"
+        )
+        assert (
+            cache.get(SecretId="secret", VersionStage="AWSCURRENT")["VersionId"] == "v1"
+        )
+        assert fetch.call_count == 2
+
+    def test_rotation_picked_up_after_expiry(self):
+        clock = FakeClock()
+        cache = SecretCache(
+            make_fetch("v1", "v2"), ttl=300, refresh_ahead=0, clock=clock
+        )
+
+        assert cache.get(SecretId="secret")["VersionId"] == "v1"
+        clock.now = 301
+        assert cache.get(SecretId="secret")["SecretString"] == b"PEM v2"
+
+    def test_background_refresh_before_expiry(self):
+        clock = FakeClock()
+        cache = SecretCache(
+            make_fetch("v1", "v2"), ttl=300, refresh_ahead=30, clock=clock
+        )
+
+        cache.get(SecretId="secret")
+        clock.now = 280
+        entry = cache._entries[SecretCache.cache_key(SecretId="secret")]
+
+        # the current value is served while the refresh runs in the background
+        assert cache.get(SecretId="secret")["VersionId"] == "v1"
+        entry.refresh_thread.join()
+        assert cache.get(SecretId="secret")["VersionId"] == "v2"
+
+    def test_stale_value_served_for_bounded_time_on_failure(self):
+        clock = FakeClock()
+        fetch = MagicMock(
+            side_effect=[
+                {"SecretString": b"PEM v1", "VersionId": "v1"},
+                ValueError("throttled"),
+                ValueError("throttled"),
+            ]
+        )
+        cache = SecretCache(fetch, ttl=300, refresh_ahead=0, max_stale=60, clock=clock)
+
+        cache.get(SecretId="secret")
+        clock.now = 330
+        assert cache.get(SecretId="secret")["VersionId"] == "v1"
+
+        clock.now = 361
+        with pytest.raises(ValueError):
+            cache.get(SecretId="secret")
+
+    def test_concurrent_misses_collapse_into_single_fetch(self):
+        release = threading.Event()
+        fetch_calls = []
+
+        def fetch(**kwargs):
+            fetch_calls.append(kwargs)
+            release.wait()
+            return {"SecretString": b"PEM", "VersionId": "v1"}
+
+        cache = SecretCache(fetch, ttl=300)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(cache.get(SecretId="secret"))
+            )
+            for _ in range(5)
+        ]
+
+        for thread in threads:
+            thread.start()
+        while not fetch_calls:
+            pass
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(fetch_calls) == 1
+        assert len(results) == 5
+
+
+class TestSecretsManager:
+    def test_get_secret_value_cached(self):
+        secrets_manager = SecretsManager("us-east-2", cache_ttl=300)
+        secrets_manager.client = MagicMock()
+        secrets_manager.client.get_secret_value.return_value = {
+            "SecretString": "PEM KEY",
+            "VersionId": "v1",
+        }
+
+        for _ in range(3):
+            secret = secrets_manager.get_secret_value(SecretId="secret")
+
+        assert secret == {"SecretString": b"PEM KEY", "VersionId": "v1"}
+        secrets_manager.client.get_secret_value.assert_called_once()
+
+    def test_get_secret_value_cache_disabled(self):
+        secrets_manager = SecretsManager("us-east-2", cache_ttl=0)
+        secrets_manager.client = MagicMock()
+        secrets_manager.client.get_secret_value.return_value = {"SecretString": "PEM"}
+
+        secrets_manager.get_secret_value(SecretId="secret")
+        secrets_manager.get_secret_value(SecretId="secret")
+
+        assert secrets_manager.client.get_secret_value.call_count == 2
+
+    def test_get_secret_value_missing_secret_id(self):
+        with pytest.raises(ValueError):
+            SecretsManager("us-east-2").get_secret_value(SecretId="")
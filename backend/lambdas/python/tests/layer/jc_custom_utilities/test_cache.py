@@ -0,0 +1,76 @@
+import pytest
+from jc_custom_utilities.cache import LRUCache, approximate_size
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache:
+    def test_least_recently_used_evicted(self):
+        cache = LRUCache(max_entries=2)
+
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_bounded_by_bytes(self):
+        cache = LRUCache(max_entries=10, max_bytes=100)
+
+        cache.put("a", "a", size=60)
+        cache.put("b", "b", size=60)
+        cache.put("too-large", "x", size=101)
+
+        assert "a" not in cache
+        assert "b" in cache
+        assert "too-large" not in cache
+        assert cache.current_bytes == 60
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = LRUCache(max_entries=10, ttl=10, clock=clock)
+
+        cache.put("default", 1)
+        cache.put("short", 2, ttl=1)
+        clock.now = 5
+
+        assert cache.get("default") == 1
+        assert cache.get("short") is None
+
+        clock.now = 10
+        assert cache.get("default", "missing") == "missing"
+        assert cache.stats()["expirations"] == 2
+
+    def test_stats(self):
+        cache = LRUCache(max_entries=10)
+
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+    def test_invalid_max_entries(self):
+        with pytest.raises(ValueError):
+            LRUCache(max_entries=0)
+
+
+class TestApproximateSize:
+    def test_nested_item(self):
+        item = {"id": "abc", "tags": ["a", "bb"], "duration": 10, "hd": True}
+
+        assert approximate_size(item) == (2 + 3) + (4 + 3) + (8 + 8) + (2 + 1)
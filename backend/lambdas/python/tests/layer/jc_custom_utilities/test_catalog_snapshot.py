@@ -0,0 +1,127 @@
+import json, pytest
+from jc_custom_utilities.catalog_snapshot import (
+    CatalogSnapshot,
+    SnapshotWriter,
+    listing_name,
+)
+
+ITEMS = [
+    {"id": "a", "title": "A", "genre": "drama", "catalog": "all", "created_at": 3},
+    {"id": "b", "title": "B", "genre": "comedy", "catalog": "all", "created_at": 1},
+    {"id": "c", "title": "C", "genre": "drama", "catalog": "all", "created_at": 2},
+    {"id": "d", "title": "D", "genre": "drama", "catalog": "all", "created_at": 5},
+    {"id": "e", "title": "E é"},
+]
+
+
+def write_snapshot(path, items=ITEMS) -> dict:
+    writer = SnapshotWriter(
+        str(path),
+        partition_attributes=("genre", "catalog"),
+        sort_attribute="created_at",
+    )
+    for item in items:
+        writer.add(item)
+    return writer.close()
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    write_snapshot(tmp_path / "catalog.snapshot")
+    snapshot = CatalogSnapshot(str(tmp_path / "catalog.snapshot"))
+    yield snapshot
+    snapshot.close()
+
+
+def read_all(snapshot, limit, **kwargs) -> list:
+    items, start_id = [], None
+
+    while True:
+        items_json, count, last_key = snapshot.read_page(
+            limit, exclusive_start_id=start_id, **kwargs
+        )
+        page = json.loads(items_json)
+        assert len(page) == count
+        items.extend(page)
+
+        if last_key is None:
+            return items
+        start_id = last_key["id"]
+
+
+class TestSnapshotWriter:
+    def test_version_is_digest_of_items(self, tmp_path):
+        footer = write_snapshot(tmp_path / "one.snapshot")
+
+        assert write_snapshot(tmp_path / "two.snapshot")["version"] == footer["version"]
+        assert write_snapshot(tmp_path / "three.snapshot", ITEMS[:-1])["version"] != (
+            footer["version"]
+        )
+        assert footer["item_count"] == len(ITEMS)
+
+
+class TestCatalogSnapshot:
+    def test_scan_pages_in_table_order(self, snapshot):
+        assert read_all(snapshot, 2) == ITEMS
+
+    def test_scan_last_key_shape(self, snapshot):
+        items_json, count, last_key = snapshot.read_page(2)
+
+        assert count == 2
+        assert last_key == {"id": "b"}
+        assert snapshot.read_page(10, exclusive_start_id="a")[1] == 4
+        assert snapshot.read_page(10, exclusive_start_id="e") == (b"[]", 0, None)
+
+    def test_listing_sorted_both_ways(self, snapshot):
+        drama = listing_name("genre", "drama")
+
+        assert [item["id"] for item in read_all(snapshot, 1, listing=drama)] == [
+            "c",
+            "a",
+            "d",
+        ]
+        assert [
+            item["id"] for item in read_all(snapshot, 2, listing=drama, forward=False)
+        ] == ["d", "a", "c"]
+
+    def test_listing_last_key_has_index_keys(self, snapshot):
+        _, _, last_key = snapshot.read_page(
+            2, listing=listing_name("catalog", "all"), forward=False
+        )
+
+        assert last_key == {"id": "a", "catalog": "all", "created_at": 3}
+
+    def test_items_without_sort_key_are_not_listed(self, snapshot):
+        items = read_all(snapshot, 10, listing=listing_name("catalog", "all"))
+
+        assert "e" not in [item["id"] for item in items]
+
+    def test_unknown_listing_is_empty(self, snapshot):
+        assert not snapshot.has_listing(listing_name("genre", "horror"))
+        assert snapshot.read_page(10, listing=listing_name("genre", "horror")) == (
+            b"[]",
+            0,
+            None,
+        )
+
+    def test_unknown_cursor_raises_key_error(self, snapshot):
+        with pytest.raises(KeyError):
+            snapshot.read_page(10, exclusive_start_id="z")
+        with pytest.raises(KeyError):
+            snapshot.read_page(
+                10, listing=listing_name("genre", "drama"), exclusive_start_id="b"
+            )
+
+    def test_iter_items(self, snapshot):
+        assert list(snapshot.iter_items(page_size=2)) == ITEMS
+
+    def test_get_item(self, snapshot):
+        assert json.loads(snapshot.get_item("e")) == ITEMS[-1]
+        assert snapshot.get_item("z") is None
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "other.snapshot"
+        path.write_bytes(b"not a snapshot at all")
+
+        with pytest.raises(ValueError):
+            CatalogSnapshot(str(path))
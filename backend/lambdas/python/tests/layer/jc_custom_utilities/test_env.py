@@ -0,0 +1,30 @@
+import pytest
+from unittest.mock import patch
+from jc_custom_utilities import env
+
+
+@pytest.fixture(autouse=True)
+def reset_env_loaded():
+    env._env_loaded = False
+    yield
+    env._env_loaded = True
+
+
+class TestLoadEnv:
+    def test_loaded_once_outside_lambda(self, monkeypatch):
+        monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+
+        with patch("dotenv.load_dotenv") as mock_load_dotenv:
+            env.load_env()
+            env.load_env()
+
+        mock_load_dotenv.assert_called_once()
+
+    def test_skipped_in_lambda(self, monkeypatch):
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "get_medias")
+
+        with patch("dotenv.load_dotenv") as mock_load_dotenv:
+            env.load_env()
+
+        mock_load_dotenv.assert_not_called()
+        assert env.running_in_lambda()
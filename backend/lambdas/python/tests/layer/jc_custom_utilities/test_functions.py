@@ -1,5 +1,20 @@
-import json
-from jc_custom_utilities.functions import generate_api_response
+import json, pytest, gzip, base64
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+from urllib.parse import quote
+from jc_custom_utilities import functions
+from jc_custom_utilities.functions import (
+    generate_api_response,
+    generate_not_modified_response,
+    compute_etag,
+    etag_matches,
+    get_header,
+    negotiate_content_encoding,
+    parse_request_body,
+    serialize_body,
+    encode_cursor,
+    decode_cursor,
+)
 
 
 class TestGenerateApiResponse:
@@ -42,3 +57,177 @@ class TestGenerateApiResponse:
         output_body = json.loads(output["body"])
 
         assert output_body == body
+
+    def test_additional_headers(self):
+        output = generate_api_response(
+            200,
+            {"key": "value"},
+            headers={"Cache-Control": "no-store"},
+            multi_value_headers={"Set-Cookie": ["a=1", "b=2"]},
+        )
+
+        assert output["headers"] == {
+            "Content-Type": "application/json",
+            "Cache-Control": "no-store",
+        }
+        assert output["multiValueHeaders"] == {"Set-Cookie": ["a=1", "b=2"]}
+        assert "multiValueHeaders" not in generate_api_response(200, {})
+
+
+class TestParseRequestBody:
+    def test_json_string_body(self):
+        assert parse_request_body({"body": '{"media_ids": ["a"]}'}) == {
+            "media_ids": ["a"]
+        }
+
+    def test_dict_and_empty_body(self):
+        assert parse_request_body({"body": {"key": "value"}}) == {"key": "value"}
+        assert parse_request_body({"body": None}) == {}
+
+    def test_invalid_body(self):
+        with pytest.raises(ValueError):
+            parse_request_body({"body": "not json"})
+        with pytest.raises(ValueError):
+            parse_request_body({"body": "[1, 2]"})
+
+
+class TestCursor:
+    def test_round_trip(self):
+        last_evaluated_key = {"id": "abc", "created_at": Decimal("1728413887")}
+
+        cursor = encode_cursor(last_evaluated_key)
+
+        assert decode_cursor(cursor) == last_evaluated_key
+        assert isinstance(decode_cursor(cursor)["created_at"], Decimal)
+
+    def test_url_safe_and_compact(self):
+        cursor = encode_cursor({"id": "?/+ &=" * 5})
+
+        assert cursor == quote(cursor, safe="")
+        assert "=" not in cursor
+
+    def test_no_next_page(self):
+        assert encode_cursor(None) is None
+        assert encode_cursor({}) is None
+
+    def test_invalid_cursor(self):
+        for cursor in ["not a cursor", "e30", encode_cursor({"id": "a"})[:-3] + "!!!"]:
+            with pytest.raises(ValueError):
+                decode_cursor(cursor)
+
+
+class TestSerializer:
+    def test_dynamodb_types(self):
+        body = {
+            "duration": Decimal("120"),
+            "rating": Decimal("4.5"),
+            "tags": {"drama"},
+            "thumbnail": b"\x00\x01",
+        }
+
+        output = generate_api_response(200, body)
+
+        assert json.loads(output["body"]) == {
+            "duration": 120,
+            "rating": 4.5,
+            "tags": ["drama"],
+            "thumbnail": "AAE=",
+        }
+
+    def test_standard_library_fallback(self):
+        with patch.object(functions, "orjson", None):
+            assert serialize_body({"count": Decimal("3")}) == b'{"count":3}'
+
+    def test_unsupported_type(self):
+        with pytest.raises(TypeError):
+            serialize_body({"value": object()})
+
+
+class TestCompression:
+    large_body = {"Items": [{"id": str(i), "title": "Title"} for i in range(200)]}
+
+    @pytest.fixture(autouse=True)
+    def compression_enabled(self):
+        with patch.object(functions, "COMPRESSION_THRESHOLD_BYTES", 1024):
+            yield
+
+    def test_disabled_when_threshold_is_zero(self):
+        with patch.object(functions, "COMPRESSION_THRESHOLD_BYTES", 0):
+            output = generate_api_response(200, self.large_body, accept_encoding="gzip")
+
+        assert "isBase64Encoded" not in output
+        assert "Content-Encoding" not in output["headers"]
+        assert json.loads(output["body"]) == self.large_body
+
+    def test_gzip_above_threshold(self):
+        output = generate_api_response(
+            200, self.large_body, accept_encoding="gzip, deflate"
+        )
+
+        assert output["isBase64Encoded"] is True
+        assert output["headers"]["Content-Encoding"] == "gzip"
+        assert output["headers"]["Vary"] == "Accept-Encoding"
+        assert (
+            json.loads(gzip.decompress(base64.b64decode(output["body"])))
+            == self.large_body
+        )
+
+    def test_small_body_not_compressed(self):
+        output = generate_api_response(200, {"key": "value"}, accept_encoding="gzip")
+
+        assert "isBase64Encoded" not in output
+        assert "Content-Encoding" not in output["headers"]
+
+    def test_no_accept_encoding(self):
+        output = generate_api_response(200, self.large_body)
+
+        assert json.loads(output["body"]) == self.large_body
+
+    def test_negotiate_content_encoding(self):
+        assert negotiate_content_encoding("gzip;q=0.5, identity") == "gzip"
+        assert negotiate_content_encoding("*") == "gzip"
+        assert negotiate_content_encoding("gzip;q=0") is None
+        assert negotiate_content_encoding("identity") is None
+        assert negotiate_content_encoding(None) is None
+
+        with patch.object(functions, "brotli", MagicMock()):
+            assert negotiate_content_encoding("gzip, br") == "br"
+            assert negotiate_content_encoding("gzip, br;q=0.1") == "gzip"
+
+
+class TestGetHeader:
+    def test_case_insensitive(self):
+        event = {"headers": {"accept-encoding": "gzip"}}
+
+        assert get_header(event, "Accept-Encoding") == "gzip"
+        assert get_header({"headers": None}, "Accept-Encoding") is None
+
+
+class TestConditionalResponses:
+    def test_compute_etag_stable(self):
+        etag = compute_etag(b'{"id":"abc"}')
+
+        assert etag == compute_etag(b'{"id":"abc"}')
+        assert etag != compute_etag(b'{"id":"abd"}')
+        assert etag.startswith('W/"') and etag.endswith('"')
+
+    def test_etag_matches(self):
+        etag = compute_etag(b"body")
+        opaque_tag = etag.removeprefix("W/")
+
+        assert etag_matches(etag, etag)
+        assert etag_matches(opaque_tag, etag)
+        assert etag_matches(f'"other", {opaque_tag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_not_modified_response(self):
+        output = generate_not_modified_response(headers={"ETag": '"abc"'})
+
+        assert output == {"statusCode": 304, "headers": {"ETag": '"abc"'}, "body": ""}
+
+    def test_pre_serialized_body(self):
+        output = generate_api_response(200, b'{"id":"abc"}')
+
+        assert output["body"] == '{"id":"abc"}'
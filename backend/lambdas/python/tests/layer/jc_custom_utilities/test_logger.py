@@ -0,0 +1,113 @@
+import io, json, logging, pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from jc_custom_utilities import logger as logger_module
+from jc_custom_utilities.logger import (
+    CustomFormatter,
+    JsonFormatter,
+    inject_invocation_context,
+    logger_config,
+    start_invocation,
+)
+
+
+@pytest.fixture
+def json_logger():
+    logger = logger_config("test_logger_json")
+    stream = io.StringIO()
+    logger.handlers[0].setStream(stream)
+    logger.handlers[0].setFormatter(JsonFormatter())
+    logger.setLevel(logging.INFO)
+
+    yield logger, stream
+
+    logger_module.invocation_context.clear()
+
+
+def read_records(stream: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestJsonFormatter:
+    def test_single_line_record_with_invocation_context(self, json_logger):
+        logger, stream = json_logger
+        start_invocation(context=SimpleNamespace(aws_request_id="req-1"))
+
+        logger.info("read %s items", 3, extra={"media_id": "abc123"})
+
+        [record] = read_records(stream)
+        assert record["message"] == "read 3 items"
+        assert record["level"] == "INFO"
+        assert record["request_id"] == "req-1"
+        assert record["media_id"] == "abc123"
+        assert "cold_start" in record
+
+    def test_payload_logged_as_object(self, json_logger):
+        logger, stream = json_logger
+
+        logger.info({"Item": {"id": "abc123"}})
+
+        assert read_records(stream)[0]["payload"] == {"Item": {"id": "abc123"}}
+
+    def test_large_payload_truncated(self, json_logger):
+        logger, stream = json_logger
+
+        with patch.object(logger_module, "max_payload_bytes", 20):
+            logger.info({"description": "x" * 100})
+            logger.info("y" * 100)
+
+        payload_record, message_record = read_records(stream)
+        assert payload_record["payload"].endswith("chars)")
+        assert message_record["message"].startswith("y" * 20 + "...(truncated")
+
+    def test_arguments_not_formatted_below_level(self, json_logger):
+        logger, stream = json_logger
+
+        class Expensive:
+            def __str__(self):
+                raise AssertionError("formatted below the log level")
+
+        logger.debug("payload %s", Expensive())
+
+        assert stream.getvalue() == ""
+
+
+class TestInvocationContext:
+    def test_cold_start_only_on_first_invocation(self):
+        with patch.object(logger_module, "_cold_start", True):
+            start_invocation({"requestContext": {"requestId": "req-1"}})
+            assert logger_module.invocation_context["cold_start"] is True
+            assert logger_module.invocation_context["request_id"] == "req-1"
+
+            start_invocation({})
+            assert logger_module.invocation_context["cold_start"] is False
+
+    def test_debug_sampling(self, json_logger):
+        logger, stream = json_logger
+
+        with patch.object(logger_module, "debug_sample_rate", 1.0):
+            start_invocation({})
+            logger.debug("sampled")
+
+        with patch.object(logger_module, "debug_sample_rate", 0.0):
+            start_invocation({})
+            logger.debug("not sampled")
+
+        assert [record["message"] for record in read_records(stream)] == ["sampled"]
+
+    def test_decorator_passes_event_and_context(self):
+        @inject_invocation_context
+        def handler(event, context):
+            return logger_module.invocation_context["request_id"]
+
+        assert handler({}, SimpleNamespace(aws_request_id="req-2")) == "req-2"
+
+
+class TestCustomFormatter:
+    def test_record_not_mutated(self):
+        record = logging.makeLogRecord({"msg": {"id": "abc123"}, "levelname": "INFO"})
+
+        formatted = CustomFormatter("%(message)s").format(record)
+
+        assert json.loads(formatted) == {"id": "abc123"}
+        assert record.msg == {"id": "abc123"}
@@ -0,0 +1,52 @@
+import json, pytest
+from decimal import Decimal
+from jc_custom_utilities.functions import serialize_body
+from jc_custom_utilities.media_record import MediaRecord
+
+ITEM = {
+    "title": "Title",
+    "id": "abc",
+    "genre": "drama",
+    "tags": ["space", "crew"],
+    "duration": Decimal("5400"),
+    "rating": Decimal("4.5"),
+    "s3_key": "media/abc/index.m3u8",
+}
+
+
+def test_round_trip_keeps_attribute_order():
+    item = MediaRecord.from_item(ITEM).to_item()
+
+    assert item == {**ITEM, "duration": 5400, "rating": 4.5}
+    assert list(item) == list(ITEM)
+    assert isinstance(item["tags"], list)
+
+
+def test_same_json_as_item():
+    assert serialize_body(MediaRecord.from_item(ITEM).to_item()) == serialize_body(ITEM)
+
+
+def test_repeated_values_are_shared():
+    first = MediaRecord.from_item(json.loads(json.dumps({"genre": "drama"})))
+    second = MediaRecord.from_item(json.loads(json.dumps({"genre": "drama"})))
+
+    assert first.genre is second.genre
+
+
+def test_extra_attributes():
+    record = MediaRecord.from_item({"id": "abc", "studio": "JC", "title": "Title"})
+
+    assert record["studio"] == "JC"
+    assert list(record.to_item()) == ["id", "studio", "title"]
+
+
+def test_missing_attributes():
+    record = MediaRecord.from_item({"id": "abc"})
+
+    assert "title" not in record
+    assert record.get("title") is None
+    assert record.get("title", "") == ""
+    with pytest.raises(KeyError):
+        record["title"]
+    with pytest.raises(KeyError):
+        record["unknown"]
@@ -0,0 +1,136 @@
+import json, pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from jc_custom_utilities import metrics as metrics_module
+from jc_custom_utilities.metrics import (
+    MAX_VALUES_PER_METRIC,
+    increment,
+    log_metrics,
+    metrics,
+    timer,
+)
+
+
+@pytest.fixture
+def emitted():
+    lines = []
+    metrics.reset()
+
+    with patch.object(metrics, "emit", lines.append):
+        yield lines
+
+    metrics.reset()
+
+
+def read_document(lines: list[str]) -> dict:
+    [line] = lines
+    return json.loads(line)
+
+
+class TestTimer:
+    def test_context_manager_and_decorator(self):
+        metrics.reset()
+
+        with timer("stage"):
+            pass
+
+        @timer("stage")
+        def timed():
+            return "result"
+
+        assert timed() == "result"
+        assert len(metrics.timings["stage"]) == 2
+        assert all(value >= 0 for value in metrics.timings["stage"])
+
+    def test_recorded_when_block_raises(self):
+        metrics.reset()
+
+        with pytest.raises(KeyError):
+            with timer("stage"):
+                raise KeyError("id")
+
+        assert "stage" in metrics.timings
+
+    def test_values_per_metric_bounded(self):
+        metrics.reset()
+
+        for _ in range(MAX_VALUES_PER_METRIC + 10):
+            metrics.record_timing("stage", 1.0)
+
+        assert len(metrics.timings["stage"]) == MAX_VALUES_PER_METRIC
+
+    def test_disabled(self):
+        metrics.reset()
+
+        with patch.object(metrics_module, "enabled", False):
+            with timer("stage"):
+                pass
+            increment("hit")
+
+        assert metrics.timings == {}
+        assert metrics.counters == {}
+
+
+class TestFlush:
+    def test_emf_document(self, emitted):
+        metrics.set_dimension("function_name", "get_media_url")
+        metrics.record_timing("ddb_get_item", 1.5)
+        metrics.record_timing("sign_url", 0.5)
+        metrics.record_timing("sign_url", 0.7)
+        increment("url_cache_hit")
+        increment("url_cache_hit")
+
+        metrics.flush()
+
+        document = read_document(emitted)
+        [directive] = document["_aws"]["CloudWatchMetrics"]
+        assert directive["Dimensions"] == [["function_name"]]
+        assert {"Name": "ddb_get_item", "Unit": "Milliseconds"} in directive["Metrics"]
+        assert {"Name": "url_cache_hit", "Unit": "Count"} in directive["Metrics"]
+        assert document["function_name"] == "get_media_url"
+        assert document["ddb_get_item"] == 1.5
+        assert document["sign_url"] == [0.5, 0.7]
+        assert document["url_cache_hit"] == 2
+
+    def test_nothing_emitted_without_metrics(self, emitted):
+        assert metrics.flush() is None
+        assert emitted == []
+
+    def test_cleared_after_flush(self, emitted):
+        increment("item_cache_hit")
+        metrics.flush()
+        metrics.flush()
+
+        assert len(emitted) == 1
+
+
+class TestLogMetrics:
+    def test_flushed_once_per_invocation(self, emitted):
+        @log_metrics
+        def handler(event, context):
+            increment("item_cache_miss")
+            return {"statusCode": 200}
+
+        context = SimpleNamespace(function_name="get_medias", aws_request_id="req-1")
+
+        with patch.object(metrics_module, "_cold_start", True):
+            handler({}, context)
+            handler({}, context)
+
+        first, second = [json.loads(line) for line in emitted]
+        assert first["cold_start"] == 1
+        assert second["cold_start"] == 0
+        assert first["request_id"] == "req-1"
+        assert first["function_name"] == "get_medias"
+        assert first["item_cache_miss"] == 1
+        assert "handler_duration" in first
+
+    def test_flushed_when_handler_raises(self, emitted):
+        @log_metrics
+        def handler(event, context):
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError):
+            handler({}, None)
+
+        assert "handler_duration" in read_document(emitted)
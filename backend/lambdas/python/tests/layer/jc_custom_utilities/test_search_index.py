@@ -0,0 +1,92 @@
+import pytest
+from jc_custom_utilities.search_index import SearchIndex, tokenize
+
+ITEMS = [
+    {"id": "1", "title": "Star Wars", "genre": "scifi", "tags": ["space", "classic"]},
+    {"id": "2", "title": "Stardust", "genre": "fantasy", "tags": ["magic"]},
+    {"id": "3", "title": "A Star Is Born", "genre": "drama", "tags": []},
+    {"id": "4", "title": "Amélie", "genre": "comedy", "tags": ["paris"]},
+    {"id": "5", "title": "The Martian", "genre": "scifi", "tags": ["space", "mars"]},
+]
+
+
+@pytest.fixture(params=[256, 0], ids=["word_cache", "no_word_cache"])
+def index(request):
+    index = SearchIndex(word_cache_size=request.param)
+    index.sync(ITEMS)
+    return index
+
+
+class TestTokenize:
+    def test_lowercase_accent_free_words(self):
+        assert tokenize("Amélie (2001) - Director's Cut") == [
+            "amelie",
+            "2001",
+            "director",
+            "s",
+            "cut",
+        ]
+
+    def test_lists_and_none(self):
+        assert tokenize(["Space", "Sci-Fi"]) == ["space", "sci", "fi"]
+        assert tokenize(None) == []
+
+
+class TestSearchIndex:
+    def test_exact_match_ranks_above_prefix_match(self, index):
+        ids, total = index.search("star", 10)
+
+        assert total == 3
+        assert ids[-1] == "2"
+        assert set(ids[:2]) == {"1", "3"}
+
+    def test_every_word_must_match(self, index):
+        assert index.search("star wa", 10) == (["1"], 1)
+        assert index.search("star mars", 10) == ([], 0)
+
+    def test_title_outranks_tags(self, index):
+        index.upsert({"id": "6", "title": "Space Jam", "genre": "comedy", "tags": []})
+
+        assert index.search("space", 10)[0][0] == "6"
+
+    def test_accents_and_case(self, index):
+        assert index.search("AMELIE", 10) == (["4"], 1)
+
+    def test_short_words_match_exactly(self, index):
+        assert index.search("a", 10) == (["3"], 1)
+
+    def test_filters(self, index):
+        assert index.search("space", 10, filters={"genre": "scifi"})[1] == 2
+        assert index.search("star", 10, filters={"genre": "drama"}) == (["3"], 1)
+        assert index.search("star", 10, filters={"genre": "horror"}) == ([], 0)
+
+    def test_pages_are_stable(self, index):
+        ids, total = index.search("star", 10)
+
+        pages = [index.search("star", 1, offset)[0] for offset in range(total)]
+
+        assert [page[0] for page in pages] == ids
+        assert index.search("star", 10, offset=total) == ([], total)
+
+    def test_upsert_replaces_item(self, index):
+        generation = index.generation
+
+        assert index.upsert(dict(ITEMS[0])) is False
+        assert index.generation == generation
+
+        assert index.upsert({**ITEMS[0], "title": "Star Trek"}) is True
+        assert index.search("wars", 10) == ([], 0)
+        assert index.search("trek", 10) == (["1"], 1)
+
+    def test_sync_removes_missing_items(self, index):
+        assert index.sync(ITEMS[1:]) == (0, 1)
+        assert "1" not in index
+        assert index.search("wars", 10) == ([], 0)
+
+        # the freed document number is reused
+        index.upsert({"id": "7", "title": "War Horse", "genre": "drama"})
+        assert index.search("war", 10) == (["7"], 1)
+        assert len(index) == 5
+
+    def test_empty_query(self, index):
+        assert index.search(" - ", 10) == ([], 0)
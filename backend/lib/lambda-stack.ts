@@ -3,6 +3,8 @@ import { Construct } from "constructs";
 import { NestedStack, NestedStackProps } from "aws-cdk-lib";
 import * as lambda from "aws-cdk-lib/aws-lambda";
 import * as iam from "aws-cdk-lib/aws-iam";
+import * as events from "aws-cdk-lib/aws-events";
+import * as targets from "aws-cdk-lib/aws-events-targets";
 import * as path from "path";
 import * as dotenv from "dotenv";
 dotenv.config();
@@ -35,9 +37,133 @@ export class LambdaStack extends NestedStack {
     // Custom inline policy for specific needs
     getMediasLambdaRole.addToPolicy(
       new iam.PolicyStatement({
-        actions: ["s3:Scan", "s3:GetItem"],
+        actions: [
+          "dynamodb:Scan",
+          "dynamodb:GetItem",
+          "dynamodb:Query",
+          "dynamodb:BatchGetItem",
+        ],
+        resources: [
+          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.METADATA_DDB_TABLE_NAME}`,
+          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.METADATA_DDB_TABLE_NAME}/index/*`,
+        ],
+      })
+    );
+    getMediasLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["s3:GetObject"],
+        resources: [
+          `arn:aws:s3:::${process.env.CATALOG_SNAPSHOT_BUCKET}/${process.env.CATALOG_SNAPSHOT_PREFIX || "catalog/"}*`,
+        ],
+      })
+    );
+
+    // buildCatalogSnapshotLambdaRole Execution Roles:
+    const buildCatalogSnapshotLambdaRole = new iam.Role(
+      this,
+      "buildCatalogSnapshotLambdaRole",
+      {
+        assumedBy: new iam.ServicePrincipal("lambda.amazonaws.com"),
+      }
+    );
+    // AWS managed basic lambda execution role
+    buildCatalogSnapshotLambdaRole.addManagedPolicy(
+      iam.ManagedPolicy.fromAwsManagedPolicyName(
+        "service-role/AWSLambdaBasicExecutionRole"
+      )
+    );
+    // Custom inline policy for specific needs
+    buildCatalogSnapshotLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["dynamodb:Scan"],
         resources: [
-          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.METADATA_TABLE_NAME}`,
+          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.METADATA_DDB_TABLE_NAME}`,
+        ],
+      })
+    );
+    buildCatalogSnapshotLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["s3:GetObject", "s3:PutObject"],
+        resources: [
+          `arn:aws:s3:::${process.env.CATALOG_SNAPSHOT_BUCKET}/${process.env.CATALOG_SNAPSHOT_PREFIX || "catalog/"}*`,
+        ],
+      })
+    );
+
+    // getMediaUrlLambdaRole Execution Roles:
+    const getMediaUrlLambdaRole = new iam.Role(this, "getMediaUrlLambdaRole", {
+      assumedBy: new iam.ServicePrincipal("lambda.amazonaws.com"),
+    });
+    // AWS managed basic lambda execution role
+    getMediaUrlLambdaRole.addManagedPolicy(
+      iam.ManagedPolicy.fromAwsManagedPolicyName(
+        "service-role/AWSLambdaBasicExecutionRole"
+      )
+    );
+    // Custom inline policy for specific needs
+    getMediaUrlLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["dynamodb:GetItem", "dynamodb:BatchGetItem"],
+        resources: [
+          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.METADATA_DDB_TABLE_NAME}`,
+        ],
+      })
+    );
+    // pre-signed urls written by presign_warmer
+    getMediaUrlLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["dynamodb:GetItem"],
+        resources: [
+          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.PRESIGNED_URL_DDB_TABLE_NAME}`,
+        ],
+      })
+    );
+    getMediaUrlLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["secretsmanager:GetSecretValue"],
+        resources: [
+          `arn:aws:secretsmanager:${process.env.DEFAULT_AWS_REGION}:${this.account}:secret:${process.env.CF_PRIVATE_KEY_SECRET_ID}*`,
+        ],
+      })
+    );
+
+    // presignWarmerLambdaRole Execution Roles:
+    const presignWarmerLambdaRole = new iam.Role(
+      this,
+      "presignWarmerLambdaRole",
+      {
+        assumedBy: new iam.ServicePrincipal("lambda.amazonaws.com"),
+      }
+    );
+    // AWS managed basic lambda execution role
+    presignWarmerLambdaRole.addManagedPolicy(
+      iam.ManagedPolicy.fromAwsManagedPolicyName(
+        "service-role/AWSLambdaBasicExecutionRole"
+      )
+    );
+    // Custom inline policy for specific needs
+    presignWarmerLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["dynamodb:Query", "dynamodb:BatchGetItem"],
+        resources: [
+          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.METADATA_DDB_TABLE_NAME}`,
+          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.METADATA_DDB_TABLE_NAME}/index/*`,
+        ],
+      })
+    );
+    presignWarmerLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["dynamodb:BatchWriteItem"],
+        resources: [
+          `arn:aws:dynamodb:${process.env.DEFAULT_AWS_REGION}:${this.account}:table/${process.env.PRESIGNED_URL_DDB_TABLE_NAME}`,
+        ],
+      })
+    );
+    presignWarmerLambdaRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ["secretsmanager:GetSecretValue"],
+        resources: [
+          `arn:aws:secretsmanager:${process.env.DEFAULT_AWS_REGION}:${this.account}:secret:${process.env.CF_PRIVATE_KEY_SECRET_ID}*`,
         ],
       })
     );
@@ -65,12 +191,52 @@ export class LambdaStack extends NestedStack {
       code: lambda.Code.fromAsset(
         path.join(__dirname, "../lambdas/python/function/get_medias")
       ),
+      role: getMediasLambdaRole,
       environment: {
         METADATA_DDB_TABLE_NAME: process.env.METADATA_DDB_TABLE_NAME || "",
         LOG_LEVEL: process.env.LOG_LEVEL || "",
+        LOG_FORMAT: process.env.LOG_FORMAT || "json",
+        LOG_DEBUG_SAMPLE_RATE: process.env.LOG_DEBUG_SAMPLE_RATE || "0",
+        LOG_MAX_PAYLOAD_BYTES: process.env.LOG_MAX_PAYLOAD_BYTES || "8192",
+        METRICS_ENABLED: process.env.METRICS_ENABLED || "true",
+        METRICS_NAMESPACE: process.env.METRICS_NAMESPACE || "JCMediaStreaming",
+        BOTO_MAX_POOL_CONNECTIONS: process.env.BOTO_MAX_POOL_CONNECTIONS || "20",
+        BOTO_CONNECT_TIMEOUT: process.env.BOTO_CONNECT_TIMEOUT || "1",
+        BOTO_READ_TIMEOUT: process.env.BOTO_READ_TIMEOUT || "3",
+        BOTO_RETRY_MODE: process.env.BOTO_RETRY_MODE || "adaptive",
+        BOTO_MAX_ATTEMPTS: process.env.BOTO_MAX_ATTEMPTS || "3",
+        BOTO_PREWARM: process.env.BOTO_PREWARM || "true",
+        RESPONSE_COMPRESSION_THRESHOLD:
+          process.env.RESPONSE_COMPRESSION_THRESHOLD || "0",
+        MEDIAS_DEFAULT_PAGE_SIZE: process.env.MEDIAS_DEFAULT_PAGE_SIZE || "50",
+        MEDIAS_MAX_PAGE_SIZE: process.env.MEDIAS_MAX_PAGE_SIZE || "100",
+        GENRE_INDEX_NAME: process.env.GENRE_INDEX_NAME || "genre-created_at-index",
+        CATALOG_INDEX_NAME: process.env.CATALOG_INDEX_NAME || "catalog-created_at-index",
+        CATALOG_PARTITION_VALUE: process.env.CATALOG_PARTITION_VALUE || "media",
+        METADATA_TABLE_BACKEND: process.env.METADATA_TABLE_BACKEND || "client",
+        MEDIAS_CACHE_MAX_AGE: process.env.MEDIAS_CACHE_MAX_AGE || "60",
+        RESPONSE_CACHE_TTL: process.env.RESPONSE_CACHE_TTL || "30",
+        RESPONSE_CACHE_MAX_ENTRIES: process.env.RESPONSE_CACHE_MAX_ENTRIES || "256",
+        RESPONSE_CACHE_MAX_BYTES: process.env.RESPONSE_CACHE_MAX_BYTES || "33554432",
+        ITEM_CACHE_TTL: process.env.ITEM_CACHE_TTL || "60",
+        ITEM_CACHE_NEGATIVE_TTL: process.env.ITEM_CACHE_NEGATIVE_TTL || "5",
+        ITEM_CACHE_MAX_ENTRIES: process.env.ITEM_CACHE_MAX_ENTRIES || "10000",
+        ITEM_CACHE_MAX_BYTES: process.env.ITEM_CACHE_MAX_BYTES || "33554432",
+        CATALOG_SNAPSHOT_BUCKET: process.env.CATALOG_SNAPSHOT_BUCKET || "",
+        CATALOG_SNAPSHOT_PREFIX: process.env.CATALOG_SNAPSHOT_PREFIX || "catalog/",
+        CATALOG_SNAPSHOT_CHECK_INTERVAL:
+          process.env.CATALOG_SNAPSHOT_CHECK_INTERVAL || "60",
+        SEARCH_INDEX_REFRESH_INTERVAL:
+          process.env.SEARCH_INDEX_REFRESH_INTERVAL || "60",
+        SEARCH_INDEX_REBUILD_INTERVAL:
+          process.env.SEARCH_INDEX_REBUILD_INTERVAL || "3600",
+        SEARCH_INDEX_BUILD_WAIT: process.env.SEARCH_INDEX_BUILD_WAIT || "1",
+        SEARCH_INDEX_RETRY_AFTER: process.env.SEARCH_INDEX_RETRY_AFTER || "5",
       },
       layers: [pythonLayer],
       timeout: cdk.Duration.seconds(15),
+      // room in /tmp for the decompressed catalog snapshot
+      ephemeralStorageSize: cdk.Size.mebibytes(1024),
     });
 
     cdk.Tags.of(getMedias).add(mainStack.stackName, "get_medias");
@@ -85,13 +251,41 @@ export class LambdaStack extends NestedStack {
       code: lambda.Code.fromAsset(
         path.join(__dirname, "../lambdas/python/function/get_media_url")
       ),
+      role: getMediaUrlLambdaRole,
       environment: {
         CF_PRIVATE_KEY_SECRET_ID: process.env.CF_PRIVATE_KEY_SECRET_ID || "",
         CF_PUBLIC_KEY_ID: process.env.CF_PUBLIC_KEY_ID || "",
-        CF_DEFAULT_URL_EXP: process.env.CF_DEFAULT_URL_EXP || "",
+        CF_DEFAULT_URL_EXP: process.env.CF_DEFAULT_URL_EXP || "3600",
         LOG_LEVEL: process.env.LOG_LEVEL || "",
+        LOG_FORMAT: process.env.LOG_FORMAT || "json",
+        LOG_DEBUG_SAMPLE_RATE: process.env.LOG_DEBUG_SAMPLE_RATE || "0",
+        LOG_MAX_PAYLOAD_BYTES: process.env.LOG_MAX_PAYLOAD_BYTES || "8192",
+        METRICS_ENABLED: process.env.METRICS_ENABLED || "true",
+        METRICS_NAMESPACE: process.env.METRICS_NAMESPACE || "JCMediaStreaming",
+        BOTO_MAX_POOL_CONNECTIONS: process.env.BOTO_MAX_POOL_CONNECTIONS || "20",
+        BOTO_CONNECT_TIMEOUT: process.env.BOTO_CONNECT_TIMEOUT || "1",
+        BOTO_READ_TIMEOUT: process.env.BOTO_READ_TIMEOUT || "3",
+        BOTO_RETRY_MODE: process.env.BOTO_RETRY_MODE || "adaptive",
+        BOTO_MAX_ATTEMPTS: process.env.BOTO_MAX_ATTEMPTS || "3",
+        BOTO_PREWARM: process.env.BOTO_PREWARM || "true",
+        RESPONSE_COMPRESSION_THRESHOLD:
+          process.env.RESPONSE_COMPRESSION_THRESHOLD || "0",
         CLOUDFRONT_DOMAIN: process.env.CLOUDFRONT_DOMAIN || "",
         METADATA_DDB_TABLE_NAME: process.env.METADATA_DDB_TABLE_NAME || "",
+        CF_COOKIE_DOMAIN: process.env.CF_COOKIE_DOMAIN || "",
+        CF_URL_CACHE_BUCKET_SECONDS: process.env.CF_URL_CACHE_BUCKET_SECONDS || "60",
+        CF_URL_CACHE_MAX_ENTRIES: process.env.CF_URL_CACHE_MAX_ENTRIES || "10000",
+        CF_POLICY_TEMPLATE_MAX_ENTRIES:
+          process.env.CF_POLICY_TEMPLATE_MAX_ENTRIES || "10000",
+        IO_MAX_WORKERS: process.env.IO_MAX_WORKERS || "2",
+        SECRET_CACHE_TTL: process.env.SECRET_CACHE_TTL || "300",
+        SECRET_CACHE_REFRESH_AHEAD: process.env.SECRET_CACHE_REFRESH_AHEAD || "30",
+        SECRET_CACHE_MAX_STALE: process.env.SECRET_CACHE_MAX_STALE || "300",
+        ITEM_CACHE_TTL: process.env.ITEM_CACHE_TTL || "60",
+        ITEM_CACHE_NEGATIVE_TTL: process.env.ITEM_CACHE_NEGATIVE_TTL || "5",
+        ITEM_CACHE_MAX_ENTRIES: process.env.ITEM_CACHE_MAX_ENTRIES || "10000",
+        ITEM_CACHE_MAX_BYTES: process.env.ITEM_CACHE_MAX_BYTES || "33554432",
+        PRESIGNED_URL_DDB_TABLE_NAME: process.env.PRESIGNED_URL_DDB_TABLE_NAME || "",
       },
       layers: [pythonLayer],
       timeout: cdk.Duration.seconds(15),
@@ -102,5 +296,103 @@ export class LambdaStack extends NestedStack {
     new cdk.CfnOutput(this, "getMediaUrlARN", {
       value: getMediaUrl.functionArn,
     });
+
+    const buildCatalogSnapshot = new lambda.Function(
+      this,
+      "build_catalog_snapshot",
+      {
+        runtime: python3_12_runtime,
+        handler: "main.handler",
+        code: lambda.Code.fromAsset(
+          path.join(__dirname, "../lambdas/python/function/build_catalog_snapshot")
+        ),
+        role: buildCatalogSnapshotLambdaRole,
+        environment: {
+          METADATA_DDB_TABLE_NAME: process.env.METADATA_DDB_TABLE_NAME || "",
+          LOG_LEVEL: process.env.LOG_LEVEL || "",
+          LOG_FORMAT: process.env.LOG_FORMAT || "json",
+          METRICS_ENABLED: process.env.METRICS_ENABLED || "true",
+          METRICS_NAMESPACE: process.env.METRICS_NAMESPACE || "JCMediaStreaming",
+          BOTO_MAX_POOL_CONNECTIONS: process.env.BOTO_MAX_POOL_CONNECTIONS || "20",
+          BOTO_CONNECT_TIMEOUT: process.env.BOTO_CONNECT_TIMEOUT || "1",
+          BOTO_READ_TIMEOUT: process.env.BOTO_READ_TIMEOUT || "3",
+          BOTO_RETRY_MODE: process.env.BOTO_RETRY_MODE || "adaptive",
+          BOTO_MAX_ATTEMPTS: process.env.BOTO_MAX_ATTEMPTS || "3",
+          CATALOG_SNAPSHOT_BUCKET: process.env.CATALOG_SNAPSHOT_BUCKET || "",
+          CATALOG_SNAPSHOT_PREFIX: process.env.CATALOG_SNAPSHOT_PREFIX || "catalog/",
+          CATALOG_SNAPSHOT_SCAN_PAGE_SIZE:
+            process.env.CATALOG_SNAPSHOT_SCAN_PAGE_SIZE || "1000",
+        },
+        layers: [pythonLayer],
+        timeout: cdk.Duration.minutes(5),
+        memorySize: 1024,
+        ephemeralStorageSize: cdk.Size.mebibytes(1024),
+      }
+    );
+
+    cdk.Tags.of(buildCatalogSnapshot).add(
+      mainStack.stackName,
+      "build_catalog_snapshot"
+    );
+
+    // rebuilds the catalog snapshot - a catalog change reaches get_medias within schedule + check interval
+    new events.Rule(this, "buildCatalogSnapshotSchedule", {
+      schedule: events.Schedule.expression(
+        process.env.CATALOG_SNAPSHOT_SCHEDULE || "rate(10 minutes)"
+      ),
+      targets: [new targets.LambdaFunction(buildCatalogSnapshot)],
+    });
+
+    new cdk.CfnOutput(this, "buildCatalogSnapshotARN", {
+      value: buildCatalogSnapshot.functionArn,
+    });
+
+    const presignWarmer = new lambda.Function(this, "presign_warmer", {
+      runtime: python3_12_runtime,
+      handler: "main.handler",
+      code: lambda.Code.fromAsset(
+        path.join(__dirname, "../lambdas/python/function/presign_warmer")
+      ),
+      role: presignWarmerLambdaRole,
+      environment: {
+        CF_PRIVATE_KEY_SECRET_ID: process.env.CF_PRIVATE_KEY_SECRET_ID || "",
+        CF_PUBLIC_KEY_ID: process.env.CF_PUBLIC_KEY_ID || "",
+        CF_DEFAULT_URL_EXP: process.env.CF_DEFAULT_URL_EXP || "3600",
+        CLOUDFRONT_DOMAIN: process.env.CLOUDFRONT_DOMAIN || "",
+        METADATA_DDB_TABLE_NAME: process.env.METADATA_DDB_TABLE_NAME || "",
+        PRESIGNED_URL_DDB_TABLE_NAME: process.env.PRESIGNED_URL_DDB_TABLE_NAME || "",
+        PRESIGN_WARMER_MAX_MEDIAS: process.env.PRESIGN_WARMER_MAX_MEDIAS || "100",
+        PRESIGN_WARMER_OVERLAP_SECONDS:
+          process.env.PRESIGN_WARMER_OVERLAP_SECONDS || "1800",
+        CATALOG_INDEX_NAME: process.env.CATALOG_INDEX_NAME || "catalog-created_at-index",
+        CATALOG_PARTITION_VALUE: process.env.CATALOG_PARTITION_VALUE || "media",
+        LOG_LEVEL: process.env.LOG_LEVEL || "",
+        LOG_FORMAT: process.env.LOG_FORMAT || "json",
+        METRICS_ENABLED: process.env.METRICS_ENABLED || "true",
+        METRICS_NAMESPACE: process.env.METRICS_NAMESPACE || "JCMediaStreaming",
+        BOTO_MAX_POOL_CONNECTIONS: process.env.BOTO_MAX_POOL_CONNECTIONS || "20",
+        BOTO_CONNECT_TIMEOUT: process.env.BOTO_CONNECT_TIMEOUT || "1",
+        BOTO_READ_TIMEOUT: process.env.BOTO_READ_TIMEOUT || "3",
+        BOTO_RETRY_MODE: process.env.BOTO_RETRY_MODE || "adaptive",
+        BOTO_MAX_ATTEMPTS: process.env.BOTO_MAX_ATTEMPTS || "3",
+      },
+      layers: [pythonLayer],
+      timeout: cdk.Duration.minutes(1),
+    });
+
+    cdk.Tags.of(presignWarmer).add(mainStack.stackName, "presign_warmer");
+
+    // re-signs the trending urls before the previous ones drop below CF_DEFAULT_URL_EXP of validity - the
+    // schedule interval must stay shorter than PRESIGN_WARMER_OVERLAP_SECONDS
+    new events.Rule(this, "presignWarmerSchedule", {
+      schedule: events.Schedule.expression(
+        process.env.PRESIGN_WARMER_SCHEDULE || "rate(15 minutes)"
+      ),
+      targets: [new targets.LambdaFunction(presignWarmer)],
+    });
+
+    new cdk.CfnOutput(this, "presignWarmerARN", {
+      value: presignWarmer.functionArn,
+    });
   }
 }